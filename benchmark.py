@@ -0,0 +1,428 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+from bitmap_gridworld import BitmapGridworld
+from flat_gridworld import FlatGridworld
+from gridworld import Gridworld
+from gridworld_generator import generate_true_maps
+from maze_store import load_maps, map_digest
+from runner import run_strategy
+from strategies import STRATEGIES
+from tiled_gridworld import TiledGridworld
+
+"""
+Reproducible benchmark suite for the solving strategies.
+
+`python3 benchmark.py run` solves every map set with every strategy and writes
+one JSON record per (map set, strategy) with wall time, expansions per second,
+expanded cells, max expanded cells, moves taken and peak memory.
+Tie-breaking is seeded per (map, strategy) as in runner.py, so the
+search counters of two runs with the same seed are identical and only
+time and memory can differ.
+
+`python3 benchmark.py compare old.json new.json` flags regressions between two runs.
+
+`python3 benchmark.py sweep` solves mazes over a range of sizes (and of
+complexity and density settings) with every strategy on every engine, and
+fits expansions, moves, wall time and memory against map size as power laws
+c * size ** k. For each curve it reports the exponent k, the size where the
+cost starts growing faster than that trend (the knee), and for wall time the
+size at which a map would take a given time budget; it also lists the
+fastest engine and strategy at each size.
+"""
+
+# Map sets bundled with the repository.
+BUNDLED_MAPS = {
+    "tiny": "gridworld_maps_tiny.maze",
+    "smaller": "gridworld_maps_smaller.maze",
+}
+
+# Engines a sweep can run, with the strategies each supports (None for all of them).
+FLAT_STRATEGIES = ("forward_large_g", "forward_small_g", "backward_large_g", "backward_small_g", "adaptive")
+ENGINES = {
+    "gridworld": (Gridworld, None),
+    "bitmap": (BitmapGridworld, None),
+    "flat": (FlatGridworld, FLAT_STRATEGIES + ("wavefront",)),
+    "tiled": (TiledGridworld, FLAT_STRATEGIES),
+}
+
+# Metrics a sweep fits against map size.
+SWEEP_METRICS = ("average_expanded_cells", "average_moves_taken", "wall_time_per_map", "peak_memory")
+# A cost has a knee where its growth exponent between two sizes exceeds its fitted exponent by this much.
+KNEE_MARGIN = 0.5
+
+# Metrics reported for every (map set, strategy), and whether a higher value is better.
+METRICS = {
+    "wall_time": False,
+    "expansions_per_sec": True,
+    "average_expanded_cells": False,
+    "average_max_expanded": False,
+    "average_moves_taken": False,
+    "peak_memory": False,
+}
+
+"""
+Solves every map with the named strategy and returns the benchmark record.
+Wall time is the best of repeat runs; peak memory is measured in a separate
+run under tracemalloc, since tracing slows the solver down.
+"""
+def bench_strategy(maps, name, seed=0, repeat=1, memory=True, engine=Gridworld) -> Dict:
+    gridworlds = [(k, engine(map_size=len(maps[k]) - 2, pregenerated_map=np.asarray(maps[k]).tolist(), lazy_reset=True),
+                   map_digest(maps[k])) for k in maps]
+
+    wall_time = None
+    for _ in range(repeat):
+        results = []
+        start = time.perf_counter()
+        for k, g, digest in gridworlds:
+            results.append(run_strategy(g, k, name, seed, digest))
+        elapsed = time.perf_counter() - start
+        wall_time = elapsed if wall_time is None or elapsed < wall_time else wall_time
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        for k, g, digest in gridworlds:
+            run_strategy(g, k, name, seed, digest)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    solved = [r for r in results if r["success"]]
+    n = len(solved)
+    total_expanded = sum(r["expanded_cells"] for r in results)
+    return {
+        "strategy": name,
+        "runs": len(results),
+        "successes": n,
+        "wall_time": wall_time,
+        "expansions_per_sec": total_expanded / wall_time if wall_time > 0 else 0.0,
+        "total_expanded_cells": total_expanded,
+        "average_expanded_cells": sum(r["expanded_cells"] for r in solved) / n if n else 0.0,
+        "average_max_expanded": sum(r["max_expanded"] for r in solved) / n if n else 0.0,
+        "average_moves_taken": sum(r["moves_taken"] for r in solved) / n if n else 0.0,
+        "peak_memory": peak_memory,
+    }
+
+"""
+Returns the map sets to benchmark: the bundled sets plus num_maps generated
+maps of each size in sizes, generated from the given seed.
+"""
+def benchmark_map_sets(bundled, sizes, num_maps, seed) -> Dict:
+    map_sets = {}
+    for name in bundled:
+        map_sets[name] = load_maps(BUNDLED_MAPS[name])
+    for size in sizes:
+        map_sets["generated_" + str(size)] = generate_true_maps(num_maps, size, seed=seed)
+
+    return map_sets
+
+"""
+Runs the benchmark suite and returns the full report.
+"""
+def run_benchmarks(map_sets, names, seed=0, repeat=1, memory=True) -> Dict:
+    records = []
+    for set_name, maps in map_sets.items():
+        for name in names:
+            record = bench_strategy(maps, name, seed, repeat, memory)
+            record["maps"] = set_name
+            records.append(record)
+            print(set_name + " / " + name + ": " + str(round(record["wall_time"], 3)) + " s, "
+                  + str(round(record["expansions_per_sec"])) + " expansions/s", file=sys.stderr)
+
+    return {
+        "meta": {
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": records,
+    }
+
+"""
+Compares two benchmark reports. Returns a list of (maps, strategy, metric,
+old value, new value, relative change, regressed) for every shared record.
+A metric regresses when it gets worse by more than threshold (a fraction).
+"""
+def compare_reports(old, new, threshold=0.1) -> List:
+    old_records = {(r["maps"], r["strategy"]): r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        key = (r["maps"], r["strategy"])
+        if key not in old_records:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            a, b = old_records[key].get(metric), r.get(metric)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else (0.0 if b == a else float("inf"))
+            worse = -change if higher_is_better else change
+            rows.append((key[0], key[1], metric, a, b, change, worse > threshold))
+
+    return rows
+
+"""
+Returns the largest peak memory, in bytes, of setting up an engine for one
+map of maps and solving it with the named strategy, so it covers the
+engine's per-cell arrays as well as the search.
+"""
+def peak_solve_memory(maps, name, seed=0, engine=Gridworld) -> int:
+    peak = 0
+    for k in maps:
+        m = np.asarray(maps[k]).tolist()
+        digest = map_digest(m)
+        tracemalloc.start()
+        g = engine(map_size=len(m) - 2, pregenerated_map=m, lazy_reset=True)
+        run_strategy(g, k, name, seed, digest)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return peak
+
+"""
+Returns the map sets of a sweep: num_maps solvable maps generated for every
+combination of size, complexity and density, plus the maps of each maze
+store or pickle file in paths (with their size read from the maps).
+Each is a dict with the set's name, size, complexity, density and maps.
+"""
+def sweep_map_sets(sizes, complexities, densities, num_maps, seed=0, paths=()) -> List[Dict]:
+    map_sets = []
+    for complexity in complexities:
+        for density in densities:
+            for size in sizes:
+                map_sets.append({
+                    "maps": "generated_" + str(size) + "_c" + str(complexity) + "_d" + str(density),
+                    "size": size,
+                    "complexity": complexity,
+                    "density": density,
+                    "map_set": generate_true_maps(num_maps, size, complexity, density, seed=seed, solvable=True),
+                })
+    for path in paths:
+        maps = load_maps(path)
+        map_sets.append({
+            "maps": path,
+            "size": len(maps[next(iter(maps))]) - 2,
+            "complexity": None,
+            "density": None,
+            "map_set": maps,
+        })
+
+    return map_sets
+
+"""
+Runs every named strategy on every engine over the map sets of a sweep,
+skipping the strategies an engine does not support. Returns one benchmark
+record per (map set, engine, strategy), with the set's size, complexity and
+density, the wall time per map and peak_memory from peak_solve_memory.
+"""
+def run_sweep(map_sets, engines, names, seed=0, repeat=1, memory=True) -> List[Dict]:
+    records = []
+    for map_set in map_sets:
+        for engine in engines:
+            engine_type, supported = ENGINES[engine]
+            for name in names:
+                if supported is not None and name not in supported:
+                    continue
+                maps = map_set["map_set"]
+                record = bench_strategy(maps, name, seed, repeat, False, engine_type)
+                record["peak_memory"] = peak_solve_memory(maps, name, seed, engine_type) if memory else None
+                record["wall_time_per_map"] = record["wall_time"] / record["runs"]
+                record["engine"] = engine
+                for key in ("maps", "size", "complexity", "density"):
+                    record[key] = map_set[key]
+                records.append(record)
+                print(record["maps"] + " / " + engine + " / " + name + ": "
+                      + str(round(record["wall_time_per_map"], 4)) + " s per map", file=sys.stderr)
+
+    return records
+
+"""
+Fits values = c * sizes ** k by least squares on a log-log scale.
+Returns (c, k, r2), or None with fewer than two distinct sizes with positive values.
+"""
+def fit_power_law(sizes, values):
+    points = [(x, y) for x, y in zip(sizes, values) if y is not None and y > 0]
+    if len({x for x, _ in points}) < 2:
+        return None
+    x = np.log([p[0] for p in points])
+    y = np.log([p[1] for p in points])
+    k, log_c = np.polyfit(x, y, 1)
+    residual = np.sum((y - (k * x + log_c)) ** 2)
+    total = np.sum((y - y.mean()) ** 2)
+    r2 = 1.0 - residual / total if total > 0 else 1.0
+
+    return float(np.exp(log_c)), float(k), float(r2)
+
+"""
+Returns the growth exponent between each pair of consecutive sizes:
+log(v2 / v1) / log(s2 / s1), or None where a value is missing or not positive.
+"""
+def local_exponents(sizes, values) -> List:
+    exponents = []
+    for (s1, v1), (s2, v2) in zip(zip(sizes, values), zip(sizes[1 :], values[1 :])):
+        if not v1 or not v2 or v1 <= 0 or v2 <= 0 or s1 == s2:
+            exponents.append(None)
+        else:
+            exponents.append(float(np.log(v2 / v1) / np.log(s2 / s1)))
+
+    return exponents
+
+"""
+Fits every metric of SWEEP_METRICS against map size, for every (engine,
+strategy, complexity, density) of a sweep. Returns one dict per curve with the
+fitted coefficient, exponent and r2, the growth exponent between consecutive
+sizes, the knee (the first size from which the cost grows faster than the
+fitted exponent by more than margin, or None) and, for wall time, the size at
+which one map would take budget seconds according to the fit.
+"""
+def fit_sweep(records, margin=KNEE_MARGIN, budget=1.0) -> List[Dict]:
+    groups = {}
+    for r in records:
+        groups.setdefault((r["engine"], r["strategy"], r["complexity"], r["density"]), []).append(r)
+
+    fits = []
+    for (engine, name, complexity, density), group in groups.items():
+        group.sort(key=lambda r: r["size"])
+        sizes = [r["size"] for r in group]
+        for metric in SWEEP_METRICS:
+            values = [r.get(metric) for r in group]
+            fit = fit_power_law(sizes, values)
+            if fit is None:
+                continue
+            c, k, r2 = fit
+            exponents = local_exponents(sizes, values)
+            knee = None
+            for size, e in zip(sizes, exponents):
+                if e is not None and e > k + margin:
+                    knee = size
+                    break
+            budget_size = None
+            if metric == "wall_time_per_map" and k > 0:
+                budget_size = (budget / c) ** (1.0 / k)
+            fits.append({
+                "engine": engine,
+                "strategy": name,
+                "complexity": complexity,
+                "density": density,
+                "metric": metric,
+                "sizes": sizes,
+                "values": values,
+                "coefficient": c,
+                "exponent": k,
+                "r2": r2,
+                "local_exponents": exponents,
+                "knee": knee,
+                "budget_size": budget_size,
+            })
+
+    return fits
+
+"""
+Returns the fastest (engine, strategy) per wall time for each map set of a
+sweep, among those that solved every map.
+"""
+def fastest_per_size(records) -> List[Dict]:
+    best = {}
+    for r in records:
+        if r["successes"] < r["runs"]:
+            continue
+        key = (r["size"], r["complexity"], r["density"])
+        if key not in best or r["wall_time_per_map"] < best[key]["wall_time_per_map"]:
+            best[key] = r
+
+    return [{"size": r["size"], "complexity": r["complexity"], "density": r["density"], "engine": r["engine"],
+             "strategy": r["strategy"], "wall_time_per_map": r["wall_time_per_map"]}
+            for _, r in sorted(best.items(), key=lambda item: (item[0][0], str(item[0][1 :])))]
+
+"""
+Prints the fits of a sweep, one line per curve, and the fastest engine and strategy per size.
+"""
+def print_sweep(fits, fastest, budget=1.0) -> None:
+    for f in fits:
+        settings = "" if f["complexity"] is None else " (complexity " + str(f["complexity"]) + ", density " + str(f["density"]) + ")"
+        line = (f["engine"].ljust(10) + f["strategy"].ljust(18) + f["metric"].ljust(24)
+                + ("~ %.3g * size^%.2f" % (f["coefficient"], f["exponent"])).ljust(22) + (" r2 %.3f" % f["r2"]))
+        if f["knee"] is not None:
+            line += "  knee at size " + str(f["knee"])
+        if f["budget_size"] is not None:
+            line += "  %gs per map at size %.0f" % (budget, f["budget_size"])
+        print(line + settings)
+    print("\nFastest per size:")
+    for b in fastest:
+        settings = "" if b["complexity"] is None else " (complexity " + str(b["complexity"]) + ", density " + str(b["density"]) + ")"
+        print("\t" + str(b["size"]).rjust(6) + ": " + b["engine"] + " / " + b["strategy"]
+              + ", " + ("%.4g" % b["wall_time_per_map"]) + " s per map" + settings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the solving strategies.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmark suite and write a JSON report")
+    run.add_argument("--output", default="benchmark.json", help="report file to write")
+    run.add_argument("--maps", nargs="*", choices=list(BUNDLED_MAPS), default=list(BUNDLED_MAPS),
+                     help="bundled map sets to run")
+    run.add_argument("--sizes", nargs="*", type=int, default=[], help="also run generated maps of these sizes")
+    run.add_argument("--num-maps", type=int, default=10, help="number of generated maps per size")
+    run.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES))
+    run.add_argument("--seed", type=int, default=0, help="seed for map generation and tie-breaking")
+    run.add_argument("--repeat", type=int, default=3, help="runs per strategy; the fastest is reported")
+    run.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    compare = commands.add_parser("compare", help="flag regressions between two reports")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    sweep = commands.add_parser("sweep", help="fit costs against map size and write a JSON report")
+    sweep.add_argument("--output", default="sweep.json", help="report file to write")
+    sweep.add_argument("--sizes", nargs="+", type=int, default=[25, 51, 101, 201], help="sizes of the generated maps")
+    sweep.add_argument("--complexity", nargs="+", type=float, default=[0.75], help="complexity settings of the generated maps")
+    sweep.add_argument("--density", nargs="+", type=float, default=[0.75], help="density settings of the generated maps")
+    sweep.add_argument("--num-maps", type=int, default=5, help="number of generated maps per setting")
+    sweep.add_argument("--load", nargs="*", default=[], help="also sweep over these maze store or pickle files")
+    sweep.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    sweep.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=["forward_large_g", "backward_large_g", "adaptive"])
+    sweep.add_argument("--seed", type=int, default=0, help="seed for map generation and tie-breaking")
+    sweep.add_argument("--repeat", type=int, default=1, help="runs per strategy; the fastest is reported")
+    sweep.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    sweep.add_argument("--budget", type=float, default=1.0, help="seconds per map to report the size of, from the wall time fits")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        map_sets = benchmark_map_sets(args.maps, args.sizes, args.num_maps, args.seed)
+        report = run_benchmarks(map_sets, args.strategies, args.seed, args.repeat, not args.no_memory)
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print("Wrote " + str(len(report["results"])) + " results to " + args.output)
+    elif args.command == "sweep":
+        map_sets = sweep_map_sets(args.sizes, args.complexity, args.density, args.num_maps, args.seed, args.load)
+        records = run_sweep(map_sets, args.engines, args.strategies, args.seed, args.repeat, not args.no_memory)
+        fits = fit_sweep(records, budget=args.budget)
+        fastest = fastest_per_size(records)
+        print_sweep(fits, fastest, args.budget)
+        meta = {"seed": args.seed, "repeat": args.repeat, "num_maps": args.num_maps, "budget": args.budget,
+                "python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with open(args.output, "w") as handle:
+            json.dump({"meta": meta, "results": records, "fits": fits, "fastest": fastest}, handle, indent=2)
+        print("Wrote " + str(len(records)) + " results and " + str(len(fits)) + " fits to " + args.output)
+    else:
+        with open(args.old) as handle:
+            old = json.load(handle)
+        with open(args.new) as handle:
+            new = json.load(handle)
+        regressions = 0
+        for maps, name, metric, a, b, change, regressed in compare_reports(old, new, args.threshold):
+            flag = "REGRESSION" if regressed else ""
+            print(maps.ljust(14) + name.ljust(18) + metric.ljust(24)
+                  + ("%.4g" % a).rjust(12) + ("%.4g" % b).rjust(12) + ("%+.1f%%" % (100 * change)).rjust(10) + "  " + flag)
+            regressions += regressed
+        print(str(regressions) + " regression(s)")
+        sys.exit(1 if regressions else 0)
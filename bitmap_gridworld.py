@@ -0,0 +1,165 @@
+from typing import List
+
+import numpy as np
+
+from gridworld import Gridworld
+from open_list import IndexedHeap
+
+"""
+Returns the rows of a 2D array of 0s and 1s as Python ints, with bit c of
+row r set when cell (r, c) is 1.
+"""
+def pack_rows(m) -> List[int]:
+    cells = np.asarray(m, dtype=np.uint8)
+    return [int.from_bytes(np.packbits(row, bitorder="little").tobytes(), "little") for row in cells]
+
+"""
+Gridworld with bit-packed rows for the true map and the discovered blocks.
+Every row is one Python int (one bit per cell), so sensing, successor generation and the
+"is the next cell blocked?" check of follow_path are a few masks per cell
+instead of nested list lookups with bounds checks, and follow_path only calls
+uncover when a new block is next to the agent.
+discovered_map is kept in step with the bitmaps (it changes only when a new
+block is found), so every search method of Gridworld runs unchanged on this
+backend, with the same results for the same seed.
+"""
+class BitmapGridworld(Gridworld):
+    def __init__(self, map_size=101, pregenerated_map=None, complexity=0.75, density=0.75, open_list_type=IndexedHeap, seed=None, lazy_reset=False) -> None:
+        self.true_rows = None  # Rows of the true map as ints; bit c is set if the cell is blocked.
+        self.wall_rows = []  # Rows of border cells; borders are never entered.
+        self.closed_rows = []  # Rows of cells a search cannot enter: discovered blocks and borders.
+        self.unseen_rows = []  # Rows of blocked cells not discovered yet.
+        self.bits = []  # bits[c] = 1 << c.
+        self.side_bits = []  # side_bits[c] = bits of columns c - 1 and c + 1.
+        super().__init__(map_size, pregenerated_map, complexity, density, open_list_type, seed, lazy_reset)
+
+    """
+    Resets the map as Gridworld.reset_map does and clears the discovered blocks.
+    The true map is packed into rows on the first reset.
+    """
+    def reset_map(self) -> None:
+        n = self.map_size
+        if self.true_rows is None:
+            self.true_rows = pack_rows(self.true_map)
+            full = (1 << n) - 1
+            self.wall_rows = [full] + [1 | (1 << (n - 1))] * (n - 2) + [full]
+            self.bits = [1 << c for c in range(n)]
+            self.side_bits = [0] + [(1 << (c - 1)) | (1 << (c + 1)) for c in range(1, n - 1)] + [0]
+        self.closed_rows = list(self.wall_rows)
+        self.unseen_rows = list(self.true_rows)
+        super().reset_map()
+
+    """
+    Marks the blocked cell s as discovered, in discovered_map and in the bitmap.
+    """
+    def discover_block(self, s) -> None:
+        super().discover_block(s)
+        self.closed_rows[s[0]] |= self.bits[s[1]]
+        self.unseen_rows[s[0]] &= ~self.bits[s[1]]
+
+    """
+    Generate a list of new states to explore from current state s, in the
+    order north, south, east, west, skipping borders and discovered blocks.
+    """
+    def create_action_states(self, s) -> List:
+        r, c = s
+        closed = self.closed_rows
+        bits = self.bits
+        bit = bits[c]
+        row = closed[r]
+
+        new_states = []
+        if not closed[r - 1] & bit:
+            new_states.append((r - 1, c))
+        if not closed[r + 1] & bit:
+            new_states.append((r + 1, c))
+        if not row & bits[c + 1]:
+            new_states.append((r, c + 1))
+        if not row & bits[c - 1]:
+            new_states.append((r, c - 1))
+
+        return new_states
+
+    """
+    Reveals the true contents of any cells to the north, south, east, and
+    west of the agent's current location. Blocks not discovered yet are found
+    with one mask per row and recorded directly (a cell still set in
+    unseen_rows is never in discovered_map), so usually nothing else is done.
+    """
+    def uncover(self) -> None:
+        r, c = self.agent
+        unseen = self.unseen_rows
+        bits = self.bits
+        bit = bits[c]
+        north = unseen[r - 1] & bit
+        south = unseen[r + 1] & bit
+        sides = unseen[r] & self.side_bits[c]
+        if not (north or south or sides):
+            return
+
+        closed = self.closed_rows
+        discovered_map = self.discovered_map
+        stamp = self.stamp
+        new_blocks = self.new_blocks
+        # North.
+        if north:
+            unseen[r - 1] ^= bit
+            closed[r - 1] |= bit
+            discovered_map[r - 1][c] = stamp
+            new_blocks.append((r - 1, c))
+        # South.
+        if south:
+            unseen[r + 1] ^= bit
+            closed[r + 1] |= bit
+            discovered_map[r + 1][c] = stamp
+            new_blocks.append((r + 1, c))
+        if sides:
+            unseen[r] ^= sides
+            closed[r] |= sides
+            # East.
+            if sides & bits[c + 1]:
+                discovered_map[r][c + 1] = stamp
+                new_blocks.append((r, c + 1))
+            # West.
+            if sides & bits[c - 1]:
+                discovered_map[r][c - 1] = stamp
+                new_blocks.append((r, c - 1))
+
+    """
+    Attempts to move the agent's location from its current cell
+    to the cell indicated by the given next state.
+    Returns False if unsuccessful, True otherwise.
+    """
+    def advance(self, next) -> bool:
+        if self.true_rows[next[0]] & self.bits[next[1]]:
+            return False
+        self.agent = next
+        self.moves_taken += 1
+        self.uncover()
+        return True
+
+    """
+    Given a created path, attempts to advance along this path
+    until the target is reached or a block is encountered.
+    Returns False if unsuccessful, True otherwise.
+    """
+    def follow_path(self, path) -> bool:
+        true_rows = self.true_rows
+        unseen = self.unseen_rows
+        bits = self.bits
+        side_bits = self.side_bits
+        moves = 0
+        for next in path[1 :]:
+            r, c = next
+            # Is the next cell of the path blocked?
+            if true_rows[r] & bits[c]:
+                self.moves_taken += moves
+                return False
+            self.agent = next
+            moves += 1
+            # Sense; uncover only runs when there is a new block around the agent.
+            if unseen[r - 1] & bits[c] or unseen[r + 1] & bits[c] or unseen[r] & side_bits[c]:
+                self.uncover()
+
+        self.moves_taken += moves
+        return True
@@ -0,0 +1,381 @@
+import numpy as np
+
+from gridworld import Gridworld
+from open_list import IndexedHeap
+
+# g value used for cells that have not been reached yet (fits in an int32 cell).
+INF = 2 ** 31 - 1
+
+"""
+Gridworld engine that keeps all per-cell state in flat, contiguous NumPy arrays.
+A cell (row, col) is identified by the integer id row * map_size + col, so the
+search loop works on plain ints instead of tuples. The closed list is an array
+stamped with the search counter, and successors are found by adding precomputed
+neighbour offsets to a cell id.
+Results (expanded_cells, moves_taken, max_expanded) are identical to Gridworld
+for the same seed.
+Adaptive A* keeps its h values in a typed h table (h_arr) with a validity mask
+(h_stamp_arr: a value is set only if its stamp is the current h_epoch), and
+updates it for the whole closed list at once. With keep_h, the table survives
+reset_map while the true map and target stay the same, so later adaptive runs
+start from the h values learned by earlier ones. The h values are only
+admissible for the blocks known when they were learned, so the blocks
+discovered so far are kept along with them: a kept run starts from the
+previous run's discovered map, not an empty one.
+"""
+class FlatGridworld(Gridworld):
+    def __init__(self, map_size=101, pregenerated_map=None, complexity=0.75, density=0.75, open_list_type=IndexedHeap, seed=None, lazy_reset=False, keep_h=False) -> None:
+        self.agent_id = 0  # Cell id of the agent.
+        self.target_id = 0  # Cell id of the target.
+        self.keep_h = keep_h  # Keep learned h values and discovered blocks across runs on the same map and target.
+        self.h_epoch = 0  # h values are set only if stamped with this epoch.
+        self.h_map = None  # True map the h table was allocated for.
+        self.h_target = None  # Target the h values are distances to.
+        super().__init__(map_size, pregenerated_map, complexity, density, open_list_type, seed, lazy_reset)
+
+    """
+    Resets the agent and the target to their default positions.
+    Allocates fresh per-cell arrays and wipes the discovered map.
+    With lazy_reset, the arrays are allocated once and stale entries are
+    told apart by stamps, as in Gridworld.reset_map.
+    If the h values are kept (see keeps_h), the discovered blocks are kept too.
+    """
+    def reset_map(self) -> None:
+        n = self.map_size
+        self.agent = (1, 1)
+        self.target = (n - 2, n - 2)
+        self.agent_id = self.cell_id(self.agent)
+        self.target_id = self.cell_id(self.target)
+        blocks = self.discovered_blocks() if self.keeps_h() else ()
+        self.episode += 1
+        if self.lazy_reset and self.episode > 1:
+            self.stamp = self.episode
+        else:
+            self.allocate_arrays()
+            self.counter = 0
+        self.reset_h_table()
+        for s in blocks:
+            self.known[s] = self.stamp
+        self.new_blocks = []
+
+        self.replans = 0
+        if self.stats is not None:
+            self.stats.reset()
+        self.expanded_cells = 0
+        self.moves_taken = 0
+        self.max_expanded = 0
+        self.uncover()  # Uncover the neighboring states to agent's starting position.
+
+    """
+    Allocates all per-cell arrays for the current true map.
+    """
+    def allocate_arrays(self) -> None:
+        n = self.map_size
+        # True map, 1 = blocked.
+        self.blocked_arr = np.ascontiguousarray(self.true_map, dtype=np.uint8).reshape(-1)
+        # 1 for interior cells; searches never step onto the borders.
+        inside = np.zeros((n, n), dtype=np.uint8)
+        inside[1 : n - 1, 1 : n - 1] = 1
+        self.inside_arr = inside.reshape(-1)
+        # Discovered map; blocks are marked with the current stamp. discovered_map is a 2D view of it.
+        self.known_arr = np.zeros(n * n, dtype=np.int32)
+        self.discovered_map = self.known_arr.reshape(n, n)
+        self.g_arr = np.zeros(n * n, dtype=np.int32)
+        self.search_arr = np.zeros(n * n, dtype=np.int32)
+        self.parent_arr = np.zeros(n * n, dtype=np.int32)
+        self.closed_arr = np.zeros(n * n, dtype=np.int32)  # Search counter of the last search that closed the cell.
+
+        # Memoryviews give fast scalar access to the arrays in the search loop.
+        self.blocked = memoryview(self.blocked_arr)
+        self.inside = memoryview(self.inside_arr)
+        self.known = memoryview(self.known_arr)
+        self.g_mem = memoryview(self.g_arr)
+        self.search_mem = memoryview(self.search_arr)
+        self.parent_mem = memoryview(self.parent_arr)
+        self.closed_mem = memoryview(self.closed_arr)
+
+        # Neighbour offsets in the order N, S, E, W.
+        self.offsets = (-n, n, 1, -1)
+
+    """
+    Allocates the h table for the current true map, with no h value set.
+    """
+    def allocate_h_table(self) -> None:
+        n = self.map_size
+        self.h_arr = np.zeros(n * n, dtype=np.int32)
+        self.h_stamp_arr = np.zeros(n * n, dtype=np.int32)  # h epoch in which each h value was set.
+        self.h_mem = memoryview(self.h_arr)
+        self.h_stamp_mem = memoryview(self.h_stamp_arr)
+
+    """
+    Returns True if keep_h is set and the true map and target are the ones
+    the h values were learned for, so the next reset_map keeps them.
+    """
+    def keeps_h(self) -> bool:
+        return self.keep_h and self.h_map is self.true_map and self.h_target == self.target_id
+
+    """
+    Returns the cell ids of the blocks in the discovered map.
+    """
+    def discovered_blocks(self) -> list:
+        return np.flatnonzero(self.known_arr == self.stamp).tolist()
+
+    """
+    Invalidates every h value by moving to a new h epoch, unless keeps_h.
+    The table is only allocated again when the true map changes.
+    """
+    def reset_h_table(self) -> None:
+        if self.h_map is not self.true_map:
+            self.allocate_h_table()
+            self.h_map = self.true_map
+            self.h_epoch = 0
+        elif self.keeps_h():
+            return
+        self.h_epoch += 1
+        self.h_target = self.target_id
+
+    """
+    Updates the h values of every cell in closed_list to h(s) = g(s_goal) - g(s),
+    with one vectorized assignment over the h table.
+    """
+    def update_h(self, closed_list, g_goal) -> None:
+        cells = np.fromiter(closed_list, dtype=np.intp, count=len(closed_list))
+        self.h_arr[cells] = g_goal - self.g_arr[cells]
+        self.h_stamp_arr[cells] = self.h_epoch
+
+    """
+    Returns the flat cell id of state s = (row, col).
+    """
+    def cell_id(self, s) -> int:
+        return s[0] * self.map_size + s[1]
+
+    """
+    Returns the state (row, col) of the given flat cell id.
+    """
+    def cell_state(self, i) -> tuple:
+        return divmod(i, self.map_size)
+
+    """
+    Manhattan distance between two cell ids.
+    """
+    def h_id(self, a, b) -> int:
+        ar, ac = divmod(a, self.map_size)
+        br, bc = divmod(b, self.map_size)
+        return abs(ar - br) + abs(ac - bc)
+
+    """
+    Adaptive heuristic for a cell id; h values not set in this h epoch are
+    filled in lazily with the Manhattan distance, as in Gridworld.h_new.
+    """
+    def h_new_id(self, s, s_goal) -> int:
+        if self.h_stamp_mem[s] != self.h_epoch:
+            self.h_mem[s] = self.h_id(s, s_goal)
+            self.h_stamp_mem[s] = self.h_epoch
+
+        return self.h_mem[s]
+
+    """
+    A* over cell ids, based on agent's knowledge of the gridworld.
+    With adaptive set, uses the adaptive heuristic and always breaks ties
+    favoring larger g-values. Appends every expanded cell to closed_list.
+    Returns True if a path is found, False otherwise.
+    """
+    def compute_path_flat(self, s_start, s_goal, open_list, closed_list, counter, g_max, large_g_ties=True, adaptive=False) -> bool:
+        g = self.g_mem
+        search = self.search_mem
+        parent = self.parent_mem
+        closed = self.closed_mem
+        inside = self.inside
+        known = self.known
+        stamp = self.stamp
+        offsets = self.offsets
+        randint = self.random.randint
+        h_new_id = self.h_new_id
+        n = self.map_size
+        goal_row, goal_col = divmod(s_goal, n)
+
+        expanded = 0
+        while len(open_list) > 0:
+            # Identify a state s with the smallest f-value in the open list.
+            s = open_list.pop()[2]
+
+            # If s is the goal state, A* is finished.
+            if s == s_goal:
+                self.max_expanded = expanded if expanded > self.max_expanded else self.max_expanded
+                return True
+            # Add s to the closed list.
+            closed[s] = counter
+            closed_list.append(s)
+            self.expanded_cells += 1
+            expanded += 1
+
+            g_succ = g[s] + 1
+            for offset in offsets:
+                succ = s + offset
+                # Skip blocked cells, borders and states already in closed list.
+                if not inside[succ] or known[succ] == stamp or closed[succ] == counter:
+                    continue
+
+                if search[succ] < counter:
+                    g[succ] = INF
+                    search[succ] = counter
+
+                if g[succ] > g_succ:
+                    g[succ] = g_succ
+                    parent[succ] = s
+
+                    # Insert successor state into open list, or update its priority.
+                    if adaptive:
+                        priority = g_max * (g_succ + h_new_id(succ, s_goal)) - g_succ
+                        tie_breaker = randint(0, 100)
+                    else:
+                        row, col = divmod(succ, n)
+                        f = g_succ + abs(row - goal_row) + abs(col - goal_col)
+                        if large_g_ties:
+                            priority = g_max * f - g_succ
+                            tie_breaker = randint(0, 100)
+                        else:
+                            priority = f + g_succ
+                            tie_breaker = 0
+                    open_list.push((priority, tie_breaker, succ))
+
+        return False
+
+    """
+    Repeated A* (or adaptive A*) over cell ids from agent to target.
+    Continuously calls compute_path_flat until agent reaches target
+    or when no path is found.
+    Returns True if a path is found, False otherwise.
+    """
+    def repeated_compute_path_flat(self, reverse=False, large_g_ties=True, adaptive=False) -> bool:
+        self.reset_map()
+        g = self.g_mem
+        search = self.search_mem
+        g_max = self.map_size ** 2
+
+        s_start = self.agent_id
+        s_goal = self.target_id
+        if reverse:
+            s_start, s_goal = s_goal, s_start
+
+        while s_start != s_goal:
+            # Backward searches start from the target; once it is a discovered block, there is no path.
+            if reverse and self.known[s_start] == self.stamp:
+                return False
+
+            self.counter += 1
+            counter = self.counter
+            g[s_start] = 0
+            search[s_start] = counter
+            g[s_goal] = INF
+            search[s_goal] = counter
+
+            open_list = self.new_open_list()
+            closed_list = []
+
+            if adaptive:
+                priority = g_max * self.h_new_id(s_start, s_goal)
+            elif large_g_ties:
+                priority = g_max * self.h_id(s_start, s_goal)
+            else:
+                priority = self.h_id(s_start, s_goal)
+            open_list.push((priority, 0, s_start))
+
+            replan = self.start_replan()
+            path_found = self.compute_path_flat(s_start, s_goal, open_list, closed_list, counter, g_max, large_g_ties, adaptive)
+            self.end_search(replan)
+
+            # If open list is empty, no path exists to the target.
+            if len(open_list) == 0 and not path_found:
+                self.end_replan(replan, s_start, s_goal, None)
+                return False
+
+            path = self.build_path(s_start, s_goal, reverse)
+            self.end_build_path(replan)
+            reached = self.follow_path(path)
+            self.end_replan(replan, s_start, s_goal, path)
+            # Update h_new heuristic: h(s) = g(s_goal) - g(s). With keep_h, the
+            # last search is learned from too, for the next run.
+            if adaptive and (not reached or self.keep_h):
+                self.update_h(closed_list, g[s_goal])
+            if reached:
+                return True
+
+            # Otherwise, move the end of the search that the agent is at.
+            if reverse:
+                s_goal = self.agent_id
+            else:
+                s_start = self.agent_id
+
+    """
+    Repeated A* to find the shortest path from agent to target.
+    Same interface and results as Gridworld.repeated_compute_path; only the
+    "astar" planner is implemented over cell ids.
+    """
+    def repeated_compute_path(self, reverse=False, large_g_ties=True, planner="astar") -> bool:
+        if planner != "astar":
+            raise ValueError("FlatGridworld does not support planner: " + str(planner))
+        return self.repeated_compute_path_flat(reverse, large_g_ties)
+
+    """
+    Adaptive repeated A* to find the shortest path from agent to target.
+    Same interface and results as Gridworld.adaptive_repeated_compute_path.
+    """
+    def adaptive_repeated_compute_path(self) -> bool:
+        return self.repeated_compute_path_flat(adaptive=True)
+
+    """
+    Tree-Adaptive A* is not implemented over cell ids.
+    """
+    def tree_adaptive_repeated_compute_path(self) -> bool:
+        raise ValueError(type(self).__name__ + " does not support planner: tree_adaptive")
+
+    """
+    D* Lite is not implemented over cell ids.
+    """
+    def d_star_lite_repeated_compute_path(self) -> bool:
+        raise ValueError(type(self).__name__ + " does not support planner: d_star_lite")
+
+    """
+    Follows the parent array from s_goal back to s_start and returns
+    the path of cell ids from agent's location to the end of the path.
+    """
+    def build_path(self, s_start, s_goal, reverse=False) -> list:
+        parent = self.parent_mem
+        s = s_goal
+        path = [s]
+        while s != s_start:
+            s = parent[s]
+            path.append(s)
+
+        if reverse:
+            return path
+        else:
+            return path[: : -1]
+
+    """
+    Reveals the true contents of the four cells around the agent.
+    Cells that were not known to be blocked yet are recorded in new_blocks,
+    as (row, col), as in Gridworld.uncover.
+    """
+    def uncover(self) -> None:
+        a = self.agent_id
+        stamp = self.stamp
+        for offset in self.offsets:
+            s = a + offset
+            if self.blocked[s] and self.known[s] != stamp:
+                self.known[s] = stamp
+                self.new_blocks.append(divmod(s, self.map_size))
+
+    """
+    Attempts to move the agent to the given cell id.
+    Returns False if unsuccessful, True otherwise.
+    """
+    def advance(self, next) -> bool:
+        if self.blocked[next]:
+            return False
+        self.agent_id = next
+        self.agent = divmod(next, self.map_size)
+        self.moves_taken += 1
+        self.uncover()
+        return True
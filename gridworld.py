@@ -1,25 +1,58 @@
 from cmath import inf
-from random import randint
+from random import Random
+import sys
+from time import perf_counter
 from typing import List
-import numpy as np
-from heapq import heapify, heappop, heappush
+
+from gridworld_generator import generate_map
+from instrumentation import CountingOpenList
+from open_list import IndexedHeap
+from render import render_frame
+
+# ARA* keeps its inflation factor as an integer number of hundredths, so priorities stay integers.
+ARA_SCALE = 100
 
 """
 Class representing one gridworld of a given size.
 """
 class Gridworld:
-    def __init__(self, map_size=101, pregenerated_map=None, complexity=0.75, density=0.75) -> None:
+    def __init__(self, map_size=101, pregenerated_map=None, complexity=0.75, density=0.75, open_list_type=IndexedHeap, seed=None, lazy_reset=False) -> None:
         self.map_size = map_size + 2  # Size of the square gridworld in # of blocks (must be odd, add 2 for borders).
-        self.true_map = [[0] * (self.map_size) for _ in range((self.map_size))]  # 2D array representing the gridworld. 0 = unblocked, 1 = blocked.
-        self.discovered_map = [[]]  # Gridworld with all information discovered by agent only.
+        self.true_map = [[]]  # 2D array representing the gridworld. 0 = unblocked, 1 = blocked.
+        self.discovered_map = [[]]  # Gridworld with all information discovered by agent only. Blocks are marked with the current stamp.
         self.g_vals = [[]]  # g values for all cells.
         self.h_vals = [[]]  # h values for all cells.
+        self.h_stamps = [[]]  # Stamp of the episode in which each h value was set.
         self.search_vals = [[]]  # search values for all cells.
+        self.rhs_vals = [[]]  # rhs values for all cells (D* Lite).
+        self.parents = [[]]  # Tree-pointers for all cells; valid when search value matches the search counter.
+        self.back_g_vals = [[]]  # g values of the backward half of a bidirectional search.
+        self.back_search_vals = [[]]  # search values of the backward half of a bidirectional search.
+        self.back_parents = [[]]  # Tree-pointers of the backward half of a bidirectional search.
+        self.tree_next = [[]]  # Next cell towards the target on the paths kept by Tree-Adaptive A*.
+        self.tree_stamps = [[]]  # Stamp of the episode in which each cell was added to the path tree.
+        self.tree_vals = [[]]  # Search counter if the cell's tree path was found unblocked in that search, minus it if blocked.
         self.agent = (0, 0)  # Location of the agent on the map.
         self.target = (0, 0)  # Location of the target on the map.
         self.expanded_cells = 0  # Number of expanded cells (cells added to closed list).
         self.moves_taken = 0  # Number of moves made by the agent.
         self.max_expanded = 0  # Max # of cells expanded in any single A* search.
+        self.open_list_type = open_list_type  # Open list backend used by A* (see open_list.py).
+        self.random = Random(seed)  # Random tie-breaker source; pass a seed for deterministic runs.
+        self.lazy_reset = lazy_reset  # If True, reset_map keeps all per-cell grids and runs in O(1).
+        self.episode = 0  # Number of times the map has been reset.
+        self.stamp = 1  # Marks discovered blocks and valid h values of the current episode.
+        self.counter = 0  # Search counter; with lazy_reset it keeps increasing across episodes.
+        self.new_blocks = []  # Blocked cells discovered by uncover, for planners that repair earlier searches.
+        self.replans = 0  # Number of searches in the current run.
+        self.stats = None  # SearchStats collecting counters and timings of each run, or None.
+        self.on_replan = None  # Function called with a dict describing each replan, or None.
+        self.trace = None  # search_trace.TraceRecorder recording each replan, or None.
+        self.cluster_graph = None  # hpa.ClusterGraph kept across runs by HPA*, or None.
+        self.ara_epsilon = 2.0  # Initial inflation factor of the heuristic in ARA*.
+        self.ara_epsilon_step = 0.5  # Amount ARA* lowers the inflation factor by after each path.
+        self.ara_time_budget = None  # Seconds ARA* may spend improving a path per search; None for no limit.
+        self.ara_bound = 1.0  # Inflation factor of the last path ARA* completed; its length is at most this times the shortest.
 
         if pregenerated_map is None:
             self.generate_map(complexity, density)  # Generate a new true map.
@@ -31,14 +64,36 @@ class Gridworld:
     """
     Resets the agent and the target to their default positions.
     Clears all g & search values and wipes the discovered map.
+    With lazy_reset, nothing is reallocated after the first reset: the episode
+    number becomes the new stamp, so blocks and h values stamped in earlier
+    episodes read as unset, and the search counter keeps increasing so stale
+    g values are ignored through the search values.
     """
     def reset_map(self) -> None:
         self.agent = (1, 1)
         self.target = (self.map_size - 2, self.map_size - 2)
-        self.discovered_map = [[0] * (self.map_size) for _ in range((self.map_size))]
-        self.g_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
-        self.h_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
-        self.search_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
+        self.episode += 1
+        if self.lazy_reset and self.episode > 1:
+            self.stamp = self.episode
+        else:
+            self.discovered_map = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.g_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.h_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.h_stamps = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.search_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.rhs_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.parents = [[None] * (self.map_size) for _ in range((self.map_size))]
+            self.back_g_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.back_search_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.back_parents = [[None] * (self.map_size) for _ in range((self.map_size))]
+            self.tree_next = [[None] * (self.map_size) for _ in range((self.map_size))]
+            self.tree_stamps = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.tree_vals = [[0] * (self.map_size) for _ in range((self.map_size))]
+            self.counter = 0
+        self.new_blocks = []
+        self.replans = 0
+        if self.stats is not None:
+            self.stats.reset()
         self.expanded_cells = 0 
         self.moves_taken = 0
         self.max_expanded = 0
@@ -47,46 +102,11 @@ class Gridworld:
     """
     Generate a map with blocked obstacles (1) and unblocked free space (0).
     Borders are denoted as obstacles.
+    The map is seeded from the tie-breaker source, so a seeded Gridworld
+    always generates the same map (see gridworld_generator.generate_map).
     """
     def generate_map(self, complexity=0.75, density=0.75) -> None:
-        # Define the empty maze with extra space for borders.
-        # Assume that the dimensions are odd; correct otherwise.
-        shape = ((self.map_size // 2) * 2 + 1, (self.map_size // 2) * 2 + 1)
-
-        # Adjust complexity and density to correspond to maze size.
-        complexity = int(complexity * (5 * (shape[0] + shape[1])))
-        density = int(density * ((shape[0] // 2) * (shape[1] // 2)))
-
-        # Create the maze.
-        maze = np.zeros(shape, dtype=bool)
-
-        # Create borders, representing as blocked obstacles.
-        maze[0, :] = maze[-1, :] = 1
-        maze[:, 0] = maze[:, -1] = 1
-
-        # Create aisles.
-        for _ in range(density):
-            x, y = np.random.randint(0, shape[1] // 2 + 1) * 2, np.random.randint(0, shape[0] // 2 + 1) * 2
-            maze[y, x] = 1
-            for _ in range(complexity):
-                neighbors = []
-                if x > 1:
-                    neighbors.append((y, x - 2))
-                if x < shape[1] - 2:
-                    neighbors.append((y, x + 2))
-                if y > 1:
-                    neighbors.append((y - 2, x))
-                if y < shape[0] - 2:
-                    neighbors.append((y + 2, x))
-                if len(neighbors):
-                    y_, x_ = neighbors[np.random.randint(0, len(neighbors))]
-                    if maze[y_, x_] == 0:
-                        maze[y_, x_] = 1
-                        maze[y_ + (y - y_) // 2, x_ + (x - x_) // 2] = 1
-                        x, y = x_, y_
-
-        complete_maze = maze.astype(int)
-        self.true_map = complete_maze
+        self.true_map = generate_map(self.map_size - 2, complexity, density, self.random.getrandbits(64))
 
     """
     h(n), a heuristic function for A*.
@@ -115,7 +135,7 @@ class Gridworld:
     Normal A* to find the shortest path, based on agent's knowledge of the gridworld.
     Returns True if a path is found, False otherwise.
     """
-    def compute_path(self, s_start, s_goal, open_list, closed_list, tree, counter, g_max, large_g_ties=True) -> bool:
+    def compute_path(self, s_start, s_goal, open_list, closed_list, counter, g_max, large_g_ties=True) -> bool:
         #while self.g(s_goal) > self.g(open_list[0][2]) + self.h(open_list[0][2], s_goal):
         #print(counter)
         expanded = 0
@@ -124,7 +144,7 @@ class Gridworld:
             #     return False
 
             # Identify a state s with the smallest f-value in the open list.
-            s = heappop(open_list)[2]
+            s = open_list.pop()[2]
 
             # If s is the goal state, A* is finished.
             if s == s_goal:
@@ -160,47 +180,375 @@ class Gridworld:
                     # Sets g value of successor state to g value of s plus action cost (1).
                     self.g_vals[succ[0]][succ[1]] = self.g_vals[s[0]][s[1]] + 1
                     # Set tree-pointer of successor state to point to state s.
-                    tree.append((succ, s))
+                    self.parents[succ[0]][succ[1]] = s
                 
-                    i = self.is_in_open_list(succ, open_list)
-
-                    # Insert successor state into open list (if it is not already there).
-                    if i is None:
-                        priority = 0
-                        tie_breaker = 0
-                        if large_g_ties:
-                            priority = g_max * self.f(succ, s_goal) - self.g(succ)
-                            tie_breaker = randint(0, 100)
-                        else:
-                            priority = self.f(succ, s_goal) + self.g(succ)
-                        #print("Adding " + str(succ))
-                        heappush(open_list, (priority, tie_breaker, succ))
+                    # Insert successor state into open list, or update its priority
+                    # if it is already there (decrease-key).
+                    priority = 0
+                    tie_breaker = 0
+                    if large_g_ties:
+                        priority = g_max * self.f(succ, s_goal) - self.g(succ)
+                        tie_breaker = self.random.randint(0, 100)
                     else:
-                        # Remove state from open list and add it back with new f value.
-                        # (Really, we just change its priority and re-heapify.)
-                        priority = 0
-                        tie_breaker = 0
-                        if large_g_ties:
-                            priority = g_max * self.f(succ, s_goal) - self.g(succ)
-                            tie_breaker = randint(0, 100)
-                        else:
-                            priority = self.f(succ, s_goal) + self.g(succ)
-                        #print("Updating " + str(succ))
-                        open_list[i] = (priority, tie_breaker, succ)
-                        heapify(open_list)
+                        priority = self.f(succ, s_goal) + self.g(succ)
+                    #print("Adding " + str(succ))
+                    open_list.push((priority, tie_breaker, succ))
 
         return False
     
+    """
+    Returns True if cell (r, c) is inside the borders and not a discovered block.
+    Undiscovered cells are assumed to be unblocked.
+    """
+    def is_free(self, r, c) -> bool:
+        return 0 < r < self.map_size - 1 and 0 < c < self.map_size - 1 and self.discovered_map[r][c] != self.stamp
+
+    """
+    Jumps from s one row at a time in direction dr (1 = south, -1 = north).
+    Returns the first cell that is s_goal or has a forced neighbour (a free cell
+    beside it whose neighbour behind is blocked, so the shortest path may have
+    to turn there), or None if a block or border is hit first.
+    """
+    def jump_vertical(self, s, dr, s_goal):
+        discovered_map = self.discovered_map
+        stamp = self.stamp
+        last = self.map_size - 2
+        r, c = s
+        west = c > 1
+        east = c < last
+        while True:
+            r += dr
+            if not 0 < r <= last or discovered_map[r][c] == stamp:
+                return None
+            if r == s_goal[0] and c == s_goal[1]:
+                return (r, c)
+            # The row behind is always inside the borders: the jump came from it.
+            row = discovered_map[r]
+            behind = discovered_map[r - dr]
+            if west and row[c - 1] != stamp and behind[c - 1] == stamp:
+                return (r, c)
+            if east and row[c + 1] != stamp and behind[c + 1] == stamp:
+                return (r, c)
+
+    """
+    Jumps from s one column at a time in direction dc (1 = east, -1 = west).
+    Paths may turn from horizontal to vertical anywhere, so a cell is a jump
+    point if s_goal or a jump point can be reached from it vertically.
+    Returns that cell, or None if a block or border is hit first.
+    """
+    def jump_horizontal(self, s, dc, s_goal):
+        row = self.discovered_map[s[0]]
+        stamp = self.stamp
+        last = self.map_size - 2
+        r, c = s
+        while True:
+            c += dc
+            if not 0 < c <= last or row[c] == stamp:
+                return None
+            if r == s_goal[0] and c == s_goal[1]:
+                return (r, c)
+            if self.jump_vertical((r, c), -1, s_goal) is not None or self.jump_vertical((r, c), 1, s_goal) is not None:
+                return (r, c)
+
+    """
+    Returns the jump point successors of s for Jump Point Search.
+    Shortest paths are only searched in the canonical order in which a path
+    turns from horizontal to vertical anywhere but from vertical to horizontal
+    only at forced neighbours, so all other symmetric paths are pruned.
+    """
+    def jump_successors(self, s, s_start, s_goal) -> List:
+        r, c = s
+        dr = dc = 0
+        if s != s_start:
+            # Direction s was reached from its parent.
+            p = self.parents[r][c]
+            dr = (r > p[0]) - (r < p[0])
+            dc = (c > p[1]) - (c < p[1])
+
+        jumps = []
+        if dr == 0:
+            # Start, or reached moving horizontally: keep going and turn either way.
+            for d in ((dc,) if dc else (1, -1)):
+                jumps.append(self.jump_horizontal(s, d, s_goal))
+            for d in (1, -1):
+                jumps.append(self.jump_vertical(s, d, s_goal))
+        else:
+            # Reached moving vertically: keep going, and turn only at forced neighbours.
+            jumps.append(self.jump_vertical(s, dr, s_goal))
+            for d in (1, -1):
+                if self.is_free(r, c + d) and not self.is_free(r - dr, c + d):
+                    jumps.append(self.jump_horizontal(s, d, s_goal))
+
+        return [j for j in jumps if j is not None]
+
+    """
+    Jump Point Search (4-connected) to find the shortest path, based on agent's knowledge of the gridworld.
+    Same interface as compute_path, but only jump points are generated and
+    expanded, so expanded_cells and max_expanded count jump points.
+    On success, the parents of the cells between consecutive jump points on
+    the path are filled in, so build_path works as after compute_path.
+    Returns True if a path is found, False otherwise.
+    """
+    def jps_compute_path(self, s_start, s_goal, open_list, closed_list, counter, g_max, large_g_ties=True) -> bool:
+        expanded = 0
+        while len(open_list) > 0:
+            # Identify a state s with the smallest f-value in the open list.
+            s = open_list.pop()[2]
+
+            # If s is the goal state, JPS is finished.
+            if s == s_goal:
+                self.max_expanded = expanded if expanded > self.max_expanded else self.max_expanded
+                self.fill_jump_parents(s_start, s_goal)
+                return True
+            closed_list.add(s)
+            self.expanded_cells += 1
+            expanded += 1
+
+            for succ in self.jump_successors(s, s_start, s_goal):
+                # Skip states already in closed list.
+                if succ in closed_list:
+                    continue
+
+                if self.search_vals[succ[0]][succ[1]] < counter:
+                    self.g_vals[succ[0]][succ[1]] = inf
+                    self.search_vals[succ[0]][succ[1]] = counter
+
+                # Jump points are joined by straight segments, whose cost is their length.
+                cost = abs(succ[0] - s[0]) + abs(succ[1] - s[1])
+                if self.g(succ) > self.g(s) + cost:
+                    self.g_vals[succ[0]][succ[1]] = self.g_vals[s[0]][s[1]] + cost
+                    self.parents[succ[0]][succ[1]] = s
+
+                    priority = 0
+                    tie_breaker = 0
+                    if large_g_ties:
+                        priority = g_max * self.f(succ, s_goal) - self.g(succ)
+                        tie_breaker = self.random.randint(0, 100)
+                    else:
+                        priority = self.f(succ, s_goal) + self.g(succ)
+                    open_list.push((priority, tie_breaker, succ))
+
+        return False
+
+    """
+    Points every cell on the found path from s_start to s_goal at its neighbour
+    towards s_start, filling in the cells that Jump Point Search jumped over.
+    """
+    def fill_jump_parents(self, s_start, s_goal) -> None:
+        s = s_goal
+        while s != s_start:
+            p = self.parents[s[0]][s[1]]
+            dr = (p[0] > s[0]) - (p[0] < s[0])
+            dc = (p[1] > s[1]) - (p[1] < s[1])
+            while s != p:
+                prev = (s[0] + dr, s[1] + dc)
+                self.parents[s[0]][s[1]] = prev
+                s = prev
+
+    """
+    Bidirectional A* to find the shortest path, based on agent's knowledge of the gridworld.
+    Same interface as compute_path: open_list and closed_list hold the forward
+    search from s_start, and a backward search from s_goal runs alongside it
+    over the back_* grids. Each step expands the side with the smaller open list.
+    Every cell reached by both searches joins a path of cost g + back g; the
+    search stops once the best such path costs no more than the larger of the
+    two smallest f-values, after which no shorter path can exist.
+    On these maps it expands more cells than forward A* (about 1.5 times as
+    many at size 101) and is slower per replan: both sides have to close
+    every cell with an f-value below the cost of the path, while forward A*
+    with large-g ties runs straight through the open space the agent has not
+    seen. Picking the side with the smaller f-value instead is far worse.
+    On success, parents hold the whole path from s_goal back to s_start.
+    Returns True if a path is found, False otherwise (at once if s_goal is a discovered block).
+    """
+    def bidirectional_compute_path(self, s_start, s_goal, open_list, closed_list, counter, g_max, large_g_ties=True) -> bool:
+        # A blocked s_goal cannot be reached, though the backward search would still start from it.
+        if self.discovered_map[s_goal[0]][s_goal[1]] == self.stamp:
+            return False
+
+        # Start the backward search from s_goal.
+        self.back_g_vals[s_goal[0]][s_goal[1]] = 0
+        self.back_search_vals[s_goal[0]][s_goal[1]] = counter
+        back_open_list = self.new_open_list()
+        back_open_list.push((g_max * self.h(s_goal, s_start), 0, s_goal))
+        back_closed_list = set()
+
+        # (open list, closed list, g values, search values, parents, end searched for, other side's g and search values)
+        forward = (open_list, closed_list, self.g_vals, self.search_vals, self.parents, s_goal,
+                   self.back_g_vals, self.back_search_vals)
+        backward = (back_open_list, back_closed_list, self.back_g_vals, self.back_search_vals, self.back_parents, s_start,
+                    self.g_vals, self.search_vals)
+
+        best = inf  # Cost of the shortest path found so far.
+        meet = None  # Cell joining the two halves of that path.
+        expanded = 0
+        while len(open_list) > 0 and len(back_open_list) > 0:
+            s = open_list.peek()[2]
+            f_forward = self.g_vals[s[0]][s[1]] + self.h(s, s_goal)
+            s = back_open_list.peek()[2]
+            f_backward = self.back_g_vals[s[0]][s[1]] + self.h(s, s_start)
+            if best <= max(f_forward, f_backward):
+                break
+
+            frontier, closed, g_vals, search_vals, parents, end, other_g_vals, other_search_vals = \
+                forward if len(open_list) <= len(back_open_list) else backward
+            s = frontier.pop()[2]
+            closed.add(s)
+            self.expanded_cells += 1
+            expanded += 1
+
+            g_succ = g_vals[s[0]][s[1]] + 1
+            for succ in self.create_action_states(s):
+                if succ in closed:
+                    continue
+                r, c = succ
+                if search_vals[r][c] < counter:
+                    g_vals[r][c] = inf
+                    search_vals[r][c] = counter
+
+                if g_vals[r][c] > g_succ:
+                    g_vals[r][c] = g_succ
+                    parents[r][c] = s
+
+                    # Order by f first, so the smallest f of each side is at the top of its open list.
+                    tie_breaker = 0
+                    if large_g_ties:
+                        priority = g_max * (g_succ + self.h(succ, end)) - g_succ
+                        tie_breaker = self.random.randint(0, 100)
+                    else:
+                        priority = g_max * (g_succ + self.h(succ, end)) + g_succ
+                    frontier.push((priority, tie_breaker, succ))
+
+                    # The other side reached succ too: a path runs through it.
+                    if other_search_vals[r][c] == counter and g_succ + other_g_vals[r][c] < best:
+                        best = g_succ + other_g_vals[r][c]
+                        meet = succ
+
+        self.max_expanded = expanded if expanded > self.max_expanded else self.max_expanded
+        if meet is None:
+            return False
+
+        # Point the backward half of the path, from meet to s_goal, towards s_start.
+        s = meet
+        while s != s_goal:
+            succ = self.back_parents[s[0]][s[1]]
+            self.parents[succ[0]][succ[1]] = s
+            s = succ
+
+        return True
+
+    """
+    ARA* key of s: g(s) + epsilon * h(s), with epsilon in hundredths (see ARA_SCALE).
+    """
+    def ara_fvalue(self, s, s_goal, epsilon) -> int:
+        return ARA_SCALE * self.g(s) + epsilon * self.h(s, s_goal)
+
+    """
+    Open list entry of s for ARA*, with the same tie breaking as compute_path.
+    """
+    def ara_entry(self, s, s_goal, epsilon, g_max, large_g_ties=True) -> tuple:
+        if large_g_ties:
+            return (g_max * self.ara_fvalue(s, s_goal, epsilon) - self.g(s), self.random.randint(0, 100), s)
+        return (g_max * self.ara_fvalue(s, s_goal, epsilon) + self.g(s), 0, s)
+
+    """
+    Anytime Repairing A* (ARA*), based on agent's knowledge of the gridworld.
+    Same interface as compute_path. Expands cells by g + epsilon * h, starting
+    from epsilon = ara_epsilon, which quickly finds a path at most epsilon
+    times longer than the shortest. Then, while ara_time_budget seconds have
+    not passed since the search started, epsilon is lowered by
+    ara_epsilon_step and the path is improved, down to epsilon = 1 (a shortest
+    path). Each improvement reuses the g values and tree-pointers found so
+    far: it only expands again the cells whose g value dropped after they were
+    expanded (the inconsistent cells) and the cells still open.
+    When the time budget runs out during an improvement, the search stops
+    with the best path found so far. Sets ara_bound to the epsilon of the last
+    improvement completed.
+    Returns True if a path is found, False otherwise.
+    """
+    def ara_compute_path(self, s_start, s_goal, open_list, closed_list, counter, g_max, large_g_ties=True) -> bool:
+        start_time = perf_counter()
+        budget = self.ara_time_budget
+        epsilon = max(ARA_SCALE, round(self.ara_epsilon * ARA_SCALE))
+        step = max(1, round(self.ara_epsilon_step * ARA_SCALE))
+
+        # Re-key the open list with the inflated heuristic.
+        states = [open_list.pop()[2] for _ in range(len(open_list))]
+        for s in states:
+            open_list.push(self.ara_entry(s, s_goal, epsilon, g_max, large_g_ties))
+
+        incons = set()  # Cells whose g value dropped after they were expanded.
+        expanded = 0
+        while True:
+            # Expand cells until no open cell can lead to a path cheaper than the current one.
+            out_of_time = False
+            while len(open_list) > 0:
+                if self.g(s_goal) != inf:
+                    if self.ara_fvalue(s_goal, s_goal, epsilon) <= self.ara_fvalue(open_list.peek()[2], s_goal, epsilon):
+                        break
+                    if budget is not None and perf_counter() - start_time > budget:
+                        out_of_time = True
+                        break
+                s = open_list.pop()[2]
+                closed_list.add(s)
+                self.expanded_cells += 1
+                expanded += 1
+
+                for succ in self.create_action_states(s):
+                    if self.search_vals[succ[0]][succ[1]] < counter:
+                        self.g_vals[succ[0]][succ[1]] = inf
+                        self.search_vals[succ[0]][succ[1]] = counter
+
+                    if self.g(succ) > self.g(s) + 1:
+                        self.g_vals[succ[0]][succ[1]] = self.g_vals[s[0]][s[1]] + 1
+                        self.parents[succ[0]][succ[1]] = s
+                        if succ in closed_list:
+                            incons.add(succ)
+                        else:
+                            open_list.push(self.ara_entry(succ, s_goal, epsilon, g_max, large_g_ties))
+
+            self.max_expanded = expanded if expanded > self.max_expanded else self.max_expanded
+            if self.g(s_goal) == inf:
+                return False
+            if out_of_time:
+                # The tree-pointers hold the best path found so far.
+                return True
+            self.ara_bound = epsilon / ARA_SCALE
+            if epsilon == ARA_SCALE or (budget is not None and perf_counter() - start_time > budget):
+                return True
+
+            # Lower epsilon and improve the path: inconsistent cells are opened
+            # again and every open cell is re-keyed.
+            epsilon = max(ARA_SCALE, epsilon - step)
+            states = [open_list.pop()[2] for _ in range(len(open_list))]
+            for s in states + list(incons):
+                open_list.push(self.ara_entry(s, s_goal, epsilon, g_max, large_g_ties))
+            incons = set()
+            closed_list.clear()
+
     """
     Repeated A* to find the shorest path from agent to target.
     Continuously calls A* (compute_path) until agent reaches target
     or when no path is found.
     Before searching, resets discovered map and all g & search values.
+    planner selects the search run each time: "astar" (compute_path),
+    "jps" (jps_compute_path, same path lengths with far fewer expansions),
+    "bidirectional" (bidirectional_compute_path, searching from both ends) or
+    "ara" (ara_compute_path, anytime search with bounded suboptimality).
     Returns True if a path is found, False otherwise.
     """
-    def repeated_compute_path(self, reverse=False, large_g_ties=True) -> bool:
-        # Initialize search counter to 0.
-        counter = 0
+    def repeated_compute_path(self, reverse=False, large_g_ties=True, planner="astar") -> bool:
+        if planner == "astar":
+            search = self.compute_path
+        elif planner == "jps":
+            search = self.jps_compute_path
+        elif planner == "bidirectional":
+            search = self.bidirectional_compute_path
+        elif planner == "ara":
+            search = self.ara_compute_path
+        else:
+            raise ValueError("unknown planner: " + str(planner))
+
         # Initialize search(s) and g(s) to 0 for all states.
         self.reset_map()
 
@@ -216,8 +564,14 @@ class Gridworld:
             s_goal = self.agent
 
         while s_start != s_goal:
+            # Backward searches start from the target, so once it is a discovered
+            # block they would keep finding paths out of it that cannot be followed.
+            if reverse and self.discovered_map[s_start[0]][s_start[1]] == self.stamp:
+                return False
+
             # Increment search counter.
-            counter += 1
+            self.counter += 1
+            counter = self.counter
             #print(counter)
 
             # Set g(s_start) = 0.
@@ -230,16 +584,12 @@ class Gridworld:
             # Set search(s_goal) = counter.
             self.search_vals[s_goal[0]][s_goal[1]] = counter
 
-            # Create an open list, represented as a binary heap.
-            open_list = []
+            # Create an open list, represented as an indexed binary heap by default.
+            open_list = self.new_open_list()
 
             # Create a closed list, represented as a set.
             closed_list = set()
 
-            # Create a tree-pointer for identifying shortest path after A*.
-            # First item in tuple points to second item.
-            tree = []
-        
             # Tie breaking:
             g_max = self.map_size ** 2
             priority = 0
@@ -255,24 +605,29 @@ class Gridworld:
             # Second tie breaking: random.
 
             # Insert s_start into open list.
-            heappush(open_list, (priority, 0, s_start))  # (f, tie_breaker, s)
+            open_list.push((priority, 0, s_start))  # (f, tie_breaker, s)
 
-            # Normal A*.
-            path_found = self.compute_path(s_start, s_goal, open_list, closed_list, tree, counter, g_max, large_g_ties)
+            # Normal A* (or the selected planner).
+            replan = self.start_replan()
+            path_found = search(s_start, s_goal, open_list, closed_list, counter, g_max, large_g_ties)
+            self.end_search(replan)
             #print(len(open_list))
             #print(len(closed_list))
         
-            #print(tree)
-            # If open list is empty, no path exists to the target.
-            if len(open_list) == 0 and not path_found:
+            # If no path was found, no path exists to the target.
+            if not path_found:
                 #print("Target cannot be reached; no path found.")
+                self.end_replan(replan, s_start, s_goal, None)
                 return False
             
             # Follow tree-pointers from s_goal to s_start and move agent on this path
             # from s_start to s_goal until s_goal is reached or path is blocked.
-            path = self.build_path(tree, s_start, s_goal, reverse)
+            path = self.build_path(s_start, s_goal, reverse)
+            self.end_build_path(replan)
+            reached = self.follow_path(path)
+            self.end_replan(replan, s_start, s_goal, path)
             # If path was followed successfully, target is reached.
-            if self.follow_path(path):
+            if reached:
                 #print("Target reached!")
                 #print("Expanded " + str(self.expanded_cells) + " cells.")
                 return True
@@ -283,6 +638,18 @@ class Gridworld:
             else:
                 s_start = self.agent
 
+    """
+    Repeated ARA* from agent to target: repeated_compute_path with the "ara"
+    planner, starting each search at inflation factor epsilon and lowering it by
+    epsilon_step while time_budget seconds (None for no limit) remain.
+    Returns True if a path is found, False otherwise.
+    """
+    def ara_repeated_compute_path(self, epsilon=2.0, time_budget=None, epsilon_step=0.5, reverse=False) -> bool:
+        self.ara_epsilon = epsilon
+        self.ara_time_budget = time_budget
+        self.ara_epsilon_step = epsilon_step
+        return self.repeated_compute_path(reverse, True, "ara")
+
     """
     h(n)_new, an adaptive heuristic function for adaptive A*.
     h(n)_new = g(n_goal) - g(n).
@@ -290,8 +657,9 @@ class Gridworld:
     def h_new(self, s, s_goal) -> int:
         a = s
         b = s_goal
-        if self.h_vals[s[0]][s[1]] == 0:
+        if self.h_stamps[s[0]][s[1]] != self.stamp:
             self.h_vals[s[0]][s[1]] = abs(a[0] - b[0]) + abs(a[1] - b[1])
+            self.h_stamps[s[0]][s[1]] = self.stamp
 
         return self.h_vals[s[0]][s[1]]
 
@@ -308,17 +676,18 @@ class Gridworld:
     def update_h_new(self, s_goal, closed_list) -> None:
         for s in closed_list:
             self.h_vals[s[0]][s[1]] = self.g(s_goal) - self.g(s)
+            self.h_stamps[s[0]][s[1]] = self.stamp
     
     """
     Adaptive A* to find the shortest path, based on agent's knowledge of the gridworld.
     Breaks ties favoring larger g-values.
     Returns True if a path is found, False otherwise.
     """
-    def adaptive_compute_path(self, s_start, s_goal, open_list, closed_list, tree, counter, g_max) -> bool:
+    def adaptive_compute_path(self, s_start, s_goal, open_list, closed_list, counter, g_max) -> bool:
         expanded = 0
         while len(open_list) > 0:
             # Identify a state s with the smallest f-value in the open list.
-            s = heappop(open_list)[2]
+            s = open_list.pop()[2]
 
             # If s is the goal state, A* is finished.
             if s == s_goal:
@@ -346,22 +715,13 @@ class Gridworld:
                     # Sets g value of successor state to g value of s plus action cost (1).
                     self.g_vals[succ[0]][succ[1]] = self.g_vals[s[0]][s[1]] + 1
                     # Set tree-pointer of successor state to point to state s.
-                    tree.append((succ, s))
+                    self.parents[succ[0]][succ[1]] = s
                 
-                    i = self.is_in_open_list(succ, open_list)
-
-                    # Insert successor state into open list (if it is not already there).
-                    if i is None:
-                        priority = g_max * self.f_new(succ, s_goal) - self.g(succ)
-                        tie_breaker = randint(0, 100)
-                        heappush(open_list, (priority, tie_breaker, succ))
-                    else:
-                        # Remove state from open list and add it back with new f value.
-                        # (Really, we just change its priority and re-heapify.)
-                        priority = g_max * self.f_new(succ, s_goal) - self.g(succ)
-                        tie_breaker = randint(0, 100)
-                        open_list[i] = (priority, tie_breaker, succ)
-                        heapify(open_list)
+                    # Insert successor state into open list, or update its priority
+                    # if it is already there (decrease-key).
+                    priority = g_max * self.f_new(succ, s_goal) - self.g(succ)
+                    tie_breaker = self.random.randint(0, 100)
+                    open_list.push((priority, tie_breaker, succ))
 
         return False
     
@@ -373,8 +733,6 @@ class Gridworld:
     Returns True if a path is found, False otherwise.
     """
     def adaptive_repeated_compute_path(self) -> bool:
-        # Initialize search counter to 0.
-        counter = 0
         # Initialize search(s) and g(s) to 0 for all states.
         self.reset_map()
 
@@ -383,7 +741,8 @@ class Gridworld:
 
         while s_start != s_goal:
             # Increment search counter.
-            counter += 1
+            self.counter += 1
+            counter = self.counter
 
             # Set g(s_start) = 0.
             self.g_vals[s_start[0]][s_start[1]] = 0 
@@ -395,16 +754,12 @@ class Gridworld:
             # Set search(s_goal) = counter.
             self.search_vals[s_goal[0]][s_goal[1]] = counter
 
-            # Create an open list, represented as a binary heap.
-            open_list = []
+            # Create an open list, represented as an indexed binary heap by default.
+            open_list = self.new_open_list()
 
             # Create a closed list, represented as a set.
             closed_list = set()
 
-            # Create a tree-pointer for identifying shortest path after A*.
-            # First item in tuple points to second item.
-            tree = []
-        
             # Tie breaking:
             g_max = self.map_size ** 2
             # Largest g-value of any generated cell.
@@ -414,21 +769,27 @@ class Gridworld:
             # Second tie breaking: random.
 
             # Insert s_start into open list.
-            heappush(open_list, (priority, 0, s_start))  # (f, tie_breaker, s)
+            open_list.push((priority, 0, s_start))  # (f, tie_breaker, s)
 
             # Adaptive A*.
-            path_found = self.adaptive_compute_path(s_start, s_goal, open_list, closed_list, tree, counter, g_max)
+            replan = self.start_replan()
+            path_found = self.adaptive_compute_path(s_start, s_goal, open_list, closed_list, counter, g_max)
+            self.end_search(replan)
         
             # If open list is empty, no path exists to the target.
             if len(open_list) == 0 and not path_found:
                 #print("Target cannot be reached; no path found.")
+                self.end_replan(replan, s_start, s_goal, None)
                 return False
 
             # Follow tree-pointers from s_goal to s_start and move agent on this path
             # from s_start to s_goal until s_goal is reached or path is blocked.
-            path = self.build_path(tree, s_start, s_goal)
+            path = self.build_path(s_start, s_goal)
+            self.end_build_path(replan)
+            reached = self.follow_path(path)
+            self.end_replan(replan, s_start, s_goal, path)
             # If path was followed successfully, target is reached.
-            if self.follow_path(path):
+            if reached:
                 return True
 
             # Otherwise, set s_start to agent's state.
@@ -438,17 +799,400 @@ class Gridworld:
             self.update_h_new(s_goal, closed_list)
 
     """
-    Returns whether a state s is in the open list.
-    If yes, returns the index of s.
-    If no, returns None.
+    Returns True if s is on the path tree kept by Tree-Adaptive A* and its
+    path along the tree to s_goal has no discovered blocks. The cost of
+    that path is then h(s).
+    Results are memoized for the current search in tree_vals, so every tree
+    cell is walked at most once per search.
+    Once s_goal is a discovered block, no tree path leads to it.
+    """
+    def tree_valid(self, s, s_goal, counter) -> bool:
+        if self.discovered_map[s_goal[0]][s_goal[1]] == self.stamp:
+            return False
+        chain = []
+        valid = True
+        while s != s_goal:
+            v = self.tree_vals[s[0]][s[1]]
+            if v == counter or v == -counter:
+                valid = v == counter
+                break
+            if self.tree_stamps[s[0]][s[1]] != self.stamp or self.discovered_map[s[0]][s[1]] == self.stamp:
+                valid = False
+                break
+            # h values drop by one per step along a tree path; otherwise a later
+            # search has rerouted or updated part of it, and the link is out of date.
+            succ = self.tree_next[s[0]][s[1]]
+            if self.h_vals[s[0]][s[1]] != self.h_new(succ, s_goal) + 1:
+                valid = False
+                break
+            chain.append(s)
+            s = succ
+
+        for s in chain:
+            self.tree_vals[s[0]][s[1]] = counter if valid else -counter
+        return valid
+
     """
-    def is_in_open_list(self, s, open_list) -> int:
-        for i in range(len(open_list)):
-            if open_list[i][2] == s:
-                return i
+    Tree-Adaptive A* search: adaptive A* that stops as soon as it selects
+    s_goal or any cell whose path along the path tree is still unblocked.
+    h values of tree cells are the costs of their tree paths, so the path
+    found through such a cell is as short as one searched all the way to s_goal.
+    Returns the cell the search stopped at, or None if no path exists.
+    """
+    def tree_adaptive_compute_path(self, s_start, s_goal, open_list, closed_list, counter, g_max):
+        expanded = 0
+        while len(open_list) > 0:
+            # Identify a state s with the smallest f-value in the open list.
+            s = open_list.pop()[2]
+
+            # If s is the goal state or leads to it along the tree, the search is finished.
+            if s == s_goal or self.tree_valid(s, s_goal, counter):
+                self.max_expanded = expanded if expanded > self.max_expanded else self.max_expanded
+                return s
+            closed_list.add(s)
+            self.expanded_cells += 1
+            expanded += 1
+
+            for succ in self.create_action_states(s):
+                # Skip states already in closed list.
+                if succ in closed_list:
+                    continue
+
+                if self.search_vals[succ[0]][succ[1]] < counter:
+                    self.g_vals[succ[0]][succ[1]] = inf
+                    self.search_vals[succ[0]][succ[1]] = counter
+
+                if self.g(succ) > self.g(s) + 1:
+                    self.g_vals[succ[0]][succ[1]] = self.g_vals[s[0]][s[1]] + 1
+                    self.parents[succ[0]][succ[1]] = s
+                    priority = g_max * self.f_new(succ, s_goal) - self.g(succ)
+                    tie_breaker = self.random.randint(0, 100)
+                    open_list.push((priority, tie_breaker, succ))
 
         return None
 
+    """
+    Tree-Adaptive A* (path reuse on top of adaptive A*) to find the shortest path from agent to target.
+    Every path found is kept in a tree of next-cell pointers towards the target.
+    A block on a path only cuts off the tree cells whose path runs through it,
+    and each new search stops as soon as it reaches a cell whose tree path is
+    still unblocked, then reuses the rest of that path.
+    Before searching, resets discovered map and all g & search values.
+    Returns True if a path is found, False otherwise.
+    """
+    def tree_adaptive_repeated_compute_path(self) -> bool:
+        # Initialize search(s) and g(s) to 0 for all states.
+        self.reset_map()
+
+        s_start = self.agent  # Starting state is location of agent.
+        s_goal = self.target  # Goal state is location of target.
+        g_max = self.map_size ** 2
+
+        while s_start != s_goal:
+            self.counter += 1
+            counter = self.counter
+            self.g_vals[s_start[0]][s_start[1]] = 0
+            self.search_vals[s_start[0]][s_start[1]] = counter
+            self.g_vals[s_goal[0]][s_goal[1]] = inf
+            self.search_vals[s_goal[0]][s_goal[1]] = counter
+
+            open_list = self.new_open_list()
+            closed_list = set()
+            open_list.push((g_max * self.f_new(s_start, s_goal) - self.g(s_start), 0, s_start))
+
+            replan = self.start_replan()
+            s_reached = self.tree_adaptive_compute_path(s_start, s_goal, open_list, closed_list, counter, g_max)
+            self.end_search(replan)
+
+            if s_reached is None:
+                #print("Target cannot be reached; no path found.")
+                self.end_replan(replan, s_start, s_goal, None)
+                return False
+
+            # Cost of the path found: to s_reached, then along the tree.
+            cost = self.g(s_reached) + self.h_new(s_reached, s_goal)
+
+            # Add the new part of the path to the tree, with h values of the rest of the path cost.
+            path = self.build_path(s_start, s_reached)
+            for s, succ in zip(path, path[1 :]):
+                self.tree_next[s[0]][s[1]] = succ
+                self.tree_stamps[s[0]][s[1]] = self.stamp
+                self.h_vals[s[0]][s[1]] = cost - self.g(s)
+                self.h_stamps[s[0]][s[1]] = self.stamp
+
+            # Reuse the rest of the path from the tree.
+            s = s_reached
+            while s != s_goal:
+                s = self.tree_next[s[0]][s[1]]
+                path.append(s)
+            self.end_build_path(replan)
+
+            reached = self.follow_path(path)
+            self.end_replan(replan, s_start, s_goal, path)
+            if reached:
+                return True
+
+            # Otherwise, set s_start to agent's state.
+            s_start = self.agent
+
+            # Update adaptive h values: h(s) = cost of the path found - g(s).
+            for s in closed_list:
+                self.h_vals[s[0]][s[1]] = cost - self.g(s)
+                self.h_stamps[s[0]][s[1]] = self.stamp
+
+    """
+    rhs(n), the one-step lookahead value of n for D* Lite.
+    g and rhs values of cells not touched since the current D* Lite run
+    began (search value differs from the search counter) read as infinity.
+    """
+    def rhs(self, s) -> int:
+        if self.search_vals[s[0]][s[1]] != self.counter:
+            self.d_star_lite_init_cell(s)
+
+        return self.rhs_vals[s[0]][s[1]]
+
+    """
+    g(n) for D* Lite; the estimated distance from n to the goal.
+    """
+    def d_star_lite_g(self, s) -> int:
+        if self.search_vals[s[0]][s[1]] != self.counter:
+            self.d_star_lite_init_cell(s)
+
+        return self.g_vals[s[0]][s[1]]
+
+    """
+    Sets g and rhs of a cell to infinity for the current D* Lite run.
+    """
+    def d_star_lite_init_cell(self, s) -> None:
+        self.g_vals[s[0]][s[1]] = inf
+        self.rhs_vals[s[0]][s[1]] = inf
+        self.search_vals[s[0]][s[1]] = self.counter
+
+    """
+    Priority of a cell in the D* Lite open list.
+    The key [min(g, rhs) + h(s_start, s) + km; min(g, rhs)] is compared
+    lexicographically, so it is folded into one integer with g_max.
+    """
+    def d_star_lite_key(self, s, s_start, km, g_max) -> int:
+        k2 = min(self.d_star_lite_g(s), self.rhs(s))
+        return g_max * (k2 + self.h(s_start, s) + km) + k2
+
+    """
+    Recomputes rhs(s) = min over successors s' of (c(s, s') + g(s')).
+    A cell known to be blocked has no outgoing edges.
+    """
+    def d_star_lite_lookahead(self, s) -> int:
+        if self.discovered_map[s[0]][s[1]] == self.stamp:
+            return inf
+        best = inf
+        for succ in self.create_action_states(s):
+            g_succ = self.d_star_lite_g(succ) + 1
+            if g_succ < best:
+                best = g_succ
+
+        return best
+
+    """
+    Puts cell s in the open list with its current key if it is locally
+    inconsistent (g != rhs), and takes it out otherwise.
+    """
+    def d_star_lite_update_vertex(self, s, s_start, open_list, km, g_max) -> None:
+        if self.d_star_lite_g(s) != self.rhs(s):
+            open_list.push((self.d_star_lite_key(s, s_start, km, g_max), 0, s))
+        elif s in open_list:
+            open_list.remove(s)
+
+    """
+    D* Lite's ComputeShortestPath. Searches backward from the goal and only
+    re-expands cells whose g values are inconsistent, so a replan after new
+    blocks are discovered only touches the affected part of the map.
+    Returns True if a path from s_start to s_goal exists, False otherwise.
+    """
+    def d_star_lite_compute_path(self, s_start, s_goal, open_list, km, g_max) -> bool:
+        expanded = 0
+        while len(open_list) > 0:
+            top = open_list.peek()
+            # Stop once no cell in the open list can improve s_start and it is not underconsistent.
+            if top[0] >= self.d_star_lite_key(s_start, s_start, km, g_max) and self.rhs(s_start) <= self.d_star_lite_g(s_start):
+                break
+
+            u = top[2]
+            k_new = self.d_star_lite_key(u, s_start, km, g_max)
+            if top[0] < k_new:
+                # Key is outdated (km has grown); reinsert with the new key.
+                open_list.push((k_new, 0, u))
+                continue
+
+            self.expanded_cells += 1
+            expanded += 1
+            g_old = self.d_star_lite_g(u)
+            if g_old > self.rhs(u):
+                # Overconsistent: lower g(u) and propagate to the neighbours.
+                self.g_vals[u[0]][u[1]] = self.rhs(u)
+                open_list.remove(u)
+                for s in self.create_action_states(u):
+                    if s != s_goal and self.rhs(s) > self.g_vals[u[0]][u[1]] + 1:
+                        self.rhs_vals[s[0]][s[1]] = self.g_vals[u[0]][u[1]] + 1
+                    self.d_star_lite_update_vertex(s, s_start, open_list, km, g_max)
+            else:
+                # Underconsistent: raise g(u) and fix neighbours that depended on it.
+                self.g_vals[u[0]][u[1]] = inf
+                for s in self.create_action_states(u) + [u]:
+                    if s != s_goal and (s == u or self.rhs(s) == g_old + 1):
+                        self.rhs_vals[s[0]][s[1]] = self.d_star_lite_lookahead(s)
+                    self.d_star_lite_update_vertex(s, s_start, open_list, km, g_max)
+
+        self.max_expanded = expanded if expanded > self.max_expanded else self.max_expanded
+        return self.rhs(s_start) != inf
+
+    """
+    Given the g values from D* Lite, creates a full path from s_start to s_goal
+    by always moving to the neighbour with the smallest g value.
+    """
+    def d_star_lite_build_path(self, s_start, s_goal) -> List:
+        path = [s_start]
+        s = s_start
+        while s != s_goal:
+            best = None
+            for succ in self.create_action_states(s):
+                if best is None or self.d_star_lite_g(succ) < self.d_star_lite_g(best):
+                    best = succ
+            s = best
+            path.append(s)
+
+        return path
+
+    """
+    D* Lite to find the shortest path from agent to target.
+    Searches once from the target, then after every blocked move repairs
+    the previous search using the newly discovered blocks instead of
+    searching from scratch.
+    Before searching, resets discovered map and all g & search values.
+    Returns True if a path is found, False otherwise.
+    """
+    def d_star_lite_repeated_compute_path(self) -> bool:
+        self.reset_map()
+        # One search counter for the whole run; g and rhs values persist across replans.
+        self.counter += 1
+
+        s_start = self.agent  # Starting state is location of agent.
+        s_goal = self.target  # Goal state is location of target.
+        s_last = s_start
+        km = 0  # Accumulated heuristic offset for keys computed before the agent moved.
+        g_max = self.map_size ** 2
+
+        open_list = self.new_open_list()
+        self.d_star_lite_init_cell(s_goal)
+        self.rhs_vals[s_goal[0]][s_goal[1]] = 0
+        open_list.push((self.d_star_lite_key(s_goal, s_start, km, g_max), 0, s_goal))
+        # Blocks seen before the first search are already part of the discovered map.
+        # new_blocks is left as it is for others reading it (renderers, traces), with a cursor into it.
+        seen_blocks = len(self.new_blocks)
+
+        while s_start != s_goal:
+            replan = self.start_replan()
+            path_found = self.d_star_lite_compute_path(s_start, s_goal, open_list, km, g_max)
+            self.end_search(replan)
+            if not path_found:
+                #print("Target cannot be reached; no path found.")
+                self.end_replan(replan, s_start, s_goal, None)
+                return False
+
+            path = self.d_star_lite_build_path(s_start, s_goal)
+            self.end_build_path(replan)
+            reached = self.follow_path(path)
+            self.end_replan(replan, s_start, s_goal, path)
+            if reached:
+                return True
+
+            # Agent stopped at a block; shift keys by the distance it moved.
+            s_start = self.agent
+            km += self.h(s_last, s_start)
+            s_last = s_start
+
+            # Every edge into or out of a newly discovered block now costs infinity.
+            for b in self.new_blocks[seen_blocks :]:
+                if b[0] < 1 or b[0] > self.map_size - 2 or b[1] < 1 or b[1] > self.map_size - 2:
+                    continue  # Borders are never part of the graph.
+                g_b = self.d_star_lite_g(b)
+                for u in self.create_action_states(b):
+                    if u != s_goal and self.rhs(u) == g_b + 1:
+                        self.rhs_vals[u[0]][u[1]] = self.d_star_lite_lookahead(u)
+                    self.d_star_lite_update_vertex(u, s_start, open_list, km, g_max)
+                if b != s_goal:
+                    self.rhs_vals[b[0]][b[1]] = inf
+                self.d_star_lite_update_vertex(b, s_start, open_list, km, g_max)
+            seen_blocks = len(self.new_blocks)
+
+    """
+    Creates an empty open list of the configured type.
+    While tracing, it records the cells popped from it; while stats are
+    enabled, it is wrapped to count heap operations.
+    """
+    def new_open_list(self):
+        open_list = self.open_list_type() if self.trace is None else self.trace.open_list(self.open_list_type)
+        if self.stats is None:
+            return open_list
+        return CountingOpenList(open_list, self.stats)
+
+    """
+    Starts timing one replan (search, build path, follow path).
+    Returns None when instrumentation is off (no stats, no on_replan
+    callback and no trace), in which case the other replan hooks do nothing.
+    """
+    def start_replan(self):
+        self.replans += 1
+        if self.stats is None and self.on_replan is None and self.trace is None:
+            return None
+        return [perf_counter(), None, None, self.expanded_cells, self.moves_taken]
+
+    """
+    Marks the end of the search of a replan.
+    """
+    def end_search(self, replan) -> None:
+        if replan is not None:
+            replan[1] = perf_counter()
+
+    """
+    Marks the end of path building of a replan.
+    """
+    def end_build_path(self, replan) -> None:
+        if replan is not None:
+            replan[2] = perf_counter()
+
+    """
+    Ends a replan: adds its timings to stats, reports it to on_replan and records it in trace.
+    path is None if the search found no path.
+    """
+    def end_replan(self, replan, s_start, s_goal, path) -> None:
+        if replan is None:
+            return
+        end = perf_counter()
+        start, searched, built, expanded, moves = replan
+        if built is None:
+            built = end = searched
+        if self.stats is not None:
+            self.stats.replans += 1
+            self.stats.search_time += searched - start
+            self.stats.build_path_time += built - searched
+            self.stats.follow_path_time += end - built
+        if self.on_replan is not None:
+            self.on_replan({
+                "replan": self.replans,
+                "s_start": s_start,
+                "s_goal": s_goal,
+                "expanded": self.expanded_cells - expanded,
+                "path_length": None if path is None else len(path) - 1,
+                "moves": self.moves_taken - moves,
+                "agent": self.agent,
+                "search_time": searched - start,
+                "build_path_time": built - searched,
+                "follow_path_time": end - built,
+            })
+        if self.trace is not None:
+            self.trace.replan(self, s_start, s_goal, path, self.expanded_cells - expanded, self.moves_taken - moves,
+                              searched - start, built - searched, end - built)
+
     """
     Generate a list of new states to explore from current state s,
     given the four available actions: N, S, E, W.
@@ -459,19 +1203,19 @@ class Gridworld:
 
         # Try north.
         if s[0] > 1:  # Ensure not touching top border.
-            if self.discovered_map[s[0] - 1][s[1]] == 0:
+            if self.discovered_map[s[0] - 1][s[1]] != self.stamp:
                 new_states.append((s[0] - 1, s[1]))
         # Try south.
         if s[0] < self.map_size - 2:  # Ensure not touching bottom border.
-            if self.discovered_map[s[0] + 1][s[1]] == 0:
+            if self.discovered_map[s[0] + 1][s[1]] != self.stamp:
                 new_states.append((s[0] + 1, s[1]))
         # Try east.
         if s[1] < self.map_size - 2:  # Ensure not touching right border.
-            if self.discovered_map[s[0]][s[1] + 1] == 0:
+            if self.discovered_map[s[0]][s[1] + 1] != self.stamp:
                 new_states.append((s[0], s[1] + 1))
         # Try west.
         if s[1] > 1:  # Ensure not touching left border.
-            if self.discovered_map[s[0]][s[1] - 1] == 0:
+            if self.discovered_map[s[0]][s[1] - 1] != self.stamp:
                 new_states.append((s[0], s[1] - 1))
 
         return new_states
@@ -479,16 +1223,31 @@ class Gridworld:
     """
     Reveals the true contents of any cells to the
     north, south, east, and west of the agent's current location.
+    Blocked cells are marked with the current stamp; any other value reads as unblocked.
     """
     def uncover(self) -> None:
+        a = self.agent
         # North.
-        self.discovered_map[self.agent[0] - 1][self.agent[1]] = self.true_map[self.agent[0] - 1][self.agent[1]]
+        if self.true_map[a[0] - 1][a[1]]:
+            self.discover_block((a[0] - 1, a[1]))
         # South.
-        self.discovered_map[self.agent[0] + 1][self.agent[1]] = self.true_map[self.agent[0] + 1][self.agent[1]]
+        if self.true_map[a[0] + 1][a[1]]:
+            self.discover_block((a[0] + 1, a[1]))
         # East.
-        self.discovered_map[self.agent[0]][self.agent[1] + 1] = self.true_map[self.agent[0]][self.agent[1] + 1]
+        if self.true_map[a[0]][a[1] + 1]:
+            self.discover_block((a[0], a[1] + 1))
         # West.
-        self.discovered_map[self.agent[0]][self.agent[1] - 1] = self.true_map[self.agent[0]][self.agent[1] - 1]
+        if self.true_map[a[0]][a[1] - 1]:
+            self.discover_block((a[0], a[1] - 1))
+
+    """
+    Marks the blocked cell s as discovered.
+    Cells that were not known to be blocked yet are recorded in new_blocks.
+    """
+    def discover_block(self, s) -> None:
+        if self.discovered_map[s[0]][s[1]] != self.stamp:
+            self.discovered_map[s[0]][s[1]] = self.stamp
+            self.new_blocks.append(s)
 
     """
     Attempts to move the agent's location from its current cell
@@ -508,27 +1267,19 @@ class Gridworld:
             return False
     
     """
-    Given a tree from A*, creates a full path
+    Given the tree-pointers from A*, creates a full path
     from agent's location to the end of the path.
+    Follows the pointers from s_goal back to s_start, so it costs
+    time proportional to the length of the path.
     """
-    def build_path(self, tree, s_start, s_goal, reverse=False) -> List:
+    def build_path(self, s_start, s_goal, reverse=False) -> List:
         path = []
-        goal = s_goal  # Start of path is the target.
-        path.append(goal)
-        # if not reverse:
-        #     tree = tree[: : -1]
-        for t in tree[: : -1]:
-            # First item in tuple (successor state) points to second item (previous state).
-            succ = t[0]
-            prev = t[1]
-
-            # Check if this is a path into the current goal.
-            if succ == goal:
-                # Add previous state to path. 
-                #if prev != s_start:  # if prev is not the start.
-                path.append(prev)
-                # Update goal with previous state.
-                goal = prev
+        s = s_goal  # Start of path is the target.
+        path.append(s)
+        while s != s_start:
+            # Each state points to the state it was reached from.
+            s = self.parents[s[0]][s[1]]
+            path.append(s)
 
         #print(path)
         if reverse:
@@ -555,24 +1306,4 @@ class Gridworld:
     Prints the given map.
     """
     def print_map(self) -> None:
-        for i in range(self.map_size):
-            for j in range(self.map_size):
-                # Agent has reached target.
-                if self.target == (i, j) and self.agent == (i, j):
-                    print("D", end=" ")
-                # Target.
-                elif self.target == (i, j):
-                    print("T", end=" ")
-                # Agent.
-                elif self.agent == (i, j):
-                    print("A", end=" ")
-                # Cell is truly unblocked.
-                elif self.true_map[i][j] == 0 and self.discovered_map[i][j] == 0:
-                    print(" ", end=" ")
-                # Cell is truly blocked and has not been discovered as such.
-                elif self.true_map[i][j] == 1 and self.discovered_map[i][j] == 0:
-                    print("#", end=" ")
-                # Cell is truly blocked and has been discovered as such.
-                elif self.true_map[i][j] == 1 and self.discovered_map[i][j] == 1:
-                    print("X", end=" ")
-            print("", end="\n")
+        sys.stdout.write(render_frame(self))
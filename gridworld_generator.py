@@ -1,25 +1,157 @@
-import pickle
-from typing import Dict
+import argparse
+from collections import deque
+from functools import partial
+from multiprocessing import Pool
+from typing import Dict, Iterator
 
-from gridworld import Gridworld
+import numpy as np
 
-def generate_true_maps(num_maps, map_size, complexity=0.75, density=0.75) -> Dict:
-    maps = {}
-    for i in range(num_maps):
-        g = Gridworld(map_size, complexity=complexity, density=density)
-        maps[i] = g.true_map
+from maze_store import MazeStoreWriter
 
-    return maps
+"""
+Generate a map with blocked obstacles (1) and unblocked free space (0),
+using the same random-walk algorithm as before. Borders are denoted as obstacles.
+map_size is the size of the map without borders (must be odd).
 
-num_maps = 50
-map_size = 101
+All random numbers of a walk are drawn in one batch from a seeded NumPy
+generator, the maze is carved in a flat bytearray, and a walk stops as soon
+as all of its neighbours are taken (it can never move again), so the
+generator is much faster than drawing one random number per step.
+The same seed always gives the same map. Pass dtype=np.uint8 to get the map
+without converting it to a (much larger) int array.
+"""
+def generate_map(map_size, complexity=0.75, density=0.75, seed=None, dtype=int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
 
-maps = generate_true_maps(num_maps, map_size) 
+    # Define the empty maze with extra space for borders.
+    # Assume that the dimensions are odd; correct otherwise.
+    size = ((map_size + 2) // 2) * 2 + 1
+    width = size
 
-# Save all the data.
-with open("gridworld_maps_tiny.pickle", "wb") as handle:
-    pickle._dump(maps, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    # Adjust complexity and density to correspond to maze size.
+    complexity = int(complexity * (5 * (size + size)))
+    density = int(density * ((size // 2) * (size // 2)))
 
+    # Create the maze, with borders represented as blocked obstacles.
+    maze = bytearray(size * size)
+    for i in range(size):
+        maze[i] = maze[(size - 1) * width + i] = 1
+        maze[i * width] = maze[i * width + size - 1] = 1
 
+    # Draw the start of every aisle at once.
+    starts = rng.integers(0, size // 2 + 1, size=(density, 2)) * 2
+    last = size - 1
 
+    # Create aisles.
+    for x, y in starts.tolist():
+        maze[y * width + x] = 1
+        steps = rng.random(complexity).tolist()
+        for u in steps:
+            neighbors = []
+            if x > 1:
+                neighbors.append((y, x - 2))
+            if x < last - 1:
+                neighbors.append((y, x + 2))
+            if y > 1:
+                neighbors.append((y - 2, x))
+            if y < last - 1:
+                neighbors.append((y + 2, x))
+            y_, x_ = neighbors[int(u * len(neighbors))]
+            if maze[y_ * width + x_] == 0:
+                maze[y_ * width + x_] = 1
+                maze[(y_ + (y - y_) // 2) * width + x_ + (x - x_) // 2] = 1
+                x, y = x_, y_
+            elif all(maze[n[0] * width + n[1]] for n in neighbors):
+                # Every neighbour is taken; this walk can never move again.
+                break
 
+    return np.frombuffer(bytes(maze), dtype=np.uint8).reshape(size, size).astype(dtype, copy=False)
+
+"""
+Returns True if the target (bottom-right corner) can be reached from the
+agent's start (top-left corner) in the given map.
+"""
+def is_solvable(m) -> bool:
+    cells = np.asarray(m, dtype=np.uint8)
+    size = len(cells)
+    blocked = bytearray(cells.tobytes())
+    start = size + 1
+    goal = (size - 2) * size + size - 2
+    if blocked[start] or blocked[goal]:
+        return False
+
+    # Breadth-first search over the flat map; visited cells are marked blocked.
+    blocked[start] = 1
+    frontier = deque([start])
+    while frontier:
+        s = frontier.popleft()
+        if s == goal:
+            return True
+        for succ in (s - size, s + size, s + 1, s - 1):
+            if not blocked[succ]:
+                blocked[succ] = 1
+                frontier.append(succ)
+
+    return False
+
+"""
+Generates map number k of a batch. Its seed is derived from the batch seed and k,
+so any map of a batch can be regenerated on its own.
+With solvable set, maps are regenerated from the same generator until one is solvable.
+"""
+def generate_batch_map(k, map_size, complexity=0.75, density=0.75, seed=0, solvable=False) -> np.ndarray:
+    rng = np.random.default_rng([seed, k])
+    while True:
+        m = generate_map(map_size, complexity, density, rng)
+        if not solvable or is_solvable(m):
+            return m
+
+"""
+Yields num_maps maps in order, generated by the given number of worker processes.
+"""
+def generate_maps(num_maps, map_size, complexity=0.75, density=0.75, seed=0, solvable=False, workers=1) -> Iterator[np.ndarray]:
+    generate = partial(generate_batch_map, map_size=map_size, complexity=complexity,
+                       density=density, seed=seed, solvable=solvable)
+    if workers <= 1:
+        for k in range(num_maps):
+            yield generate(k)
+    else:
+        with Pool(workers) as pool:
+            yield from pool.imap(generate, range(num_maps))
+
+"""
+Generates num_maps maps and returns them as a dict from map number to map.
+"""
+def generate_true_maps(num_maps, map_size, complexity=0.75, density=0.75, seed=0, solvable=False, workers=1) -> Dict:
+    return dict(enumerate(generate_maps(num_maps, map_size, complexity, density, seed, solvable, workers)))
+
+"""
+Generates num_maps maps and streams them to a maze store at path.
+Returns the number of maps written.
+"""
+def write_maps(path, num_maps, map_size, complexity=0.75, density=0.75, seed=0, solvable=False, workers=1) -> int:
+    with MazeStoreWriter(path) as writer:
+        for m in generate_maps(num_maps, map_size, complexity, density, seed, solvable, workers):
+            writer.append(m)
+
+    return num_maps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate gridworlds and save them to a maze store.")
+    parser.add_argument("--num-maps", type=int, default=50, help="number of maps to generate")
+    parser.add_argument("--map-size", type=int, default=101, help="size of each map without borders (odd)")
+    parser.add_argument("--complexity", type=float, default=0.75)
+    parser.add_argument("--density", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=None, help="batch seed (random if not given)")
+    parser.add_argument("--solvable", action="store_true", help="only keep maps where the target can be reached")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--output", default="gridworld_maps.maze", help="maze store to write")
+    args = parser.parse_args()
+
+    seed = args.seed
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    n = write_maps(args.output, args.num_maps, args.map_size, args.complexity, args.density,
+                   seed, args.solvable, args.workers)
+    print("Wrote " + str(n) + " maps to " + args.output + " (seed " + str(seed) + ")")
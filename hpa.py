@@ -0,0 +1,429 @@
+from collections import deque
+from time import perf_counter
+from typing import Dict, List
+
+"""
+Hierarchical pathfinding (HPA*) over the agent's discovered map.
+
+The interior of the map is split into square clusters. Wherever two
+neighbouring clusters share a run of cells that are unblocked on both sides
+of their border, the run is an entrance, crossed at its middle (or at both
+ends, for long runs). The cells on either side of these crossings are the
+nodes of an abstract graph: nodes in the same cluster are joined by their
+shortest distance inside the cluster, and the two sides of a crossing by a
+single move. Searches run on this small graph instead of the full grid.
+
+Discovered blocks only change the entrances on the borders they lie on and
+the distances inside their cluster, so before each search only those
+clusters are rebuilt. Rebuilding a cluster only finds its nodes: the
+distances from a node are searched the first time the abstract search
+expands it, and most nodes never are. The graph is kept on the Gridworld across runs, and a
+new run only rebuilds the clusters whose blocks were forgotten by reset_map.
+A cluster with no discovered block in it is an open rectangle, where the
+shortest path between two cells is as long as their Manhattan distance, so
+its distances and paths are found without searching it; on the sparse
+discovered maps of these runs, most clusters are open. The abstract path
+found is refined into cells one segment at a time, as the agent reaches it,
+so segments it never gets to are never refined.
+
+Paths are near-optimal rather than optimal, since they have to cross
+cluster borders at the chosen entrances.
+"""
+
+# Entrances at least this long are crossed at both ends instead of the middle.
+LONG_ENTRANCE = 6
+
+"""
+Abstract graph of clusters, entrances and intra-cluster distances for the
+discovered map of a Gridworld.
+"""
+class ClusterGraph:
+    def __init__(self, g, cluster_size=10) -> None:
+        self.g = g
+        self.cluster_size = cluster_size
+        self.last = g.map_size - 2  # Last interior row and column.
+        self.clusters = (self.last + cluster_size - 1) // cluster_size  # Clusters per row and column.
+        self.borders = {}  # (direction, cluster row, cluster col) -> crossings [(cell, cell across)].
+        self.crossings = {}  # Node -> nodes across a border from it.
+        self.nodes = {}  # Cluster -> its nodes.
+        self.edges = {}  # Cluster -> {node: [(node, distance inside the cluster)]}, for the nodes searched from so far.
+        self.trees = {}  # Cluster -> {cell: parents of its search inside the cluster}, for refine.
+        self.versions = {}  # Cluster -> number of times it was built.
+        self.goal_edges = (None, None, {})  # (goal, version of its cluster, {node: distance to goal}).
+        self.seen_blocks = len(g.new_blocks)  # Blocks of g.new_blocks already taken into account.
+        self.known_blocks = {s for s in g.new_blocks if self.interior(s)}  # Interior blocks the graph was built with.
+        self.cluster_blocks = {}  # Cluster -> number of known_blocks in it.
+        self.rebuilt_clusters = 0  # Clusters whose distances were recomputed since the graph was built.
+        self.expanded = 0  # Abstract nodes and cells expanded since last reset.
+
+        for s in self.known_blocks:
+            cluster = self.cluster_of(s)
+            self.cluster_blocks[cluster] = self.cluster_blocks.get(cluster, 0) + 1
+
+        for cr in range(self.clusters):
+            for cc in range(self.clusters):
+                if cr + 1 < self.clusters:
+                    self.build_border(("s", cr, cc))
+                if cc + 1 < self.clusters:
+                    self.build_border(("e", cr, cc))
+        for cr in range(self.clusters):
+            for cc in range(self.clusters):
+                self.build_cluster((cr, cc))
+        self.rebuilt_clusters = 0
+
+    """
+    Returns the cluster (cluster row, cluster col) of cell s.
+    """
+    def cluster_of(self, s) -> tuple:
+        return ((s[0] - 1) // self.cluster_size, (s[1] - 1) // self.cluster_size)
+
+    """
+    Returns True if cell s is inside the borders of the map.
+    """
+    def interior(self, s) -> bool:
+        return 0 < s[0] <= self.last and 0 < s[1] <= self.last
+
+    """
+    Returns True if no known block lies in cluster.
+    """
+    def is_open(self, cluster) -> bool:
+        return not self.cluster_blocks.get(cluster)
+
+    """
+    Returns the first and last interior row and column of a cluster.
+    """
+    def bounds(self, cluster) -> tuple:
+        size = self.cluster_size
+        r0 = 1 + cluster[0] * size
+        c0 = 1 + cluster[1] * size
+        return r0, min(r0 + size - 1, self.last), c0, min(c0 + size - 1, self.last)
+
+    """
+    Returns True if cell s is not a discovered block.
+    """
+    def free(self, s) -> bool:
+        return self.g.discovered_map[s[0]][s[1]] != self.g.stamp
+
+    """
+    Finds the entrances across a border: ("s", cr, cc) is the border between
+    cluster (cr, cc) and the one south of it, ("e", cr, cc) the one east of it.
+    Replaces the border's crossings and returns True if they changed.
+    """
+    def build_border(self, key) -> bool:
+        direction, cr, cc = key
+        r0, r1, c0, c1 = self.bounds((cr, cc))
+        if direction == "s":
+            pairs = [((r1, c), (r1 + 1, c)) for c in range(c0, c1 + 1)]
+        else:
+            pairs = [((r, c1), (r, c1 + 1)) for r in range(r0, r1 + 1)]
+
+        crossings = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and self.free(pair[0]) and self.free(pair[1]):
+                run.append(pair)
+                continue
+            if len(run) >= LONG_ENTRANCE:
+                crossings += [run[0], run[-1]]
+            elif run:
+                crossings.append(run[len(run) // 2])
+            run = []
+
+        old = self.borders.get(key, [])
+        if old == crossings:
+            return False
+        for a, b in old:
+            self.crossings[a].remove(b)
+            self.crossings[b].remove(a)
+        for a, b in crossings:
+            self.crossings.setdefault(a, []).append(b)
+            self.crossings.setdefault(b, []).append(a)
+        self.borders[key] = crossings
+        return True
+
+    """
+    Breadth-first search from s inside cluster, until every cell of targets
+    (if given) is reached. Returns the dict of parents of the cells reached.
+    """
+    def search_cluster(self, s, cluster, targets=None) -> Dict:
+        r0, r1, c0, c1 = self.bounds(cluster)
+        discovered_map = self.g.discovered_map
+        stamp = self.g.stamp
+        left = len(targets) if targets is not None else -1
+        parents = {s: None}
+        frontier = deque([s])
+        while frontier and left:
+            u = frontier.popleft()
+            if targets is not None and u in targets:
+                left -= 1
+                if not left:
+                    break
+            self.expanded += 1
+            r, c = u
+            # Cells of a cluster are interior, so only its bounds need checking.
+            for v in ((r - 1, c), (r + 1, c), (r, c + 1), (r, c - 1)):
+                if r0 <= v[0] <= r1 and c0 <= v[1] <= c1 and v not in parents and discovered_map[v[0]][v[1]] != stamp:
+                    parents[v] = u
+                    frontier.append(v)
+
+        return parents
+
+    """
+    Returns the shortest distances inside cluster from s to each of targets it can reach.
+    If keep is True, the search tree is kept for refine until the cluster is rebuilt.
+    """
+    def distances(self, s, cluster, targets, keep=False) -> List:
+        if self.is_open(cluster):
+            return [(t, abs(t[0] - s[0]) + abs(t[1] - s[1])) for t in targets if t != s]
+        parents = self.search_cluster(s, cluster, set(targets))
+        if keep:
+            self.trees[cluster][s] = parents
+        result = []
+        for t in targets:
+            if t in parents and t != s:
+                d = 0
+                u = t
+                while u != s:
+                    u = parents[u]
+                    d += 1
+                result.append((t, d))
+
+        return result
+
+    """
+    Recomputes the nodes of a cluster. The distances between them are found
+    later, by node_edges, for the nodes the abstract search gets to.
+    """
+    def build_cluster(self, cluster) -> None:
+        cr, cc = cluster
+        keys = [("s", cr, cc), ("e", cr, cc), ("s", cr - 1, cc), ("e", cr, cc - 1)]
+        nodes = []
+        for key in keys:
+            for a, b in self.borders.get(key, []):
+                for s in (a, b):
+                    if self.cluster_of(s) == cluster and s not in nodes:
+                        nodes.append(s)
+
+        self.nodes[cluster] = nodes
+        self.edges[cluster] = {}
+        self.trees[cluster] = {}
+        self.versions[cluster] = self.versions.get(cluster, 0) + 1
+        self.rebuilt_clusters += 1
+
+    """
+    Returns the edges [(node, distance inside the cluster)] from node s to
+    the other nodes of its cluster, searching the cluster the first time
+    they are asked for since it was built.
+    """
+    def node_edges(self, s) -> List:
+        cluster = self.cluster_of(s)
+        edges = self.edges[cluster]
+        if s not in edges:
+            edges[s] = self.distances(s, cluster, self.nodes[cluster], True)
+        return edges[s]
+
+    """
+    Rebuilds the borders and clusters touched by blocks discovered since the last update.
+    """
+    def update(self) -> None:
+        new_blocks = self.g.new_blocks
+        added = {s for s in new_blocks[self.seen_blocks :] if self.interior(s)} - self.known_blocks
+        self.seen_blocks = len(new_blocks)
+        self.rebuild(added, set())
+
+    """
+    Brings the graph up to date after reset_map started a new run: rebuilds
+    the borders and clusters of the blocks reset_map forgot and of the ones
+    uncovered since.
+    """
+    def reset(self) -> None:
+        new_blocks = self.g.new_blocks
+        blocks = {s for s in new_blocks if self.interior(s)}
+        self.seen_blocks = len(new_blocks)
+        self.expanded = 0
+        self.rebuild(blocks - self.known_blocks, self.known_blocks - blocks)
+
+    """
+    Takes blocks added to and removed from the discovered map into account,
+    rebuilding the borders and clusters they touch.
+    """
+    def rebuild(self, added, removed) -> None:
+        for s in added:
+            cluster = self.cluster_of(s)
+            self.cluster_blocks[cluster] = self.cluster_blocks.get(cluster, 0) + 1
+        for s in removed:
+            self.cluster_blocks[self.cluster_of(s)] -= 1
+        self.known_blocks |= added
+        self.known_blocks -= removed
+
+        dirty = set()
+        borders = set()
+        for s in added | removed:
+            cluster = self.cluster_of(s)
+            dirty.add(cluster)
+            r0, r1, c0, c1 = self.bounds(cluster)
+            cr, cc = cluster
+            if s[0] == r1:
+                borders.add(("s", cr, cc))
+            if s[0] == r0:
+                borders.add(("s", cr - 1, cc))
+            if s[1] == c1:
+                borders.add(("e", cr, cc))
+            if s[1] == c0:
+                borders.add(("e", cr, cc - 1))
+
+        for key in borders:
+            if key in self.borders and self.build_border(key):
+                # Both clusters on the border have new nodes.
+                direction, cr, cc = key
+                dirty.add((cr, cc))
+                dirty.add((cr + 1, cc) if direction == "s" else (cr, cc + 1))
+        for cluster in dirty:
+            self.build_cluster(cluster)
+
+    """
+    Searches the abstract graph for a path from s_start to s_goal, after
+    connecting both to the nodes of their clusters.
+    Returns the list of nodes from s_start to s_goal, or None if no path exists.
+    """
+    def abstract_path(self, s_start, s_goal) -> List:
+        g = self.g
+        self.update()
+        start_cluster = self.cluster_of(s_start)
+        goal_cluster = self.cluster_of(s_goal)
+
+        # Temporary edges from s_start, and into s_goal.
+        targets = list(self.nodes[start_cluster])
+        if goal_cluster == start_cluster:
+            targets.append(s_goal)
+        start_edges = self.distances(s_start, start_cluster, targets)
+        # The goal rarely changes, so its edges are kept until its cluster is rebuilt.
+        goal, version, goal_edges = self.goal_edges
+        if goal != s_goal or version != self.versions[goal_cluster]:
+            goal_edges = dict(self.distances(s_goal, goal_cluster, self.nodes[goal_cluster], True))
+            self.goal_edges = (s_goal, self.versions[goal_cluster], goal_edges)
+
+        g_max = g.map_size ** 2
+        g_vals = {s_start: 0}
+        parents = {s_start: None}
+        closed = set()
+        open_list = g.new_open_list()
+        open_list.push((g_max * g.h(s_start, s_goal), 0, s_start))
+        while len(open_list) > 0:
+            s = open_list.pop()[2]
+            if s == s_goal:
+                path = [s]
+                while parents[s] is not None:
+                    s = parents[s]
+                    path.append(s)
+                return path[: : -1]
+            closed.add(s)
+            self.expanded += 1
+
+            if s == s_start:
+                succ_states = list(start_edges)
+            else:
+                succ_states = list(self.node_edges(s))
+                if s in goal_edges:
+                    succ_states.append((s_goal, goal_edges[s]))
+            succ_states += [(t, 1) for t in self.crossings.get(s, [])]
+            for succ, cost in succ_states:
+                if succ in closed:
+                    continue
+                g_succ = g_vals[s] + cost
+                if g_succ < g_vals.get(succ, g_max):
+                    g_vals[succ] = g_succ
+                    parents[succ] = s
+                    priority = g_max * (g_succ + g.h(succ, s_goal)) - g_succ
+                    open_list.push((priority, g.random.randint(0, 100), succ))
+
+        return None
+
+    """
+    Refines one step of an abstract path into cells: a move across a border,
+    or the shortest path between two cells of the same cluster.
+    Returns the cells from a to b, or None if b can no longer be reached inside the cluster.
+    """
+    def refine(self, a, b) -> List:
+        if abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and self.cluster_of(a) != self.cluster_of(b):
+            return [a, b] if self.free(b) else None
+        if self.is_open(self.cluster_of(a)):
+            # Along the column to b's row, then along the row.
+            path = [a]
+            r, c = a
+            while r != b[0]:
+                r += 1 if b[0] > r else -1
+                path.append((r, c))
+            while c != b[1]:
+                c += 1 if b[1] > c else -1
+                path.append((r, c))
+            return path
+        # Moves are reversible, so a search tree kept from either end gives the path.
+        trees = self.trees[self.cluster_of(a)]
+        if b in trees.get(a, ()):
+            parents, source, path = trees[a], a, [b]
+        elif a in trees.get(b, ()):
+            parents, source, path = trees[b], b, [a]
+        else:
+            parents, source, path = self.search_cluster(a, self.cluster_of(a), {b}), a, [b]
+            if b not in parents:
+                return None
+        while path[-1] != source:
+            path.append(parents[path[-1]])
+
+        return path[: : -1] if source == a else path
+
+"""
+Repeated HPA* from agent to target on g, as a strategy.
+Reuses the cluster graph of g's last HPA* run if it has the same cluster
+size, or builds one. Each replan updates the clusters touched by new blocks,
+searches the abstract graph and follows the abstract path, refining it one
+step at a time.
+expanded_cells counts abstract nodes expanded plus cells expanded by every
+search inside a cluster, including the ones that rebuild clusters.
+Returns True if the target was reached, False otherwise.
+"""
+def hpa_repeated_compute_path(g, cluster_size=10) -> bool:
+    # The cluster graph works on (row, col) cells; engines with cell ids are not supported.
+    if hasattr(g, "cell_id"):
+        raise ValueError(type(g).__name__ + " does not support planner: hpa")
+    g.reset_map()
+    start = perf_counter()
+    graph = g.cluster_graph
+    if graph is None or graph.cluster_size != cluster_size:
+        graph = ClusterGraph(g, cluster_size)
+        g.cluster_graph = graph
+    else:
+        graph.reset()
+    g.expanded_cells += graph.expanded
+    # The build (or rebuild) is not part of any replan, so it is traced on its own.
+    if g.trace is not None:
+        g.trace.build(g, graph.expanded, perf_counter() - start)
+
+    while g.agent != g.target:
+        s_start = g.agent
+        replan = g.start_replan()
+        graph.expanded = 0
+        abstract = graph.abstract_path(s_start, g.target)
+        g.end_search(replan)
+        if abstract is None:
+            g.expanded_cells += graph.expanded
+            g.max_expanded = max(g.max_expanded, graph.expanded)
+            g.end_replan(replan, s_start, g.target, None)
+            return False
+        g.end_build_path(replan)
+
+        # Follow the abstract path, refining each step when the agent gets to it.
+        path = [s_start]
+        for a, b in zip(abstract, abstract[1 :]):
+            segment = graph.refine(a, b)
+            if segment is None:
+                break
+            path += segment[1 :]
+            if not g.follow_path(segment):
+                break
+        g.expanded_cells += graph.expanded
+        g.max_expanded = max(g.max_expanded, graph.expanded)
+        g.end_replan(replan, s_start, g.target, path)
+
+    return True
@@ -0,0 +1,151 @@
+import cProfile
+import pstats
+import tracemalloc
+from typing import Dict
+
+from open_list import LinearScanHeap
+
+"""
+Counters and timings for one run of a solving strategy.
+Assign a SearchStats to Gridworld.stats to collect them; it is reset at the
+start of every run. Leave Gridworld.stats as None to switch instrumentation
+off, in which case the search loop runs exactly as without it.
+"""
+class SearchStats:
+    def __init__(self) -> None:
+        self.reset()
+
+    """
+    Clears all counters and timings.
+    """
+    def reset(self) -> None:
+        self.replans = 0  # Number of searches run.
+        self.pushes = 0  # Entries inserted into an open list.
+        self.decrease_keys = 0  # Priority updates of entries already in an open list.
+        self.heapify_calls = 0  # Full O(n) re-heapifies (only LinearScanHeap does these).
+        self.pops = 0  # Entries popped from an open list.
+        self.removals = 0  # Entries removed from an open list without being popped.
+        self.open_list_peak = 0  # Largest open list size seen in any search.
+        self.search_time = 0.0  # Seconds spent searching.
+        self.build_path_time = 0.0  # Seconds spent building paths from the search results.
+        self.follow_path_time = 0.0  # Seconds spent moving the agent along paths.
+
+    """
+    Returns all counters and timings as a dict.
+    """
+    def as_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+"""
+Wraps an open list and counts its operations into a SearchStats.
+Used in place of the plain open list only while stats are enabled.
+"""
+class CountingOpenList:
+    def __init__(self, open_list, stats) -> None:
+        self.open_list = open_list
+        self.stats = stats
+        self.linear = isinstance(open_list, LinearScanHeap)  # Every update of a LinearScanHeap re-heapifies.
+
+    def __len__(self) -> int:
+        return len(self.open_list)
+
+    def __contains__(self, s) -> bool:
+        return s in self.open_list
+
+    def push(self, entry) -> None:
+        if entry[2] in self.open_list:
+            self.stats.decrease_keys += 1
+            if self.linear:
+                self.stats.heapify_calls += 1
+        else:
+            self.stats.pushes += 1
+        self.open_list.push(entry)
+        if len(self.open_list) > self.stats.open_list_peak:
+            self.stats.open_list_peak = len(self.open_list)
+
+    def pop(self):
+        self.stats.pops += 1
+        return self.open_list.pop()
+
+    def peek(self):
+        return self.open_list.peek()
+
+    def remove(self, s) -> None:
+        self.stats.removals += 1
+        if self.linear:
+            self.stats.heapify_calls += 1
+        self.open_list.remove(s)
+
+
+"""
+Runs strategy (a function taking a Gridworld) on g under cProfile or tracemalloc.
+Returns (result of the strategy, capture): a pstats.Stats for "cprofile",
+or a tracemalloc.Snapshot taken at the end of the run for "tracemalloc"
+(with the peak traced memory in bytes stored as snapshot.peak).
+"""
+def profile_run(g, strategy, mode="cprofile"):
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        result = strategy(g)
+        profiler.disable()
+        return result, pstats.Stats(profiler)
+    elif mode == "tracemalloc":
+        tracemalloc.start()
+        result = strategy(g)
+        snapshot = tracemalloc.take_snapshot()
+        snapshot.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, snapshot
+    else:
+        raise ValueError("unknown profile mode: " + str(mode))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import numpy as np
+
+    from gridworld import Gridworld
+    from maze_store import load_maps
+    from open_list import OPEN_LISTS
+    from strategies import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Instrument or profile one strategy on one map.")
+    parser.add_argument("--maps", default="gridworld_maps_smaller.maze", help="maze store or pickle file")
+    parser.add_argument("--map", type=int, default=0, help="map to solve")
+    parser.add_argument("--strategy", choices=list(STRATEGIES), default="forward_large_g")
+    parser.add_argument("--open-list", choices=list(OPEN_LISTS), default="indexed_heap")
+    parser.add_argument("--seed", type=int, default=0, help="seed for random tie-breaking")
+    parser.add_argument("--profile", choices=["none", "cprofile", "tracemalloc"], default="none")
+    parser.add_argument("--replans", action="store_true", help="print one line per replan")
+    parser.add_argument("--top", type=int, default=20, help="number of profile entries to print")
+    args = parser.parse_args()
+
+    m = load_maps(args.maps)[args.map]
+    g = Gridworld(map_size=len(m) - 2, pregenerated_map=np.asarray(m).tolist(),
+                  open_list_type=OPEN_LISTS[args.open_list], seed=args.seed)
+    g.stats = SearchStats()
+    if args.replans:
+        g.on_replan = lambda event: print(event)
+
+    run = STRATEGIES[args.strategy][1]
+    if args.profile == "none":
+        result = run(g)
+    else:
+        result, capture = profile_run(g, run, args.profile)
+
+    print("Path found" if result else "No path found")
+    print("expanded_cells: " + str(g.expanded_cells))
+    print("max_expanded: " + str(g.max_expanded))
+    print("moves_taken: " + str(g.moves_taken))
+    for name, value in g.stats.as_dict().items():
+        print(name + ": " + str(value))
+
+    if args.profile == "cprofile":
+        capture.sort_stats("tottime").print_stats(args.top)
+    elif args.profile == "tracemalloc":
+        print("peak traced memory: " + str(capture.peak) + " bytes")
+        for stat in capture.statistics("lineno")[: args.top]:
+            print(stat)
@@ -1,120 +1,67 @@
-import pickle
+import argparse
+import os
 
-from gridworld import Gridworld
+from maze_store import load_maps
+from result_cache import ResultCache, iter_cached
+from results import ResultsWriter
+from runner import RunningSummary, iter_maps, print_summary
+from strategies import STRATEGIES
 
-maps = {}
-with open('gridworld_maps.pickle', 'rb') as handle:
-    maps = pickle.load(handle)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve pre-generated gridworlds with every strategy.")
+    parser.add_argument("--maps", default="gridworld_maps.maze", help="maze store or pickle file of maps to solve")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES),
+                        help="strategies to run (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for random tie-breaking")
+    parser.add_argument("--output", help="stream one record per (map, strategy) to this .jsonl or .csv file")
+    parser.add_argument("--resume", action="store_true",
+                        help="keep the records already in --output and only solve the missing pairs")
+    parser.add_argument("--cache", help="SQLite result cache; pairs cached for the same maze, strategy and solver are not solved again")
+    parser.add_argument("--cache-size", type=int, default=1000000, help="records kept in --cache")
+    parser.add_argument("--trace", help="record every run to a binary trace file per worker in this directory (see search_trace.py)")
+    args = parser.parse_args()
+    if args.resume and not args.output:
+        parser.error("--resume requires --output")
 
-map_size = len(maps[0])
-print("Loaded " + str(len(maps)) + " gridworlds of size " + str(map_size - 2))
+    maps = load_maps(args.maps)
 
-successes = [0] * 5
-total_expanded_cells = [0] * 5
-max_expanded_cells = [0] * 5
-total_moves_taken = [0] * 5
+    map_size = len(maps[next(iter(maps))])
+    print("Loaded " + str(len(maps)) + " gridworlds of size " + str(map_size - 2))
 
-for k in maps:
-    m = maps[k]
-    g = Gridworld(map_size=map_size - 2, pregenerated_map=m)
+    summary = RunningSummary(args.strategies)
+    writer = None
+    skip = set()
+    if args.output:
+        writer = ResultsWriter(args.output, args.resume)
+        for r in writer.records:
+            summary.add(r)
+        skip = writer.done()
+        if skip:
+            print("Resuming: " + str(len(skip)) + " results already in " + args.output)
 
-    # Forward A*, ties favor large g values.
-    print("Testing forward A*, ties favoring large g values...")
-    res = g.repeated_compute_path(reverse=False, large_g_ties=True)
-    if res:
-        successes[0] += 1
-        total_expanded_cells[0] += g.expanded_cells
-        total_moves_taken[0] += g.moves_taken
-        max_expanded_cells[0] += g.max_expanded
-        print("Path found for map " + str(k) + " with "
-                                    + str(g.expanded_cells) + " expanded cells and "
-                                    + str(g.moves_taken) + " moves made.")
+    cache = ResultCache(args.cache, args.cache_size) if args.cache else None
+    if cache is not None:
+        results = iter_cached(maps, cache, args.strategies, args.workers, args.seed, skip, args.trace)
     else:
-        print("No path found for map " + str(k) + ".")
+        results = iter_maps(maps, args.strategies, args.workers, args.seed, skip, args.trace)
+    try:
+        for r in results:
+            if writer is not None:
+                writer.write(r)
+            summary.add(r)
+            label = STRATEGIES[r["strategy"]][0]
+            if r["success"]:
+                print(label + ": path found for map " + str(r["map"]) + " with "
+                      + str(r["expanded_cells"]) + " expanded cells and "
+                      + str(r["moves_taken"]) + " moves made.")
+            else:
+                print(label + ": no path found for map " + str(r["map"]) + ".")
+    finally:
+        if writer is not None:
+            writer.close()
+        if cache is not None:
+            print(str(cache.hits) + " results from the cache, " + str(cache.misses) + " solved")
+            cache.close()
 
-    # Forward A*, ties favor small g values.
-    print("Testing forward A*, ties favoring small g values...")
-    res = g.repeated_compute_path(reverse=False, large_g_ties=False)
-    if res:
-        successes[1] += 1
-        total_expanded_cells[1] += g.expanded_cells
-        total_moves_taken[1] += g.moves_taken
-        max_expanded_cells[1] += g.max_expanded
-        print("Path found for map " + str(k) + " with "
-                                    + str(g.expanded_cells) + " expanded cells and "
-                                    + str(g.moves_taken) + " moves made.")
-    else:
-        print("No path found for map " + str(k) + ".")
-
-    # Backward A*, ties favor large g values.
-    print("Testing backward A*, ties favoring large g values...")
-    res = g.repeated_compute_path(reverse=True, large_g_ties=True)
-    if res:
-        successes[2] += 1
-        total_expanded_cells[2] += g.expanded_cells
-        total_moves_taken[2] += g.moves_taken
-        max_expanded_cells[2] += g.max_expanded
-        print("Path found for map " + str(k) + " with "
-                                    + str(g.expanded_cells) + " expanded cells and "
-                                    + str(g.moves_taken) + " moves made.")
-    else:
-        print("No path found for map " + str(k) + ".")
-
-    # Backward A*, ties favor small g values.
-    print("Testing backward A*, ties favoring small g values...")
-    res = g.repeated_compute_path(reverse=True, large_g_ties=False)
-    if res:
-        successes[3] += 1
-        total_expanded_cells[3] += g.expanded_cells
-        total_moves_taken[3] += g.moves_taken
-        max_expanded_cells[3] += g.max_expanded
-        print("Path found for map " + str(k) + " with "
-                                    + str(g.expanded_cells) + " expanded cells and "
-                                    + str(g.moves_taken) + " moves made.")
-    else:
-        print("No path found for map " + str(k) + ".")
-
-    # Adaptive A*, ties favor large g values.
-    print("Testing adaptive A*, ties favoring large g values...")
-    res = g.adaptive_repeated_compute_path()
-    if res:
-        successes[4] += 1
-        total_expanded_cells[4] += g.expanded_cells
-        total_moves_taken[4] += g.moves_taken
-        max_expanded_cells[4] += g.max_expanded
-        print("Path found for map " + str(k) + " with "
-                                    + str(g.expanded_cells) + " expanded cells and "
-                                    + str(g.moves_taken) + " moves made.")
-    else:
-        print("No path found for map " + str(k) + ".")
-
-print("\nForward A*, ties favor large g values:")
-print("\tSuccesses: " + str(successes[0]) + "/" + str(len(maps)))
-print("\tAverage expanded cells: " + str(total_expanded_cells[0] / float(successes[0])))
-print("\tAverage maximum expanded cells per A*: " + str(max_expanded_cells[0] / float(successes[0])))
-print("\tAverage moves taken: " + str(total_moves_taken[0] / float(successes[0])))
-
-print("\nForward A*, ties favor small g values:")
-print("\tSuccesses: " + str(successes[1]) + "/" + str(len(maps)))
-print("\tAverage expanded cells: " + str(total_expanded_cells[1] / float(successes[1])))
-print("\tAverage maximum expanded cells per A*: " + str(max_expanded_cells[1] / float(successes[1])))
-print("\tAverage moves taken: " + str(total_moves_taken[1] / float(successes[1])))
-
-print("\nBackward A*, ties favor large g values:")
-print("\tSuccesses: " + str(successes[2]) + "/" + str(len(maps)))
-print("\tAverage expanded cells: " + str(total_expanded_cells[2] / float(successes[2])))
-print("\tAverage maximum expanded cells per A*: " + str(max_expanded_cells[2] / float(successes[2])))
-print("\tAverage moves taken: " + str(total_moves_taken[2] / float(successes[2])))
-
-print("\nBackward A*, ties favor small g values:")
-print("\tSuccesses: " + str(successes[3]) + "/" + str(len(maps)))
-print("\tAverage expanded cells: " + str(total_expanded_cells[3] / float(successes[3])))
-print("\tAverage maximum expanded cells per A*: " + str(max_expanded_cells[3] / float(successes[3])))
-print("\tAverage moves taken: " + str(total_moves_taken[3] / float(successes[3])))
-
-print("\nAdaptive A*, ties favor large g values:")
-print("\tSuccesses: " + str(successes[4]) + "/" + str(len(maps)))
-print("\tAverage expanded cells: " + str(total_expanded_cells[4] / float(successes[4])))
-print("\tAverage maximum expanded cells per A*: " + str(max_expanded_cells[4] / float(successes[4])))
-print("\tAverage moves taken: " + str(total_moves_taken[4] / float(successes[4])))
-    
\ No newline at end of file
+    print_summary(summary.summary())
@@ -0,0 +1,181 @@
+import argparse
+import hashlib
+import mmap
+import pickle
+import struct
+from typing import Dict
+
+import numpy as np
+
+"""
+Compact on-disk store of many mazes.
+
+File layout (all integers little-endian):
+    header   magic b"MAZE", version (u16), reserved (u16),
+             number of maps (u64), offset of the index (u64)
+    records  one per map: its cells bit-packed row by row, 1 bit per cell
+             (1 = blocked), padded to a whole byte
+    index    one entry per map: record offset (u64), rows (u32), cols (u32)
+
+The index is written last, so maps can be streamed to disk one at a time.
+Readers memory-map the file and unpack a single map on demand.
+"""
+
+MAGIC = b"MAZE"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ")
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("rows", "<u4"), ("cols", "<u4")])
+
+"""
+Writes maps to a maze store one at a time.
+Use as a context manager, or call close() to write the index.
+"""
+class MazeStoreWriter:
+    def __init__(self, path) -> None:
+        self.path = path
+        self.handle = open(path, "wb")
+        self.index = []  # (offset, rows, cols) of every map written so far.
+        # Placeholder header; patched with the real count and index offset on close.
+        self.handle.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    """
+    Appends one map (a 2D array of 0s and 1s) and returns its index in the store.
+    """
+    def append(self, m) -> int:
+        cells = np.asarray(m, dtype=np.uint8)
+        rows, cols = cells.shape
+        self.index.append((self.handle.tell(), rows, cols))
+        self.handle.write(np.packbits(cells.reshape(-1), bitorder="little").tobytes())
+        return len(self.index) - 1
+
+    """
+    Writes the index, patches the header and closes the file.
+    """
+    def close(self) -> None:
+        if self.handle.closed:
+            return
+        index_offset = self.handle.tell()
+        self.handle.write(np.array(self.index, dtype=INDEX_DTYPE).tobytes())
+        self.handle.seek(0)
+        self.handle.write(HEADER.pack(MAGIC, VERSION, 0, len(self.index), index_offset))
+        self.handle.close()
+
+
+"""
+Read-only, memory-mapped view of a maze store.
+Behaves like a dict from map index (0, 1, ...) to 2D uint8 arrays; only
+the requested map is unpacked, so any map can be used without loading the others.
+"""
+class MazeStore:
+    def __init__(self, path) -> None:
+        self.path = path
+        with open(path, "rb") as handle:
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, index_offset = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(path + " is not a maze store")
+        if version != VERSION:
+            raise ValueError(path + " has unsupported maze store version " + str(version))
+        self.index = np.frombuffer(self.data, dtype=INDEX_DTYPE, count=count, offset=index_offset)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(range(len(self.index)))
+
+    def __contains__(self, k) -> bool:
+        return isinstance(k, (int, np.integer)) and 0 <= k < len(self.index)
+
+    """
+    Returns map k as a 2D uint8 array (0 = unblocked, 1 = blocked).
+    """
+    def __getitem__(self, k) -> np.ndarray:
+        if k not in self:
+            raise KeyError(k)
+        rows, cols = int(self.index[k]["rows"]), int(self.index[k]["cols"])
+        packed = self.packed(k)
+        return np.unpackbits(packed, count=rows * cols, bitorder="little").reshape(rows, cols)
+
+    """
+    Returns the bit-packed cells of map k as a read-only view into the file.
+    """
+    def packed(self, k) -> np.ndarray:
+        entry = self.index[k]
+        size = (int(entry["rows"]) * int(entry["cols"]) + 7) // 8
+        return np.frombuffer(self.data, dtype=np.uint8, count=size, offset=int(entry["offset"]))
+
+    def keys(self):
+        return range(len(self.index))
+
+    def items(self):
+        for k in self:
+            yield k, self[k]
+
+    def close(self) -> None:
+        self.index = None
+        self.data.close()
+
+
+"""
+Returns True if the file at path is a maze store.
+"""
+def is_maze_store(path) -> bool:
+    with open(path, "rb") as handle:
+        return handle.read(len(MAGIC)) == MAGIC
+
+"""
+Loads maps from either a maze store or a pickled dict of maps.
+Maze stores are memory-mapped rather than read into memory.
+"""
+def load_maps(path) -> Dict:
+    if is_maze_store(path):
+        return MazeStore(path)
+    with open(path, "rb") as handle:
+        return pickle.load(handle)
+
+"""
+Returns the content hash of a map: the same cells give the same hash,
+whether the map is a list of rows or an array of any integer type.
+"""
+def map_digest(m) -> str:
+    cells = np.ascontiguousarray(m, dtype=np.uint8)
+    return hashlib.sha1(str(cells.shape).encode() + cells.tobytes()).hexdigest()
+
+"""
+Converts a pickled dict of maps to a maze store.
+Maps are written in the dict's order; returns the number of maps written.
+"""
+def convert_pickle(pickle_path, store_path) -> int:
+    with open(pickle_path, "rb") as handle:
+        maps = pickle.load(handle)
+    with MazeStoreWriter(store_path) as writer:
+        for k in maps:
+            writer.append(maps[k])
+
+    return len(maps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert and inspect maze store files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="convert a pickle of maps to a maze store")
+    convert.add_argument("pickle_path")
+    convert.add_argument("store_path")
+    info = commands.add_parser("info", help="print the number and sizes of maps in a maze store")
+    info.add_argument("store_path")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        n = convert_pickle(args.pickle_path, args.store_path)
+        print("Wrote " + str(n) + " maps to " + args.store_path)
+    else:
+        store = MazeStore(args.store_path)
+        sizes = sorted({(int(e["rows"]), int(e["cols"])) for e in store.index})
+        print(str(len(store)) + " maps of size " + ", ".join(str(r) + "x" + str(c) for r, c in sizes))
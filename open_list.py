@@ -0,0 +1,268 @@
+from heapq import heapify, heappop, heappush
+
+"""
+Open list backends for A*.
+Every backend stores entries of the form (priority, tie_breaker, s)
+and supports push (insert or decrease-key), pop, peek, remove, membership and len().
+Backends are interchangeable so they can be benchmarked against each other.
+"""
+
+"""
+Indexed binary min-heap with a position map from state to heap index.
+Membership tests are O(1); push, pop and decrease-key are O(log n).
+"""
+class IndexedHeap:
+    def __init__(self) -> None:
+        self.heap = []  # Binary heap of (priority, tie_breaker, s) entries.
+        self.positions = {}  # Maps each state s to its index in the heap.
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __contains__(self, s) -> bool:
+        return s in self.positions
+
+    """
+    Inserts the given entry into the heap.
+    If its state is already in the heap, its entry is replaced
+    and moved to its new position (decrease-key).
+    """
+    def push(self, entry) -> None:
+        i = self.positions.get(entry[2])
+        if i is None:
+            # New state; place it at the bottom and sift it up.
+            self.heap.append(entry)
+            self.sift_up(len(self.heap) - 1)
+        else:
+            old = self.heap[i]
+            self.heap[i] = entry
+            if entry < old:
+                self.sift_up(i)
+            else:
+                self.sift_down(i)
+
+    """
+    Removes and returns the entry with the smallest priority.
+    """
+    def pop(self):
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        del self.positions[top[2]]
+        if heap:
+            # Move the last entry to the root and sift it down.
+            heap[0] = last
+            self.sift_down(0)
+
+        return top
+
+    """
+    Returns the entry with the smallest priority without removing it.
+    """
+    def peek(self):
+        return self.heap[0]
+
+    """
+    Removes state s from the heap.
+    """
+    def remove(self, s) -> None:
+        heap = self.heap
+        i = self.positions.pop(s)
+        last = heap.pop()
+        if i < len(heap):
+            # Fill the hole with the last entry and restore the heap property.
+            old = heap[i]
+            heap[i] = last
+            if last < old:
+                self.sift_up(i)
+            else:
+                self.sift_down(i)
+
+    """
+    Moves the entry at index i up until the heap property holds.
+    """
+    def sift_up(self, i) -> None:
+        heap = self.heap
+        positions = self.positions
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if entry < heap[parent]:
+                heap[i] = heap[parent]
+                positions[heap[i][2]] = i
+                i = parent
+            else:
+                break
+        heap[i] = entry
+        positions[entry[2]] = i
+
+    """
+    Moves the entry at index i down until the heap property holds.
+    """
+    def sift_down(self, i) -> None:
+        heap = self.heap
+        positions = self.positions
+        n = len(heap)
+        entry = heap[i]
+        child = 2 * i + 1
+        while child < n:
+            # Pick the smaller of the two children.
+            if child + 1 < n and heap[child + 1] < heap[child]:
+                child += 1
+            if heap[child] < entry:
+                heap[i] = heap[child]
+                positions[heap[i][2]] = i
+                i = child
+                child = 2 * i + 1
+            else:
+                break
+        heap[i] = entry
+        positions[entry[2]] = i
+
+
+"""
+Bucket queue keyed by integer priority.
+Each priority value maps to a bucket of entries; a heap over the distinct
+occupied priorities finds the smallest bucket. A* priorities here are small
+bounded integers that are shared by many states, so there are far fewer
+distinct keys than entries and decrease-key is O(1).
+Entries within a bucket are popped last-in first-out; the tie_breaker
+of an entry is stored but not used for ordering.
+"""
+class BucketQueue:
+    def __init__(self) -> None:
+        self.buckets = {}  # Maps each priority to a list of entries.
+        self.keys = []  # Binary heap of the priorities with a bucket.
+        self.positions = {}  # Maps each state s to (priority, index in bucket).
+        self.size = 0  # Number of entries in the queue.
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, s) -> bool:
+        return s in self.positions
+
+    """
+    Inserts the given entry into the bucket for its priority.
+    If its state is already queued, it is first removed from its old bucket.
+    """
+    def push(self, entry) -> None:
+        s = entry[2]
+        if s in self.positions:
+            self.remove(s)
+        key = entry[0]
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = []
+            heappush(self.keys, key)
+        self.positions[s] = (key, len(bucket))
+        bucket.append(entry)
+        self.size += 1
+
+    """
+    Removes and returns an entry with the smallest priority.
+    """
+    def pop(self):
+        bucket = self.first_bucket()
+        entry = bucket.pop()
+        del self.positions[entry[2]]
+        self.size -= 1
+
+        return entry
+
+    """
+    Returns an entry with the smallest priority without removing it.
+    """
+    def peek(self):
+        return self.first_bucket()[-1]
+
+    """
+    Returns the non-empty bucket with the smallest priority.
+    Buckets emptied by earlier pops or removals are discarded along the way.
+    """
+    def first_bucket(self) -> list:
+        keys = self.keys
+        buckets = self.buckets
+        bucket = buckets[keys[0]]
+        while not bucket:
+            del buckets[heappop(keys)]
+            bucket = buckets[keys[0]]
+
+        return bucket
+
+    """
+    Removes state s from its bucket in O(1) by swapping it with the last entry.
+    An emptied bucket is left in place and discarded lazily by first_bucket.
+    """
+    def remove(self, s) -> None:
+        key, i = self.positions.pop(s)
+        bucket = self.buckets[key]
+        last = bucket.pop()
+        if i < len(bucket):
+            bucket[i] = last
+            self.positions[last[2]] = (key, i)
+        self.size -= 1
+
+
+"""
+The original open list: a plain binary heap searched linearly for updates,
+which are applied by overwriting the entry and re-heapifying in O(n).
+Kept as a reference backend for benchmarks.
+"""
+class LinearScanHeap:
+    def __init__(self) -> None:
+        self.heap = []  # Binary heap of (priority, tie_breaker, s) entries.
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __contains__(self, s) -> bool:
+        return self.index(s) is not None
+
+    """
+    Inserts the given entry, or overwrites the entry of its state and re-heapifies.
+    """
+    def push(self, entry) -> None:
+        i = self.index(entry[2])
+        if i is None:
+            heappush(self.heap, entry)
+        else:
+            self.heap[i] = entry
+            heapify(self.heap)
+
+    """
+    Removes and returns the entry with the smallest priority.
+    """
+    def pop(self):
+        return heappop(self.heap)
+
+    """
+    Returns the entry with the smallest priority without removing it.
+    """
+    def peek(self):
+        return self.heap[0]
+
+    """
+    Removes state s from the heap and re-heapifies.
+    """
+    def remove(self, s) -> None:
+        del self.heap[self.index(s)]
+        heapify(self.heap)
+
+    """
+    Returns the index of state s in the heap, or None if it is not there.
+    """
+    def index(self, s) -> int:
+        for i in range(len(self.heap)):
+            if self.heap[i][2] == s:
+                return i
+
+        return None
+
+
+# Open list backends by name, for selecting one from the command line.
+OPEN_LISTS = {
+    "indexed_heap": IndexedHeap,
+    "bucket": BucketQueue,
+    "linear": LinearScanHeap,
+}
@@ -0,0 +1,222 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from maze_store import load_maps
+
+"""
+Buffered map rendering, incremental terminal updates and run animations.
+
+render_frame builds a whole map in one string, in the format of
+Gridworld.print_map: undiscovered blocks are "#", discovered blocks "X",
+the agent "A", the target "T", and "D" when the agent is on the target.
+MapRenderer writes only what changed since its last frame (the cells the
+agent left and entered, and newly discovered blocks) as ANSI cursor moves,
+so a frame per replan costs about as much as writing those few cells.
+An animation of a run is an ANSI stream of such frames, separated by
+FRAME_SEPARATOR, that play() shows at a given rate; it can also be saved as
+image frames: one array of cell codes per replan (see PALETTE).
+Incremental frames rely on new_blocks and a tuple agent position, as kept by
+Gridworld and BitmapGridworld.
+"""
+
+# Cell codes of image frames; CHARS[code] is the character of each code.
+EMPTY, UNSEEN_BLOCK, BLOCK, AGENT, TARGET, DONE = range(6)
+CHARS = " #XATD"
+# RGB colour of each cell code.
+PALETTE = np.array([[255, 255, 255], [190, 190, 190], [0, 0, 0], [30, 90, 255], [230, 40, 40], [0, 180, 0]], dtype=np.uint8)
+# Cells as printed by print_map: the character and a space.
+CELLS = np.array([c + " " for c in CHARS])
+# Written after each frame of an ANSI stream (an ASCII record separator, ignored by terminals).
+FRAME_SEPARATOR = "\x1e"
+# Moves the cursor home and clears the screen.
+CLEAR = "\x1b[H\x1b[2J"
+
+"""
+Returns the map of g as a 2D uint8 array of cell codes.
+"""
+def cell_codes(g) -> np.ndarray:
+    codes = np.asarray(g.true_map, dtype=np.uint8).copy()
+    codes[(np.asarray(g.discovered_map) == g.stamp) & (codes == UNSEEN_BLOCK)] = BLOCK
+    codes[g.target] = TARGET
+    codes[g.agent] = DONE if g.agent == g.target else AGENT
+    return codes
+
+"""
+Returns the map of g as one string, as Gridworld.print_map prints it.
+"""
+def render_frame(g) -> str:
+    cells = CELLS[cell_codes(g)]
+    return "".join(["".join(row) + "\n" for row in cells.tolist()])
+
+"""
+Returns the cell code of cell s of g.
+"""
+def cell_code(g, s) -> int:
+    if s == g.agent:
+        return DONE if s == g.target else AGENT
+    if s == g.target:
+        return TARGET
+    if not g.true_map[s[0]][s[1]]:
+        return EMPTY
+    return BLOCK if g.discovered_map[s[0]][s[1]] == g.stamp else UNSEEN_BLOCK
+
+"""
+Returns the ANSI sequence that moves the cursor to cell s = (row, col) of a rendered map.
+"""
+def goto(s) -> str:
+    return "\x1b[" + str(s[0] + 1) + ";" + str(2 * s[1] + 1) + "H"
+
+"""
+Draws a gridworld on an ANSI terminal (or into an ANSI stream), redrawing
+only the cells that changed since the previous frame.
+"""
+class MapRenderer:
+    def __init__(self, g, out=sys.stdout) -> None:
+        self.g = g
+        self.out = out
+        self.episode = None  # Episode of g when the last frame was drawn; None before the first frame.
+        self.agent = None  # Agent position in the last frame.
+        self.seen_blocks = 0  # Number of g.new_blocks already drawn.
+        self.frames = 0  # Number of frames written.
+
+    """
+    Returns the ANSI text that turns the last frame into the current state of
+    g: the whole map for the first frame of a run, only the changed cells after.
+    """
+    def frame(self) -> str:
+        g = self.g
+        if self.episode != g.episode or len(g.new_blocks) < self.seen_blocks:
+            text = CLEAR + render_frame(g)
+        else:
+            changed = set(g.new_blocks[self.seen_blocks :])
+            changed.update((self.agent, g.agent, g.target))
+            text = "".join([goto(s) + CHARS[cell_code(g, s)] for s in sorted(changed)])
+            # Leave the cursor below the map.
+            text += goto((g.map_size, 0))
+        self.episode = g.episode
+        self.agent = g.agent
+        self.seen_blocks = len(g.new_blocks)
+        return text
+
+    """
+    Writes the next frame, followed by FRAME_SEPARATOR.
+    """
+    def draw(self) -> None:
+        self.out.write(self.frame() + FRAME_SEPARATOR)
+        self.out.flush()
+        self.frames += 1
+
+    """
+    Draws a frame after every replan of g, through g.on_replan.
+    """
+    def attach(self) -> None:
+        self.g.on_replan = lambda event: self.draw()
+
+"""
+Records an animation of the runs of a gridworld: an ANSI stream written to
+ansi_path and image frames (cell codes) kept in frames, when asked for.
+"""
+class RunRecorder:
+    def __init__(self, g, ansi_path=None, keep_frames=False) -> None:
+        self.g = g
+        self.handle = open(ansi_path, "w") if ansi_path else None
+        self.renderer = MapRenderer(g, self.handle) if self.handle else None
+        self.keep_frames = keep_frames
+        self.frames = []  # Cell codes of every frame, if keep_frames.
+
+    """
+    Records one frame of the current state of g. Takes the event of
+    g.on_replan, so it can be used as that hook directly.
+    """
+    def capture(self, event=None) -> None:
+        if self.renderer is not None:
+            self.renderer.draw()
+        if self.keep_frames:
+            self.frames.append(cell_codes(self.g))
+
+    """
+    Saves the image frames to path, a compressed .npz holding frames, of
+    shape (frame, row, col), and palette.
+    """
+    def save_frames(self, path) -> None:
+        np.savez_compressed(path, frames=np.stack(self.frames), palette=PALETTE)
+
+    """
+    Closes the ANSI stream.
+    """
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+"""
+Runs solve(g) and records an animation of it, with a frame after every
+replan and one at the end (solve resets the map first, so there is none
+before). Writes the ANSI stream to ansi_path and the image frames to
+frames_path (see RunRecorder.save_frames), when given.
+Returns the result of solve(g).
+"""
+def record_run(g, solve, ansi_path=None, frames_path=None):
+    recorder = RunRecorder(g, ansi_path, frames_path is not None)
+    g.on_replan = recorder.capture
+    try:
+        result = solve(g)
+        recorder.capture()
+    finally:
+        g.on_replan = None
+        recorder.close()
+    if frames_path is not None:
+        recorder.save_frames(frames_path)
+
+    return result
+
+"""
+Plays an ANSI stream written by record_run or MapRenderer at fps frames per second.
+"""
+def play(path, fps=20.0, out=sys.stdout) -> None:
+    with open(path) as handle:
+        frames = handle.read().split(FRAME_SEPARATOR)
+    for frame in frames:
+        out.write(frame)
+        out.flush()
+        time.sleep(1.0 / fps)
+
+"""
+Returns image frames saved by record_run as RGB arrays of shape
+(frame, row * scale, col * scale, 3).
+"""
+def frames_to_rgb(path, scale=4) -> np.ndarray:
+    saved = np.load(path)
+    rgb = saved["palette"][saved["frames"]]
+    return rgb.repeat(scale, axis=1).repeat(scale, axis=2)
+
+if __name__ == "__main__":
+    from gridworld import Gridworld
+    from strategies import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Record or play an animation of a gridworld run.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="solve one map and record the run")
+    record.add_argument("--maps", default="gridworld_maps_smaller.maze", help="maze store or pickle file of maps")
+    record.add_argument("--map", type=int, default=0, help="index of the map to solve")
+    record.add_argument("--strategy", choices=list(STRATEGIES), default="forward_large_g", help="strategy to run")
+    record.add_argument("--seed", type=int, default=0, help="seed for random tie-breaking")
+    record.add_argument("--ansi", help="write the ANSI animation to this file")
+    record.add_argument("--frames", help="write the image frames to this .npz file")
+    replay = commands.add_parser("play", help="play an ANSI animation in the terminal")
+    replay.add_argument("path")
+    replay.add_argument("--fps", type=float, default=20.0, help="frames per second")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        maps = load_maps(args.maps)
+        m = np.asarray(maps[list(maps)[args.map]])
+        g = Gridworld(map_size=len(m) - 2, pregenerated_map=m.tolist(), seed=args.seed)
+        success = record_run(g, STRATEGIES[args.strategy][1], args.ansi, args.frames)
+        print(("Target reached" if success else "No path found") + " after " + str(g.replans) + " replans and "
+              + str(g.moves_taken) + " moves.")
+    else:
+        play(args.path, args.fps)
@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import importlib
+import json
+import sqlite3
+import time
+from typing import Dict, Iterator
+
+from maze_store import map_digest
+from runner import iter_maps, task_seed
+from strategies import STRATEGIES
+
+"""
+Persistent cache of result records in a SQLite file, so reruns over the same
+mazes only solve the (map, strategy) pairs that changed.
+
+A record is keyed by:
+    the content hash of the maze (maze_store.map_digest), so a maze is found
+    again wherever it is stored;
+    the strategy name and a fingerprint of the call it makes, which covers
+    its parameters (reverse, large_g_ties, adaptive, planner, ...);
+    the tie-breaker seed of the task (runner.task_seed), since results depend on it;
+    the solver version: a hash of the solver sources and of SOLVER_VERSION,
+    so any change to the solver code misses the old records.
+The cache holds at most max_entries records; the least recently used are
+evicted first, so records of old solver versions age out on their own.
+Records are committed, and records beyond max_entries evicted, at least
+every commit_interval seconds while they are put, so a run that is killed
+loses at most the last few results and still keeps the cache bounded.
+"""
+
+# Bump to invalidate every cached record by hand.
+SOLVER_VERSION = "1"
+# Modules whose source can change a result record: the engines and strategies, the maps
+# they are given, and how the runner seeds and reports each run.
+SOLVER_MODULES = (
+    "strategies", "gridworld", "flat_gridworld", "bitmap_gridworld", "tiled_gridworld", "open_list",
+    "instrumentation", "hpa", "wavefront", "gridworld_generator", "maze_store", "runner",
+)
+
+"""
+Returns the solver version tag: a hash of SOLVER_VERSION and the source of SOLVER_MODULES.
+"""
+def solver_version() -> str:
+    digest = hashlib.sha1(SOLVER_VERSION.encode())
+    for name in SOLVER_MODULES:
+        with open(importlib.import_module(name).__file__, "rb") as handle:
+            digest.update(handle.read())
+
+    return digest.hexdigest()[:16]
+
+"""
+Returns a description of a code object that is the same in every process:
+its bytecode, the names it uses and its constants, with nested code objects
+(whose repr holds their address) described the same way.
+"""
+def describe_code(code) -> str:
+    consts = [describe_code(c) if hasattr(c, "co_code") else repr(c) for c in code.co_consts]
+    return repr((code.co_code, code.co_names, consts))
+
+"""
+Returns a fingerprint of the named strategy's function, which covers the
+arguments it passes to the solver.
+"""
+def strategy_params(name) -> str:
+    return hashlib.sha1(describe_code(STRATEGIES[name][1].__code__).encode()).hexdigest()[:16]
+
+"""
+Result records on disk, keyed by maze hash, strategy, strategy parameters,
+task seed and solver version. Use as a context manager, or call close().
+"""
+class ResultCache:
+    def __init__(self, path, max_entries=1000000, version=None, commit_interval=1.0) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.commit_interval = commit_interval
+        self.last_commit = time.monotonic()
+        self.version = solver_version() if version is None else version
+        self.params = {name: strategy_params(name) for name in STRATEGIES}
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "maze TEXT, strategy TEXT, params TEXT, seed TEXT, version TEXT, record TEXT, used INTEGER, "
+            "PRIMARY KEY (maze, strategy, params, seed, version))")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        # Increases on every get hit and put; the smallest values are evicted first.
+        self.clock = self.conn.execute("SELECT COALESCE(MAX(used), 0) FROM results").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    """
+    Returns the key columns of a record for the given maze hash, strategy and task seed.
+    """
+    def key(self, digest, name, seed) -> tuple:
+        return (digest, name, self.params[name], str(seed), self.version)
+
+    """
+    Returns the cached record (without its "map" field), or None.
+    """
+    def get(self, digest, name, seed):
+        key = self.key(digest, name, seed)
+        row = self.conn.execute(
+            "SELECT record FROM results WHERE maze = ? AND strategy = ? AND params = ? AND seed = ? AND version = ?",
+            key).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.conn.execute(
+            "UPDATE results SET used = ? WHERE maze = ? AND strategy = ? AND params = ? AND seed = ? AND version = ?",
+            (self.clock,) + key)
+        return json.loads(row[0])
+
+    """
+    Caches a result record. Its "map" field is not stored, since the same
+    maze can have another key in another set of maps.
+    Commits (and evicts) if the last commit is more than commit_interval seconds old.
+    """
+    def put(self, digest, name, seed, record) -> None:
+        self.clock += 1
+        stored = {k: v for k, v in record.items() if k != "map"}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self.key(digest, name, seed) + (json.dumps(stored), self.clock))
+        if time.monotonic() - self.last_commit >= self.commit_interval:
+            self.commit()
+
+    """
+    Returns the number of cached records.
+    """
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    """
+    Evicts the least recently used records beyond max_entries.
+    Returns the number of records evicted.
+    """
+    def evict(self) -> int:
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY used LIMIT ?)", (excess,))
+        return excess
+
+    """
+    Evicts records beyond max_entries and writes pending changes to disk.
+    """
+    def commit(self) -> None:
+        self.evict()
+        self.conn.commit()
+        self.last_commit = time.monotonic()
+
+    """
+    Evicts records beyond max_entries, commits and closes the file.
+    """
+    def close(self) -> None:
+        if self.conn is None:
+            return
+        self.commit()
+        self.conn.close()
+        self.conn = None
+
+"""
+Solves every map in maps with every named strategy, as runner.iter_maps
+does, but takes the records found in cache instead of solving them again.
+Yields the cached records first, then the solved ones as they come, and
+caches every solved record. Pairs (str(map key), strategy) in skip are not run.
+Solved runs are recorded to trace files in trace_dir, if given.
+"""
+def iter_cached(maps, cache, names=None, workers=1, seed=0, skip=(), trace_dir=None) -> Iterator[Dict]:
+    if names is None:
+        names = list(STRATEGIES)
+    keys = list(maps)
+    digests = [map_digest(maps[k]) for k in keys]
+    index = {str(k): i for i, k in enumerate(keys)}
+
+    done = set(skip)
+    for i, k in enumerate(keys):
+        for name in names:
+            if (str(k), name) in done:
+                continue
+            record = cache.get(digests[i], name, task_seed(seed, digests[i], name))
+            if record is not None:
+                record["map"] = k
+                done.add((str(k), name))
+                yield record
+    cache.commit()
+
+    for record in iter_maps(maps, names, workers, seed, done, trace_dir):
+        i = index[str(record["map"])]
+        cache.put(digests[i], record["strategy"], task_seed(seed, digests[i], record["strategy"]), record)
+        yield record
+    cache.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or trim a result cache.")
+    parser.add_argument("path", help="result cache file")
+    parser.add_argument("--max-entries", type=int, help="evict the least recently used records beyond this many")
+    args = parser.parse_args()
+
+    with ResultCache(args.path, args.max_entries if args.max_entries is not None else 1000000) as cache:
+        evicted = cache.evict()
+        if evicted:
+            print("Evicted " + str(evicted) + " records")
+        versions = cache.conn.execute("SELECT version, COUNT(*) FROM results GROUP BY version").fetchall()
+        print(str(len(cache)) + " cached records; current solver version " + cache.version)
+        for version, n in versions:
+            print("\t" + version + ": " + str(n) + " records")
@@ -0,0 +1,116 @@
+import csv
+import json
+import os
+from typing import Dict, List
+
+"""
+Streams result records (one per map and strategy, as made by runner.py) to a
+JSONL or CSV file, one line per record, flushed as soon as it is written, so
+an interrupted run loses at most the record being written.
+The format is chosen by the file extension: .csv for CSV, JSONL otherwise.
+"""
+
+# Fields of a result record, in the order they are written to CSV.
+FIELDS = ["map", "strategy", "success", "expanded_cells", "moves_taken", "max_expanded"]
+
+"""
+Returns True if records at path are stored as CSV.
+"""
+def is_csv(path) -> bool:
+    return os.path.splitext(path)[1].lower() == ".csv"
+
+"""
+Converts a record read from CSV back to the types of a result record.
+Map keys stay strings; compare them with str(key).
+"""
+def parse_csv_record(row) -> Dict:
+    return {
+        "map": row["map"],
+        "strategy": row["strategy"],
+        "success": row["success"] == "True",
+        "expanded_cells": int(row["expanded_cells"]),
+        "moves_taken": int(row["moves_taken"]),
+        "max_expanded": int(row["max_expanded"]),
+    }
+
+"""
+Reads every complete record from a results file. A last line cut off by an
+interrupted run is ignored. Returns (records, length of the file up to the
+end of the last complete line).
+"""
+def read_records(path) -> tuple:
+    records = []
+    end = 0
+    with open(path, "rb") as handle:
+        data = handle.read()
+    lines = data.split(b"\n")
+    # The part after the last newline is incomplete (or empty).
+    for line in lines[:-1]:
+        end += len(line) + 1
+        if line.strip():
+            records.append(line.decode())
+
+    if is_csv(path):
+        records = [parse_csv_record(row) for row in csv.DictReader(records)]
+    else:
+        records = [json.loads(line) for line in records]
+
+    return records, end
+
+"""
+Returns every complete record in the results file at path.
+"""
+def load_results(path) -> List[Dict]:
+    return read_records(path)[0]
+
+"""
+Writes result records to a JSONL or CSV file as they come.
+With resume set, records already in the file are kept (and available as
+self.records), a cut-off last line is dropped, and new records are appended;
+otherwise the file is overwritten.
+"""
+class ResultsWriter:
+    def __init__(self, path, resume=False) -> None:
+        self.path = path
+        self.csv = is_csv(path)
+        self.records = []  # Records already in the file when it was resumed.
+        if resume and os.path.exists(path):
+            self.records, end = read_records(path)
+            self.handle = open(path, "r+", newline="")
+            self.handle.truncate(end)
+            self.handle.seek(end)
+            new_file = end == 0
+        else:
+            self.handle = open(path, "w", newline="")
+            new_file = True
+
+        if self.csv:
+            self.writer = csv.DictWriter(self.handle, FIELDS, lineterminator="\n")
+            if new_file:
+                self.writer.writeheader()
+                self.handle.flush()
+
+    """
+    Returns the set of (str(map), strategy) pairs already recorded.
+    """
+    def done(self) -> set:
+        return {(str(r["map"]), r["strategy"]) for r in self.records}
+
+    """
+    Appends one record and flushes it to disk.
+    """
+    def write(self, record) -> None:
+        if self.csv:
+            self.writer.writerow({field: record[field] for field in FIELDS})
+        else:
+            self.handle.write(json.dumps({field: record[field] for field in FIELDS}) + "\n")
+        self.handle.flush()
+
+    def close(self) -> None:
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,262 @@
+import os
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from gridworld import Gridworld
+from maze_store import MazeStore, map_digest
+from search_trace import TraceRecorder
+from strategies import STRATEGIES
+from wavefront import solve_maps
+
+"""
+Runs a set of strategies over a set of maps, fanning the (map, strategy)
+pairs out over a process pool.
+Maps are stacked into one array in shared memory, or, when they come from a
+maze store, memory-mapped from the store file; either way workers attach
+once instead of receiving a pickled copy of each map. Every pair is solved with
+its own tie-breaker seed, derived from the run seed, the map's content hash
+and the strategy, so results depend neither on the number of workers nor on
+where a map sits in its set.
+Given a trace directory, every worker records its runs to its own trace file
+there (see search_trace).
+Wavefront runs are solved WAVEFRONT_BATCH maps at a time with the batched
+wavefront replanner, in the calling process while the pool solves the other
+pairs, unless they are traced, which needs one run per map.
+"""
+
+# Maps solved together by one batched wavefront run.
+WAVEFRONT_BATCH = 256
+
+# Per-worker state, set up by attach_maps.
+worker_maps = None  # 3D array of maps (map index, row, col), or a MazeStore.
+worker_shm = None  # Shared memory block backing worker_maps.
+worker_gridworld = (None, None, None)  # (map index, Gridworld, map hash) of the last map solved by this worker.
+worker_trace = None  # TraceRecorder of this worker, or None when not tracing.
+
+"""
+Starts recording the worker's runs to its own file in trace_dir, if given.
+"""
+def open_trace(trace_dir) -> None:
+    global worker_trace
+    if trace_dir is not None:
+        worker_trace = TraceRecorder(os.path.join(trace_dir, "worker-" + str(os.getpid()) + ".trace"))
+
+"""
+Pool initializer: attaches the worker to the shared block of maps.
+"""
+def attach_maps(name, shape, trace_dir=None) -> None:
+    global worker_maps, worker_shm
+    worker_shm = SharedMemory(name=name)
+    worker_maps = np.ndarray(shape, dtype=np.uint8, buffer=worker_shm.buf)
+    open_trace(trace_dir)
+
+"""
+Pool initializer: memory-maps the maze store at path in the worker.
+"""
+def attach_store(path, trace_dir=None) -> None:
+    global worker_maps
+    worker_maps = MazeStore(path)
+    open_trace(trace_dir)
+
+"""
+Returns a Gridworld for map i and the map's content hash, reusing the last
+ones if it is the same map.
+Strategies reset the map themselves, so one lazily-reset instance serves them all.
+"""
+def gridworld_for(i) -> tuple:
+    global worker_gridworld
+    if worker_gridworld[0] != i:
+        m = worker_maps[i]
+        g = Gridworld(map_size=len(m) - 2, pregenerated_map=m.tolist(), lazy_reset=True)
+        worker_gridworld = (i, g, map_digest(m))
+    worker_gridworld[1].trace = worker_trace
+
+    return worker_gridworld[1], worker_gridworld[2]
+
+"""
+Returns the tie-breaker seed for solving the map with content hash digest
+(maze_store.map_digest) with the named strategy in a run seeded with seed.
+"""
+def task_seed(seed, digest, name) -> str:
+    return str(seed) + ":" + digest + ":" + name
+
+"""
+Runs the named strategy on g, whose map has content hash digest, with its
+task seed and returns its result record, reporting the map as i.
+If g.trace is set, the run is recorded there, labelled with the run seed, i and the strategy.
+"""
+def run_strategy(g, i, name, seed, digest) -> Dict:
+    g.random.seed(task_seed(seed, digest, name))
+    if g.trace is not None:
+        g.trace.start_run(g, str(seed) + ":" + str(i) + ":" + name)
+    success = STRATEGIES[name][1](g)
+    if g.trace is not None:
+        g.trace.end_run(g, success)
+    return {
+        "map": i,
+        "strategy": name,
+        "success": success,
+        "expanded_cells": g.expanded_cells,
+        "moves_taken": g.moves_taken,
+        "max_expanded": g.max_expanded,
+    }
+
+"""
+Solves one (map index, strategy, seed) task and returns its result record.
+"""
+def solve(task) -> Dict:
+    i, name, seed = task
+    g, digest = gridworld_for(i)
+    return run_strategy(g, i, name, seed, digest)
+
+"""
+Solves map indices of maps with the batched wavefront replanner, up to
+WAVEFRONT_BATCH maps of the same size at a time, and yields their result
+records in order, reporting each map by its index in keys.
+"""
+def iter_wavefront(maps, keys, indices) -> Iterator[Dict]:
+    batch = {}
+    for i in indices:
+        m = maps[keys[i]]
+        if batch and (len(batch) == WAVEFRONT_BATCH or np.shape(m) != np.shape(next(iter(batch.values())))):
+            yield from solve_maps(batch, WAVEFRONT_BATCH)
+            batch = {}
+        batch[i] = m
+    if batch:
+        yield from solve_maps(batch, WAVEFRONT_BATCH)
+
+"""
+Solves every map in maps (a dict of 2D arrays, all the same size, or a
+MazeStore) with every named strategy, using the given number of worker processes.
+Yields one result record per (map, strategy) as soon as it is solved, ordered
+by map and then by strategy. Pairs (str(map key), strategy) in skip are not run.
+Runs are recorded to trace files in trace_dir, if given.
+"""
+def iter_maps(maps, names=None, workers=1, seed=0, skip=(), trace_dir=None) -> Iterator[Dict]:
+    global worker_maps, worker_trace
+    if names is None:
+        names = list(STRATEGIES)
+    keys = list(maps)
+    tasks = [(i, name, seed) for i in range(len(keys)) for name in names if (str(keys[i]), name) not in skip]
+    if not tasks:
+        return
+    batched = "wavefront" if trace_dir is None else None
+    pooled = [task for task in tasks if task[1] != batched]
+    # About one chunk per map, so a worker solves the strategies of a map in a
+    # row; skipped pairs leave fewer tasks than strategies for some maps.
+    chunksize = -(-len(pooled) // max(len({i for i, _, _ in pooled}), 1))
+    if trace_dir is not None:
+        os.makedirs(trace_dir, exist_ok=True)
+        if workers <= 1:
+            open_trace(trace_dir)
+
+    if isinstance(maps, MazeStore):
+        if workers <= 1:
+            worker_maps = maps
+            results = map(solve, pooled)
+        else:
+            pool = Pool(workers, initializer=attach_store, initargs=(maps.path, trace_dir))
+            results = pool.imap(solve, pooled, chunksize=chunksize)
+        shm = None
+    else:
+        stack = np.stack([np.asarray(maps[k], dtype=np.uint8) for k in keys])
+        if workers <= 1:
+            worker_maps = stack
+            results = map(solve, pooled)
+            shm = None
+        else:
+            shm = SharedMemory(create=True, size=stack.nbytes)
+            np.ndarray(stack.shape, dtype=np.uint8, buffer=shm.buf)[:] = stack
+            pool = Pool(workers, initializer=attach_maps, initargs=(shm.name, stack.shape, trace_dir))
+            results = pool.imap(solve, pooled, chunksize=chunksize)
+
+    waves = iter_wavefront(maps, keys, [i for i, name, _ in tasks if name == batched])
+    try:
+        for _, name, _ in tasks:
+            result = next(waves) if name == batched else next(results)
+            # Report maps by their original keys.
+            result["map"] = keys[result["map"]]
+            yield result
+    finally:
+        if workers > 1:
+            pool.terminate()
+            pool.join()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        if workers <= 1 and worker_trace is not None:
+            worker_trace.close()
+            worker_trace = None
+
+"""
+Solves every map in maps with every named strategy, as iter_maps does.
+Returns one result record per (map, strategy), ordered by map and then by strategy.
+"""
+def run_maps(maps, names=None, workers=1, seed=0) -> List[Dict]:
+    return list(iter_maps(maps, names, workers, seed))
+
+"""
+Summary statistics per strategy, updated one result record at a time:
+runs, successes and averages over successful runs.
+"""
+class RunningSummary:
+    def __init__(self, names=None) -> None:
+        if names is None:
+            names = list(STRATEGIES)
+        # Per strategy: [runs, successes, expanded cells, max expanded, moves taken] (sums over successes).
+        self.totals = {name: [0, 0, 0, 0, 0] for name in names}
+
+    """
+    Adds one result record. Records of strategies not summarized are ignored.
+    """
+    def add(self, result) -> None:
+        totals = self.totals.get(result["strategy"])
+        if totals is None:
+            return
+        totals[0] += 1
+        if result["success"]:
+            totals[1] += 1
+            totals[2] += result["expanded_cells"]
+            totals[3] += result["max_expanded"]
+            totals[4] += result["moves_taken"]
+
+    """
+    Returns the summary in the format of summarize.
+    """
+    def summary(self) -> Dict:
+        summary = {}
+        for name, (runs, n, expanded, max_expanded, moves) in self.totals.items():
+            summary[name] = {
+                "runs": runs,
+                "successes": n,
+                "average_expanded_cells": expanded / n if n else 0.0,
+                "average_max_expanded": max_expanded / n if n else 0.0,
+                "average_moves_taken": moves / n if n else 0.0,
+            }
+
+        return summary
+
+"""
+Aggregates result records into summary statistics per strategy:
+successes and averages over successful runs.
+"""
+def summarize(results, names=None) -> Dict:
+    running = RunningSummary(names)
+    for result in results:
+        running.add(result)
+
+    return running.summary()
+
+"""
+Prints summary statistics in the format used by main.py.
+"""
+def print_summary(summary) -> None:
+    for name, stats in summary.items():
+        print("\n" + STRATEGIES[name][0] + ":")
+        print("\tSuccesses: " + str(stats["successes"]) + "/" + str(stats["runs"]))
+        print("\tAverage expanded cells: " + str(stats["average_expanded_cells"]))
+        print("\tAverage maximum expanded cells per A*: " + str(stats["average_max_expanded"]))
+        print("\tAverage moves taken: " + str(stats["average_moves_taken"]))
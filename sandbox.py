@@ -1,13 +1,10 @@
 """
 This file is for testing purposes.
 """
-import pickle
-
 from gridworld import Gridworld
+from maze_store import load_maps
 
-maps = {}
-with open('gridworld_maps_smaller.pickle', 'rb') as handle:
-    maps = pickle.load(handle)
+maps = load_maps('gridworld_maps_smaller.maze')
 
 map_size = len(maps[0])
 #print("Loaded " + str(len(maps)) + " gridworlds of size " + str(map_size - 2))
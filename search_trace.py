@@ -0,0 +1,334 @@
+import argparse
+import struct
+from typing import Dict, List
+
+import numpy as np
+
+from render import render_frame
+
+"""
+Compact binary traces of solving runs, and their replay.
+
+Assign a TraceRecorder to Gridworld.trace to record every replan of its
+runs: the cells popped from the open lists (the expansions), the cells the
+agent moved through and the blocks it uncovered, with the replan counters
+and timings. Strategies that expand cells outside of their replans (the
+cluster graph HPA builds before its first search) record those as a build.
+The open lists only append each popped state to a list, which is turned
+into cell ids once per replan, and records are buffered and written once per
+run, so tracing can stay on in batch runs (runner.iter_maps and main.py take
+a trace directory). Leave Gridworld.trace as None to switch
+tracing off.
+
+read_trace reads a trace back; replay rebuilds a run's statistics from its
+replans and builds, matching its END record for every strategy, and
+map_state its map (true map, discovered blocks, agent) after any replan,
+without solving again.
+
+File layout (all integers little-endian):
+    header  magic b"GWTR", version (u16), reserved (u16)
+    records a type (u8) followed by:
+      MAP     map size n (u32), then the true map bit-packed row by row (n * n bits, padded to a byte)
+      RUN     label length (u16), then the label (UTF-8)
+      REPLAN  s_start, s_goal (cell ids), expanded cells, path length (NO_PATH if none),
+              moves, max expanded of the run so far, number of popped cells, of moved
+              cells and of new blocks (u32 each),
+              search, build path and follow path time (f32 seconds),
+              then the popped, moved and new block cell ids (u32 each)
+      BUILD   expanded cells (u32), build time (f32 seconds)
+      END     success (u8), expanded cells, moves taken, max expanded, agent (u32 each)
+Cells are identified by row * n + col. A run uses the last MAP before it.
+A record cut off at the end of the file (a process killed while writing) is ignored.
+The recorder finds the new blocks of a replan itself, as the blocks next to
+the agent's cell and the cells it moved through that were not uncovered yet
+in the run, so they are recorded the same way for every engine.
+"""
+
+MAGIC = b"GWTR"
+VERSION = 2
+HEADER = struct.Struct("<4sHH")
+# Record types.
+MAP, RUN, REPLAN, END, BUILD = 1, 2, 3, 4, 5
+MAP_RECORD = struct.Struct("<BI")
+RUN_RECORD = struct.Struct("<BH")
+REPLAN_RECORD = struct.Struct("<BIIIIIIIIIfff")
+END_RECORD = struct.Struct("<BBIIII")
+BUILD_RECORD = struct.Struct("<BIf")
+# Path length of a replan that found no path.
+NO_PATH = 0xFFFFFFFF
+
+# Tracing subclass of each open list type, created on first use.
+tracing_types = {}
+
+"""
+Returns a subclass of open_list_type that appends the state of every entry
+popped to the list in its popped attribute. Only pop is overridden, so the
+other operations cost the same as in open_list_type.
+"""
+def tracing_type(open_list_type) -> type:
+    traced = tracing_types.get(open_list_type)
+    if traced is None:
+        class TracingOpenList(open_list_type):
+            def pop(self):
+                entry = open_list_type.pop(self)
+                self.popped.append(entry[2])
+                return entry
+
+        traced = tracing_types[open_list_type] = TracingOpenList
+    return traced
+
+"""
+Records runs of gridworlds to a trace file, appending to it if it exists.
+Call start_run before each run and end_run after it; a run's records are
+written and flushed by end_run.
+"""
+class TraceRecorder:
+    def __init__(self, path) -> None:
+        self.path = path
+        self.handle = open(path, "ab")
+        if self.handle.tell() == 0:
+            self.handle.write(HEADER.pack(MAGIC, VERSION, 0))
+        self.buffer = bytearray()  # Records of the current run, not written yet.
+        self.popped = []  # States popped since the last replan, as (row, col) or cell ids.
+        self.map = None  # True map of the last MAP record.
+        self.map_size = 0
+        self.blocked = b""  # Cells of the true map (1 for blocks), by cell id.
+        self.uncovered = set()  # Blocks uncovered so far in the current run.
+
+    """
+    Returns the cell id of s, a (row, col) tuple or already a cell id.
+    """
+    def cell(self, s) -> int:
+        return s[0] * self.map_size + s[1] if type(s) is tuple else s
+
+    """
+    Returns the cell ids of a list of states, as a little-endian uint32 array.
+    """
+    def cells(self, states) -> np.ndarray:
+        if states and type(states[0]) is tuple:
+            rows_cols = np.array(states, dtype="<u4")
+            return rows_cols[:, 0] * self.map_size + rows_cols[:, 1]
+        return np.array(states, dtype="<u4")
+
+    """
+    Returns an empty open list of type open_list_type that records the states popped from it.
+    """
+    def open_list(self, open_list_type):
+        open_list = tracing_type(open_list_type)()
+        open_list.popped = self.popped
+        return open_list
+
+    """
+    Starts recording a run of g, named by label. Records g's true map first
+    if it is not the map of the previous run.
+    """
+    def start_run(self, g, label="") -> None:
+        if g.true_map is not self.map:
+            self.map = g.true_map
+            self.map_size = g.map_size
+            cells = self.map.unpack() if hasattr(self.map, "unpack") else np.asarray(self.map, dtype=np.uint8)
+            self.blocked = cells.reshape(-1).astype(np.uint8).tobytes()
+            bits = np.packbits(cells.reshape(-1), bitorder="little")
+            self.buffer += MAP_RECORD.pack(MAP, g.map_size) + bits.tobytes()
+        name = label.encode()
+        self.buffer += RUN_RECORD.pack(RUN, len(name)) + name
+        del self.popped[:]
+        self.uncovered = set()
+
+    """
+    Records one replan of g, as reported by Gridworld.end_replan.
+    """
+    def replan(self, g, s_start, s_goal, path, expanded, moves, search_time, build_path_time, follow_path_time) -> None:
+        moved = self.cells(path[1 : 1 + moves] if path is not None else [])
+        # Blocks uncovered from the agent's cell and the cells moved through, north, south, east and west.
+        # Reverse searches start from the target, so the agent's cell is the start of the path.
+        n = self.map_size
+        blocked = self.blocked
+        uncovered = self.uncovered
+        blocks = []
+        for u in [self.cell(path[0] if path is not None else g.agent)] + moved.tolist():
+            for v in (u - n, u + n, u + 1, u - 1):
+                if blocked[v] and v not in uncovered:
+                    uncovered.add(v)
+                    blocks.append(v)
+        self.buffer += REPLAN_RECORD.pack(
+            REPLAN, self.cell(s_start), self.cell(s_goal), expanded,
+            NO_PATH if path is None else len(path) - 1, moves, g.max_expanded,
+            len(self.popped), len(moved), len(blocks), search_time, build_path_time, follow_path_time)
+        self.buffer += self.cells(self.popped).tobytes() + moved.tobytes() + self.cells(blocks).tobytes()
+        del self.popped[:]
+
+    """
+    Records cells expanded by g outside of any replan, to build what its
+    strategy searches on, and the time the build took.
+    """
+    def build(self, g, expanded, build_time) -> None:
+        self.buffer += BUILD_RECORD.pack(BUILD, expanded, build_time)
+
+    """
+    Records the outcome of the run of g and writes the run to the file.
+    """
+    def end_run(self, g, success) -> None:
+        self.buffer += END_RECORD.pack(END, bool(success), g.expanded_cells, g.moves_taken, g.max_expanded, self.cell(g.agent))
+        self.handle.write(self.buffer)
+        self.handle.flush()
+        self.buffer = bytearray()
+
+    """
+    Writes any pending records and closes the file.
+    """
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.write(self.buffer)
+            self.handle.close()
+            self.handle = None
+
+"""
+Reads a trace file. Returns its runs in order, each a dict with the run's
+label, map (2D uint8 array), replans (one dict per replan, with cell ids
+as (row, col) and the popped, moved and blocks cells as arrays of cell ids),
+builds (one dict per build) and end (the END record as a dict, or None for a
+run cut off).
+"""
+def read_trace(path) -> List[Dict]:
+    with open(path, "rb") as handle:
+        data = handle.read()
+    magic, version, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a trace file: " + str(path))
+
+    runs = []
+    pos = HEADER.size
+    m = None
+    n = 0
+    sizes = {MAP: MAP_RECORD.size, RUN: RUN_RECORD.size, REPLAN: REPLAN_RECORD.size, END: END_RECORD.size,
+             BUILD: BUILD_RECORD.size}
+    while pos < len(data):
+        kind = data[pos]
+        if kind not in sizes:
+            raise ValueError("corrupt trace record at byte " + str(pos) + " of " + str(path))
+        if pos + sizes[kind] > len(data):
+            # A record cut off at the end of the file.
+            break
+        if kind == MAP:
+            _, n = MAP_RECORD.unpack_from(data, pos)
+            size = (n * n + 7) // 8
+            if pos + MAP_RECORD.size + size > len(data):
+                break
+            bits = np.frombuffer(data, dtype=np.uint8, count=size, offset=pos + MAP_RECORD.size)
+            m = np.unpackbits(bits, count=n * n, bitorder="little").reshape(n, n)
+            pos += MAP_RECORD.size + size
+        elif kind == RUN:
+            _, length = RUN_RECORD.unpack_from(data, pos)
+            if pos + RUN_RECORD.size + length > len(data):
+                break
+            pos += RUN_RECORD.size
+            runs.append({"label": data[pos : pos + length].decode(), "map": m, "replans": [], "builds": [], "end": None})
+            pos += length
+        elif kind == REPLAN:
+            (_, s_start, s_goal, expanded, path_length, moves, max_expanded, n_popped, n_moved, n_blocks,
+             search_time, build_path_time, follow_path_time) = REPLAN_RECORD.unpack_from(data, pos)
+            count = n_popped + n_moved + n_blocks
+            if pos + REPLAN_RECORD.size + 4 * count > len(data):
+                break
+            cells = np.frombuffer(data, dtype="<u4", count=count, offset=pos + REPLAN_RECORD.size)
+            pos += REPLAN_RECORD.size + 4 * count
+            runs[-1]["replans"].append({
+                "s_start": divmod(s_start, n),
+                "s_goal": divmod(s_goal, n),
+                "expanded": expanded,
+                "path_length": None if path_length == NO_PATH else path_length,
+                "moves": moves,
+                "max_expanded": max_expanded,
+                "popped": cells[: n_popped],
+                "moved": cells[n_popped : n_popped + n_moved],
+                "blocks": cells[n_popped + n_moved :],
+                "search_time": search_time,
+                "build_path_time": build_path_time,
+                "follow_path_time": follow_path_time,
+            })
+        elif kind == BUILD:
+            _, expanded, build_time = BUILD_RECORD.unpack_from(data, pos)
+            pos += BUILD_RECORD.size
+            runs[-1]["builds"].append({"expanded": expanded, "build_time": build_time})
+        else:
+            _, success, expanded, moves, max_expanded, agent = END_RECORD.unpack_from(data, pos)
+            pos += END_RECORD.size
+            runs[-1]["end"] = {"success": bool(success), "expanded_cells": expanded, "moves_taken": moves,
+                               "max_expanded": max_expanded, "agent": divmod(agent, n)}
+
+    return runs
+
+"""
+Rebuilds the statistics of a run read by read_trace from its replans and
+builds: replans, expanded cells (by both), moves taken, max expanded (as of
+the last replan), cells popped, blocks discovered, search time and whether
+the target was reached (taken from the END record, when the run has one).
+"""
+def replay(run) -> Dict:
+    replans = run["replans"]
+    n = len(run["map"])
+    target = (n - 2, n - 2)
+    agent = map_state(run).agent
+    return {
+        "label": run["label"],
+        "replans": len(replans),
+        "expanded_cells": sum(r["expanded"] for r in replans) + sum(b["expanded"] for b in run["builds"]),
+        "moves_taken": sum(r["moves"] for r in replans),
+        "max_expanded": replans[-1]["max_expanded"] if replans else 0,
+        "popped_cells": sum(len(r["popped"]) for r in replans),
+        "blocks_discovered": sum(len(r["blocks"]) for r in replans),
+        "search_time": sum(r["search_time"] for r in replans),
+        "success": run["end"]["success"] if run["end"] is not None else agent == target,
+    }
+
+"""
+State of a map rebuilt from a trace, with the attributes render_frame uses.
+"""
+class ReplayedMap:
+    def __init__(self, true_map) -> None:
+        n = len(true_map)
+        self.map_size = n
+        self.true_map = true_map
+        self.discovered_map = np.zeros((n, n), dtype=np.uint8)  # 1 for discovered blocks.
+        self.stamp = 1
+        self.agent = (1, 1)
+        self.target = (n - 2, n - 2)
+
+"""
+Returns the map of a run read by read_trace after its first `replans`
+replans (all of them if None), with the blocks discovered and the agent
+position at that point.
+"""
+def map_state(run, replans=None) -> ReplayedMap:
+    state = ReplayedMap(run["map"])
+    n = state.map_size
+    for r in run["replans"][: replans]:
+        blocks = r["blocks"]
+        state.discovered_map.reshape(-1)[blocks] = 1
+        if len(r["moved"]):
+            state.agent = divmod(int(r["moved"][-1]), n)
+
+    return state
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay trace files of gridworld runs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="print the statistics of every run in a trace")
+    summary.add_argument("path")
+    show = commands.add_parser("show", help="print the map of one run after some replans")
+    show.add_argument("path")
+    show.add_argument("--run", type=int, default=0, help="index of the run in the trace")
+    show.add_argument("--replans", type=int, help="number of replans to replay (default: all)")
+    args = parser.parse_args()
+
+    runs = read_trace(args.path)
+    if args.command == "summary":
+        for i, run in enumerate(runs):
+            stats = replay(run)
+            print(str(i) + " " + stats["label"] + ": " + ("reached" if stats["success"] else "failed")
+                  + ", " + str(stats["replans"]) + " replans, " + str(stats["expanded_cells"]) + " expanded cells, "
+                  + str(stats["moves_taken"]) + " moves, max expanded " + str(stats["max_expanded"])
+                  + ", " + str(stats["blocks_discovered"]) + " blocks discovered")
+    else:
+        print(render_frame(map_state(runs[args.run], args.replans)), end="")
@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Pool
+from typing import Dict, List
+
+import numpy as np
+
+from gridworld import Gridworld
+from maze_store import load_maps, map_digest
+from runner import run_strategy
+from strategies import STRATEGIES
+
+"""
+Long-running local solver service, so tools that embed Gridworld do not have
+to load maps and create a Gridworld for every query.
+
+POST /solve takes a JSON query:
+    {"maze": [[0, 1, ...], ...]}  a map with its borders, as in a maze store,
+    or {"hash": "..."}            a map sent before, by the hash it was given,
+    or {"maze_id": 3}             a map of the store the service was started with,
+    plus "strategy" (default "forward_large_g") and "seed" (default 0).
+It answers with the result record of runner.run_strategy, plus the map's
+"hash" and the "path" of cells the agent moved through. Every strategy moves
+the agent with Gridworld.advance, which records the path; "path" is null only
+for a strategy that would move it some other way.
+{"queries": [...]} solves several queries at once and answers {"results": [...]}.
+GET /strategies lists the strategies and GET /stats the cache counters.
+
+Parsed maps are kept in an LRU cache keyed by their content hash, and each
+worker process keeps its own LRU cache of lazily-reset Gridworlds, so a
+map that is queried again is neither parsed nor set up again. Requests are
+served by one thread each and solved on a shared worker pool; a map is
+pickled to the workers only until they have it, and goes by its hash after.
+"""
+
+"""
+Gridworld that records every cell its agent moves to.
+"""
+class TracedGridworld(Gridworld):
+    def __init__(self, *args, **kwargs) -> None:
+        self.trajectory = []  # Cells the agent has been on since the last reset, in order.
+        super().__init__(*args, **kwargs)
+
+    """
+    Resets the map as Gridworld.reset_map does and restarts the trajectory.
+    """
+    def reset_map(self) -> None:
+        super().reset_map()
+        self.trajectory = [self.agent]
+
+    """
+    Attempts to move the agent as Gridworld.advance does, recording the move.
+    Returns False if unsuccessful, True otherwise.
+    """
+    def advance(self, next) -> bool:
+        if not super().advance(next):
+            return False
+        self.trajectory.append(next)
+        return True
+
+"""
+Least-recently-used cache with a fixed number of entries. Safe to share between threads.
+"""
+class LRUCache:
+    def __init__(self, capacity=64) -> None:
+        self.capacity = capacity
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    """
+    Returns the value cached for key, or None, and marks it as recently used.
+    """
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.items.move_to_end(key)
+            return value
+
+    """
+    Caches value for key, evicting the least recently used entry if full.
+    """
+    def put(self, key, value) -> None:
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+
+    """
+    Returns the hit, miss and size counters.
+    """
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.items), "capacity": self.capacity}
+
+"""
+Returns a map sent in a query as a 2D uint8 array, checking its shape and values.
+Raises ValueError unless it is square, every cell is 0 or 1, and the start
+and target cells are free: some strategies search from the target and would
+never finish on a map where it is blocked.
+"""
+def parse_maze(maze) -> np.ndarray:
+    try:
+        m = np.asarray(maze)
+    except (TypeError, ValueError):
+        raise ValueError("maze must be a list of rows of 0s and 1s")
+    if m.ndim != 2 or m.shape[0] != m.shape[1] or m.shape[0] < 3:
+        raise ValueError("maze must be square, with at least 3 rows including borders")
+    # Checked before converting, so out-of-range values cannot wrap around or overflow.
+    if m.dtype.kind not in "biu" or ((m != 0) & (m != 1)).any():
+        raise ValueError("maze cells must be 0 (free) or 1 (blocked)")
+    m = m.astype(np.uint8)
+    n = len(m)
+    if m[1, 1] or m[n - 2, n - 2]:
+        raise ValueError("the start (1, 1) and target (" + str(n - 2) + ", " + str(n - 2) + ") cells must be free")
+
+    return m
+
+# Per-worker state, set up by init_worker.
+worker_gridworlds = LRUCache()  # Map hash -> TracedGridworld.
+
+"""
+Pool initializer: sizes the worker's cache of Gridworlds.
+"""
+def init_worker(cache_size) -> None:
+    global worker_gridworlds
+    worker_gridworlds = LRUCache(cache_size)
+
+"""
+Solves one (map hash, map, map label, strategy, seed) task with a cached
+Gridworld for the map, and returns its result record with the hash and path.
+The map may be None when the worker is expected to have it cached already;
+then None is returned if it does not, and the task must be sent again with the map.
+"""
+def solve_task(task) -> Dict:
+    digest, m, label, name, seed = task
+    g = worker_gridworlds.get(digest)
+    if g is None:
+        if m is None:
+            return None
+        g = TracedGridworld(map_size=len(m) - 2, pregenerated_map=m.tolist(), lazy_reset=True)
+        worker_gridworlds.put(digest, g)
+
+    result = run_strategy(g, label, name, seed, digest)
+    result["hash"] = digest
+    # Strategies that move the agent without advance leave the trajectory behind.
+    traced = len(g.trajectory) == g.moves_taken + 1 and g.trajectory[-1] == g.agent
+    result["path"] = [list(s) for s in g.trajectory] if traced else None
+    return result
+
+"""
+Resolves and solves queries, keeping parsed maps in an LRU cache and
+fanning the solves out over a pool of worker processes.
+With workers <= 1, queries are solved in this process, one at a time.
+"""
+class SolverService:
+    def __init__(self, maps=None, workers=1, cache_size=64) -> None:
+        self.maps = maps  # Dict of maps or MazeStore that maze_id refers to, if any.
+        self.maze_cache = LRUCache(cache_size)  # Map hash -> parsed map.
+        self.store_digests = {}  # maze_id -> map hash.
+        self.shipped = LRUCache(cache_size * max(workers, 1))  # Map hashes already sent to the workers.
+        self.lock = threading.Lock()  # Serializes solves when there is no pool.
+        self.pool = None
+        if workers > 1:
+            self.pool = Pool(workers, initializer=init_worker, initargs=(cache_size,))
+        else:
+            init_worker(cache_size)
+
+    """
+    Returns the (map hash, map, map label) a query refers to.
+    Raises ValueError if the query names no map, or one that is not known.
+    """
+    def resolve(self, query) -> tuple:
+        if "maze" in query:
+            m = parse_maze(query["maze"])
+            digest = map_digest(m)
+            self.maze_cache.put(digest, m)
+            return digest, m, digest
+        if "hash" in query:
+            m = self.maze_cache.get(query["hash"])
+            if m is None:
+                raise ValueError("unknown maze hash, send the maze again: " + str(query["hash"]))
+            return query["hash"], m, query["hash"]
+        if "maze_id" in query:
+            k = query["maze_id"]
+            if self.maps is None or not isinstance(k, (int, str)) or k not in self.maps:
+                raise ValueError("unknown maze_id: " + str(k))
+            m = np.asarray(self.maps[k], dtype=np.uint8)
+            if k not in self.store_digests:
+                self.store_digests[k] = map_digest(m)
+            return self.store_digests[k], m, k
+        raise ValueError("query must have one of maze, hash or maze_id")
+
+    """
+    Solves a list of queries and returns their result records, in order.
+    Raises ValueError for an invalid query; then nothing is solved.
+    """
+    def solve(self, queries) -> List[Dict]:
+        tasks = []
+        for query in queries:
+            if not isinstance(query, dict):
+                raise ValueError("each query must be a JSON object")
+            name = query.get("strategy", "forward_large_g")
+            if name not in STRATEGIES:
+                raise ValueError("unknown strategy: " + str(name))
+            seed = query.get("seed", 0)
+            digest, m, label = self.resolve(query)
+            tasks.append((digest, m, label, name, seed))
+
+        if self.pool is None:
+            with self.lock:
+                return [solve_task(task) for task in tasks]
+        # Workers keep the maps they were sent, so a map sent before goes by its
+        # hash alone; tasks that reach a worker without it are sent again with the map.
+        sent = []
+        for digest, m, label, name, seed in tasks:
+            known = self.shipped.get(digest) is not None
+            self.shipped.put(digest, True)
+            sent.append((digest, None if known else m, label, name, seed))
+        results = self.pool.map(solve_task, sent)
+        missed = [i for i, result in enumerate(results) if result is None]
+        if missed:
+            for i, result in zip(missed, self.pool.map(solve_task, [tasks[i] for i in missed])):
+                results[i] = result
+        return results
+
+    """
+    Returns the counters of the map cache (the worker caches live in the workers).
+    """
+    def stats(self) -> Dict:
+        return {"maze_cache": self.maze_cache.stats()}
+
+    """
+    Stops the worker pool.
+    """
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+
+"""
+HTTP front end of a SolverService, reached as self.server.service.
+"""
+class SolverHandler(BaseHTTPRequestHandler):
+    """
+    Sends obj as a JSON response with the given status code.
+    """
+    def send_json(self, code, obj) -> None:
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/strategies":
+            self.send_json(200, {name: label for name, (label, _) in STRATEGIES.items()})
+        elif self.path == "/stats":
+            self.send_json(200, self.server.service.stats())
+        else:
+            self.send_json(404, {"error": "not found: " + self.path})
+
+    def do_POST(self) -> None:
+        if self.path != "/solve":
+            self.send_json(404, {"error": "not found: " + self.path})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            batch = isinstance(body, dict) and "queries" in body
+            queries = body["queries"] if batch else [body]
+            if not isinstance(queries, list):
+                raise ValueError("queries must be a list")
+            results = self.server.service.solve(queries)
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError too.
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            # Answer anyway, rather than leave the client without a response.
+            self.send_json(500, {"error": type(e).__name__ + ": " + str(e)})
+            return
+
+        self.send_json(200, {"results": results} if batch else results[0])
+
+"""
+Returns an HTTP server for service, listening on host and port.
+"""
+def make_server(service, host="127.0.0.1", port=8765) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), SolverHandler)
+    server.service = service
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve gridworld solves over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--maps", help="maze store or pickle file that maze_id refers to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--cache-size", type=int, default=64, help="maps kept in each LRU cache")
+    args = parser.parse_args()
+
+    maps = load_maps(args.maps) if args.maps else None
+    service = SolverService(maps, args.workers, args.cache_size)
+    server = make_server(service, args.host, args.port)
+    print("Serving on http://" + args.host + ":" + str(server.server_address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
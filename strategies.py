@@ -0,0 +1,35 @@
+from hpa import hpa_repeated_compute_path
+from wavefront import wavefront_repeated_compute_path
+
+"""
+Strategies for solving a gridworld, by name.
+Each entry holds a label for printing and a function that runs one full
+solve on a Gridworld and returns True if the target was reached.
+The order of this dict is the order strategies are run and reported in.
+"""
+STRATEGIES = {
+    "forward_large_g": ("Forward A*, ties favor large g values",
+                        lambda g: g.repeated_compute_path(reverse=False, large_g_ties=True)),
+    "forward_small_g": ("Forward A*, ties favor small g values",
+                        lambda g: g.repeated_compute_path(reverse=False, large_g_ties=False)),
+    "backward_large_g": ("Backward A*, ties favor large g values",
+                         lambda g: g.repeated_compute_path(reverse=True, large_g_ties=True)),
+    "backward_small_g": ("Backward A*, ties favor small g values",
+                         lambda g: g.repeated_compute_path(reverse=True, large_g_ties=False)),
+    "jps": ("Forward Jump Point Search, ties favor large g values",
+            lambda g: g.repeated_compute_path(reverse=False, large_g_ties=True, planner="jps")),
+    "bidirectional": ("Bidirectional A*, ties favor large g values",
+                      lambda g: g.repeated_compute_path(reverse=False, large_g_ties=True, planner="bidirectional")),
+    "ara": ("ARA* (epsilon 2 down to 1), ties favor large g values",
+            lambda g: g.ara_repeated_compute_path(epsilon=2.0, time_budget=None, epsilon_step=0.5)),
+    "adaptive": ("Adaptive A*, ties favor large g values",
+                 lambda g: g.adaptive_repeated_compute_path()),
+    "tree_adaptive": ("Tree-Adaptive A*, ties favor large g values",
+                      lambda g: g.tree_adaptive_repeated_compute_path()),
+    "d_star_lite": ("D* Lite",
+                    lambda g: g.d_star_lite_repeated_compute_path()),
+    "hpa": ("HPA* (hierarchical A* over clusters of the discovered map)",
+            hpa_repeated_compute_path),
+    "wavefront": ("Wavefront (vectorized BFS from the target)",
+                  wavefront_repeated_compute_path),
+}
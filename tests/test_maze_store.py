@@ -0,0 +1,83 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from maze_store import MazeStore, MazeStoreWriter, convert_pickle, load_maps, map_digest
+from tiled_gridworld import packed_store_map
+
+"""
+Returns maps of several shapes, including ones whose cells do not fill a whole byte.
+"""
+def sample_maps() -> list:
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 2, size=shape, dtype=np.uint8) for shape in ((7, 7), (9, 9), (3, 5), (33, 33))]
+
+"""
+Maps written to a maze store read back unchanged, one at a time, in order.
+"""
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "maps.maze")
+    maps = sample_maps()
+    with MazeStoreWriter(path) as writer:
+        assert [writer.append(m) for m in maps] == [0, 1, 2, 3]
+
+    store = MazeStore(path)
+    assert len(store) == len(maps) and list(store.keys()) == [0, 1, 2, 3]
+    for k, m in store.items():
+        assert m.dtype == np.uint8
+        assert np.array_equal(m, maps[k])
+    assert 4 not in store and -1 not in store
+    with pytest.raises(KeyError):
+        store[4]
+    store.close()
+
+"""
+A packed store map reads the same cells as the unpacked one.
+"""
+def test_packed_store_map_matches_cells(tmp_path):
+    path = str(tmp_path / "maps.maze")
+    m = sample_maps()[1]
+    with MazeStoreWriter(path) as writer:
+        writer.append(m)
+
+    grid = packed_store_map(MazeStore(path), 0)
+    assert [grid[i] for i in range(m.size)] == m.reshape(-1).tolist()
+
+"""
+A pickle of maps converts to a store holding the same maps, and load_maps reads both.
+"""
+def test_convert_pickle_and_load_maps(tmp_path):
+    maps = {k: m.tolist() for k, m in enumerate(sample_maps())}
+    pickle_path = tmp_path / "maps.pickle"
+    pickle_path.write_bytes(pickle.dumps(maps))
+    store_path = str(tmp_path / "maps.maze")
+    assert convert_pickle(str(pickle_path), store_path) == len(maps)
+
+    store = load_maps(store_path)
+    assert isinstance(store, MazeStore)
+    assert load_maps(str(pickle_path)) == maps
+    for k in maps:
+        assert np.array_equal(store[k], maps[k])
+
+"""
+Files that are not maze stores are rejected.
+"""
+def test_not_a_store(tmp_path):
+    path = tmp_path / "maps.maze"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        MazeStore(str(path))
+
+"""
+The content hash depends on the cells and shape only, not on how the map is held.
+"""
+def test_map_digest():
+    m = sample_maps()[0]
+    digest = map_digest(m)
+    assert map_digest(m.tolist()) == digest
+    assert map_digest(m.astype(np.int64)) == digest
+    flipped = m.copy()
+    flipped[3, 3] ^= 1
+    assert map_digest(flipped) != digest
+    assert map_digest(m.reshape(1, -1)) != digest
@@ -0,0 +1,88 @@
+import random
+from heapq import heappop, heappush
+
+import pytest
+
+from open_list import OPEN_LISTS, BucketQueue
+
+"""
+Returns random entries to push, where a state pushed again always gets a
+smaller priority (a decrease-key), as A* pushes them.
+"""
+def random_pushes(seed) -> list:
+    rng = random.Random(seed)
+    keys = {}
+    entries = []
+    for _ in range(200):
+        s = rng.randrange(50)
+        key = rng.randrange(30)
+        if s not in keys or key < keys[s]:
+            keys[s] = key
+            entries.append((key, rng.randrange(100), s))
+
+    return entries
+
+"""
+Every backend pops each state once, with its last priority, in the same
+priority order as a plain heapq of those entries.
+"""
+@pytest.mark.parametrize("name", list(OPEN_LISTS))
+def test_pop_order_matches_heapq(name):
+    for seed in range(5):
+        entries = random_pushes(seed)
+        final = {s: key for key, _, s in entries}
+        heap = []
+        for s, key in final.items():
+            heappush(heap, key)
+        open_list = OPEN_LISTS[name]()
+        for entry in entries:
+            open_list.push(entry)
+        assert len(open_list) == len(final)
+        popped = []
+        while len(open_list) > 0:
+            key, _, s = open_list.pop()
+            assert final.pop(s) == key
+            popped.append(key)
+        assert popped == [heappop(heap) for _ in range(len(popped))]
+
+"""
+Pushing a queued state again replaces its entry: it is popped once, with the new priority.
+"""
+@pytest.mark.parametrize("name", list(OPEN_LISTS))
+def test_decrease_key(name):
+    open_list = OPEN_LISTS[name]()
+    for s, key in (("a", 5), ("b", 3), ("c", 4)):
+        open_list.push((key, 0, s))
+    open_list.push((1, 0, "a"))
+    assert len(open_list) == 3
+    assert "a" in open_list
+    assert open_list.peek() == (1, 0, "a")
+    assert [open_list.pop()[2] for _ in range(3)] == ["a", "b", "c"]
+    assert "a" not in open_list
+
+"""
+Removing a state drops only its entry.
+"""
+@pytest.mark.parametrize("name", list(OPEN_LISTS))
+def test_remove(name):
+    open_list = OPEN_LISTS[name]()
+    for key, s in enumerate("abcde"):
+        open_list.push((key, 0, s))
+    open_list.remove("a")
+    open_list.remove("c")
+    assert len(open_list) == 3
+    assert "c" not in open_list
+    assert [open_list.pop()[2] for _ in range(3)] == ["b", "d", "e"]
+
+"""
+Entries of the same priority leave a bucket queue last-in first-out,
+whatever their tie breakers, including after a decrease-key moves one in.
+"""
+def test_bucket_queue_is_lifo_within_a_bucket():
+    queue = BucketQueue()
+    for tie, s in enumerate("abc"):
+        queue.push((2, tie, s))
+    queue.push((5, 0, "d"))
+    queue.push((2, 9, "d"))
+    assert [queue.pop()[2] for _ in range(4)] == ["d", "c", "b", "a"]
+    assert len(queue) == 0
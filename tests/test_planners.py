@@ -0,0 +1,224 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from bitmap_gridworld import BitmapGridworld, pack_rows
+from flat_gridworld import FlatGridworld
+from gridworld import Gridworld
+from gridworld_generator import generate_map
+from strategies import STRATEGIES
+from tiled_gridworld import TiledArray, TiledGridworld
+
+# Strategies the tests below run, in the order of STRATEGIES.
+PLANNERS = ["forward_large_g", "forward_small_g", "backward_large_g", "backward_small_g", "jps", "bidirectional", "ara", "adaptive", "tree_adaptive", "d_star_lite", "hpa", "wavefront"]
+# Strategies FlatGridworld implements.
+FLAT_PLANNERS = ["forward_large_g", "forward_small_g", "backward_large_g", "backward_small_g", "adaptive", "wavefront"]
+
+"""
+Returns an open map of the given interior size, with its borders blocked.
+"""
+def open_map(size=5) -> np.ndarray:
+    m = np.ones((size + 2, size + 2), dtype=int)
+    m[1 : size + 1, 1 : size + 1] = 0
+    return m
+
+"""
+Returns the length of a shortest path from a to b, moving from a cell to
+the cells neighbours(cell) returns, or None if there is none.
+"""
+def distance(neighbours, a, b):
+    distances = {a: 0}
+    queue = deque([a])
+    while queue:
+        s = queue.popleft()
+        if s == b:
+            return distances[s]
+        for succ in neighbours(s):
+            if succ not in distances:
+                distances[succ] = distances[s] + 1
+                queue.append(succ)
+
+    return None
+
+"""
+Gridworld that checks every path the agent is given is a shortest path on
+its discovered map.
+"""
+class CheckedGridworld(Gridworld):
+    def follow_path(self, path):
+        assert len(path) - 1 == distance(self.create_action_states, path[0], path[-1])
+        for a, b in zip(path, path[1 :]):
+            assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+        return super().follow_path(path)
+
+"""
+Solves the same map with the named strategy twice on g, and returns the
+success and counters of each run.
+"""
+def run_counters(g, name) -> list:
+    runs = []
+    for _ in range(2):
+        success = STRATEGIES[name][1](g)
+        runs.append((success, g.expanded_cells, g.moves_taken, g.max_expanded, g.replans, g.agent))
+
+    return runs
+
+"""
+Every strategy reaches the target exactly when the true map has a path to it,
+following only shortest paths on the discovered map (HPA* paths are only
+near-optimal, so it is left out of the path check).
+"""
+@pytest.mark.parametrize("name", PLANNERS)
+def test_paths_are_optimal_and_runs_terminate(name):
+    for seed in range(10):
+        m = generate_map(15, complexity=0.75, density=0.75, seed=seed)
+        # Wall in the target of every other map.
+        if seed % 2:
+            m[14, 15] = m[15, 14] = 1
+        free = lambda s: [(s[0] + dr, s[1] + dc) for dr, dc in ((-1, 0), (1, 0), (0, 1), (0, -1)) if not m[s[0] + dr, s[1] + dc]]
+        solvable = distance(free, (1, 1), (15, 15)) is not None
+        engine = Gridworld if name == "hpa" else CheckedGridworld
+        g = engine(map_size=15, pregenerated_map=m.tolist(), seed=seed)
+        assert STRATEGIES[name][1](g) == solvable
+        assert (g.agent == g.target) == solvable
+
+"""
+Every strategy gives up once it finds the target blocked, instead of replanning forever.
+"""
+@pytest.mark.parametrize("name", PLANNERS)
+def test_blocked_target_has_no_path(name):
+    m = open_map()
+    m[5, 5] = 1
+    g = Gridworld(map_size=5, pregenerated_map=m.tolist(), seed=0)
+    assert STRATEGIES[name][1](g) is False
+
+"""
+Every strategy gives up on an agent walled in at its start.
+"""
+@pytest.mark.parametrize("name", PLANNERS)
+def test_walled_in_start_has_no_path(name):
+    m = open_map()
+    m[1, 2] = m[2, 1] = 1
+    g = Gridworld(map_size=5, pregenerated_map=m.tolist(), seed=0)
+    assert STRATEGIES[name][1](g) is False
+    assert g.moves_taken == 0
+
+"""
+With keep_h, a run on the same map starts from the blocks the kept h values
+were learned against; without it, from an empty discovered map.
+"""
+@pytest.mark.parametrize("engine", [FlatGridworld, TiledGridworld])
+@pytest.mark.parametrize("lazy_reset", [False, True])
+def test_keep_h_keeps_discovered_blocks(engine, lazy_reset):
+    true_map = Gridworld(31, seed=3).true_map
+    for keep_h in (False, True):
+        g = engine(31, pregenerated_map=true_map, seed=3, lazy_reset=lazy_reset, keep_h=keep_h)
+        assert g.adaptive_repeated_compute_path()
+        blocks = sorted(g.discovered_blocks())
+        g.reset_map()
+        if keep_h:
+            assert sorted(g.discovered_blocks()) == blocks
+        else:
+            assert len(g.discovered_blocks()) < len(blocks)
+        assert g.adaptive_repeated_compute_path()
+
+"""
+HPA* refuses engines that identify cells by id instead of running on the wrong cells.
+"""
+def test_hpa_refuses_cell_id_engines():
+    g = FlatGridworld(map_size=5, pregenerated_map=open_map().tolist(), seed=0)
+    with pytest.raises(ValueError):
+        STRATEGIES["hpa"][1](g)
+
+"""
+FlatGridworld gives the same results and counters as Gridworld for every
+strategy it implements, and refuses the others.
+"""
+@pytest.mark.parametrize("name", PLANNERS)
+def test_flat_gridworld_matches_gridworld(name):
+    for seed in range(4):
+        m = generate_map(21, complexity=0.75, density=0.75, seed=seed).tolist()
+        flat = FlatGridworld(map_size=21, pregenerated_map=m, seed=seed)
+        if name not in FLAT_PLANNERS:
+            with pytest.raises(ValueError):
+                STRATEGIES[name][1](flat)
+            continue
+        assert run_counters(flat, name) == run_counters(Gridworld(map_size=21, pregenerated_map=m, seed=seed), name)
+
+"""
+Solving a map again after a lazy reset_map gives the same results and
+counters as after resetting every array, for every strategy.
+"""
+@pytest.mark.parametrize("name", PLANNERS)
+def test_lazy_reset_matches_full_reset(name):
+    engines = [Gridworld, FlatGridworld] if name in FLAT_PLANNERS else [Gridworld]
+    for engine in engines:
+        for seed in range(4):
+            m = generate_map(21, complexity=0.75, density=0.75, seed=seed).tolist()
+            lazy = engine(map_size=21, pregenerated_map=m, seed=seed, lazy_reset=True)
+            full = engine(map_size=21, pregenerated_map=m, seed=seed)
+            assert run_counters(lazy, name) == run_counters(full, name)
+
+"""
+TiledGridworld, with tiles small enough for a run to span many of them,
+gives the same results and counters as FlatGridworld for every strategy it
+implements, and refuses the others.
+"""
+@pytest.mark.parametrize("name", PLANNERS)
+def test_tiled_gridworld_matches_flat(name):
+    for seed in range(4):
+        m = generate_map(21, complexity=0.75, density=0.75, seed=seed)
+        tiled = TiledGridworld(map_size=21, pregenerated_map=m, seed=seed, tile_size=4)
+        if name not in FLAT_PLANNERS or name == "wavefront":
+            with pytest.raises(ValueError):
+                STRATEGIES[name][1](tiled)
+            continue
+        assert run_counters(tiled, name) == run_counters(FlatGridworld(map_size=21, pregenerated_map=m.tolist(), seed=seed), name)
+
+"""
+A TiledGridworld run only allocates the tiles around the cells it touches.
+"""
+def test_tiled_gridworld_allocates_explored_tiles():
+    m = generate_map(101, complexity=0.75, density=0.75, seed=1)
+    g = TiledGridworld(map_size=101, pregenerated_map=m, seed=1, tile_size=8)
+    assert g.repeated_compute_path()
+    dense = 7 * 4 * len(m) ** 2
+    assert g.allocated_bytes() < dense / 2
+    assert len(g.known.tiles) < g.known.tiles_per_row ** 2
+
+"""
+Reading a TiledArray never allocates; writing allocates the one tile of the cell.
+"""
+def test_tiled_array_allocates_on_write():
+    a = TiledArray(20, np.int32, fill=-1, tile_size=8)
+    assert a[0] == a[399] == -1
+    assert a.nbytes == 0
+    a[21] = 5
+    a[399] = 7
+    assert (a[21], a[399], a[22]) == (5, 7, -1)
+    assert len(a.tiles) == 2
+    assert a.nbytes == 2 * 8 * 8 * 4
+    with pytest.raises(ValueError):
+        TiledArray(20, tile_size=6)
+
+"""
+BitmapGridworld gives the same results and counters as Gridworld for every
+strategy, with and without lazy resets.
+"""
+@pytest.mark.parametrize("name", PLANNERS)
+def test_bitmap_gridworld_matches_gridworld(name):
+    for seed in range(4):
+        m = generate_map(21, complexity=0.75, density=0.75, seed=seed).tolist()
+        for lazy_reset in (False, True):
+            bitmap = BitmapGridworld(map_size=21, pregenerated_map=m, seed=seed, lazy_reset=lazy_reset)
+            g = Gridworld(map_size=21, pregenerated_map=m, seed=seed, lazy_reset=lazy_reset)
+            assert run_counters(bitmap, name) == run_counters(g, name)
+
+"""
+pack_rows sets bit c of row r exactly where cell (r, c) is 1.
+"""
+def test_pack_rows():
+    m = generate_map(21, complexity=0.75, density=0.75, seed=0)
+    rows = pack_rows(m)
+    assert [[(row >> c) & 1 for c in range(len(m))] for row in rows] == m.tolist()
@@ -0,0 +1,59 @@
+import io
+import re
+
+import pytest
+
+from flat_gridworld import FlatGridworld
+from gridworld import Gridworld
+from gridworld_generator import generate_map
+from render import CLEAR, MapRenderer, render_frame
+from strategies import STRATEGIES
+
+# Cursor moves written by MapRenderer: ESC [ row ; col H.
+GOTO = re.compile(r"\x1b\[(\d+);(\d+)H")
+
+"""
+Applies ANSI text written by MapRenderer to screen, a list of rows of characters.
+"""
+def apply_frame(screen, text) -> None:
+    if text.startswith(CLEAR):
+        screen[:] = [list(row) for row in text[len(CLEAR) :].split("\n")[: -1]]
+        return
+    row = col = 0
+    pos = 0
+    while pos < len(text):
+        move = GOTO.match(text, pos)
+        if move:
+            row, col = int(move.group(1)) - 1, int(move.group(2)) - 1
+            pos = move.end()
+            continue
+        if row < len(screen):
+            screen[row][col] = text[pos]
+        col += 1
+        pos += 1
+
+"""
+Incremental frames drawn after every replan match the whole map rendered at that point.
+"""
+@pytest.mark.parametrize("engine, name", [
+    (Gridworld, "forward_large_g"), (Gridworld, "adaptive"), (Gridworld, "d_star_lite"), (Gridworld, "hpa"),
+    (FlatGridworld, "forward_large_g"), (FlatGridworld, "adaptive"), (FlatGridworld, "wavefront"),
+])
+def test_incremental_frames_match_full_render(engine, name):
+    m = generate_map(21, complexity=0.75, density=0.75, seed=2)
+    g = engine(map_size=21, pregenerated_map=m.tolist(), seed=0, lazy_reset=True)
+    renderer = MapRenderer(g, io.StringIO())
+    screen = []
+    mismatches = []
+
+    def check(event) -> None:
+        apply_frame(screen, renderer.frame())
+        if ["".join(row) for row in screen] != render_frame(g).split("\n")[: -1]:
+            mismatches.append(event["replan"])
+
+    g.on_replan = check
+    # Two runs, so the second one reuses the lazily-reset map.
+    for _ in range(2):
+        STRATEGIES[name][1](g)
+    assert g.replans > 1
+    assert mismatches == []
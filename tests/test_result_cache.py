@@ -0,0 +1,70 @@
+import numpy as np
+
+from gridworld_generator import generate_true_maps
+from result_cache import ResultCache, iter_cached
+from runner import run_maps
+
+STRATEGY_NAMES = ["forward_large_g", "adaptive"]
+
+"""
+Caching a set of maps, then running it again with a new maze in front, only solves the new maze.
+"""
+def test_cache_hits_survive_reindexing(tmp_path):
+    maps = generate_true_maps(4, 9, seed=1, solvable=True)
+    with ResultCache(str(tmp_path / "cache.sqlite")) as cache:
+        first = list(iter_cached(maps, cache, STRATEGY_NAMES))
+        assert cache.misses == len(first) == 8
+
+    extra = generate_true_maps(1, 9, seed=2, solvable=True)[0]
+    shifted = {0: extra}
+    shifted.update({k + 1: m for k, m in maps.items()})
+    with ResultCache(str(tmp_path / "cache.sqlite")) as cache:
+        second = list(iter_cached(shifted, cache, STRATEGY_NAMES))
+        assert cache.hits == 8 and cache.misses == 2
+
+    # The cached records are the ones a fresh run gives for the shifted set.
+    fresh = run_maps(shifted, STRATEGY_NAMES)
+    key = lambda r: (str(r["map"]), r["strategy"])
+    assert sorted(second, key=key) == sorted(fresh, key=key)
+
+"""
+Solving a map gives the same result wherever it sits in its set.
+"""
+def test_results_do_not_depend_on_map_position():
+    maps = generate_true_maps(3, 9, seed=3, solvable=True)
+    reversed_maps = {k: maps[2 - k] for k in range(3)}
+    forward = {(r["map"], r["strategy"]): r for r in run_maps(maps, STRATEGY_NAMES)}
+    for r in run_maps(reversed_maps, STRATEGY_NAMES):
+        same = forward[(2 - r["map"], r["strategy"])]
+        assert {k: v for k, v in r.items() if k != "map"} == {k: v for k, v in same.items() if k != "map"}
+
+"""
+Solved records reach the file while a run is still going, not only when the cache is closed.
+"""
+def test_records_are_committed_during_a_run(tmp_path):
+    maps = generate_true_maps(3, 9, seed=4, solvable=True)
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, commit_interval=0.0)
+    results = iter_cached(maps, cache, STRATEGY_NAMES)
+    next(results)
+    next(results)
+    # A second connection only sees committed records.
+    with ResultCache(path) as reader:
+        assert len(reader) >= 1
+    results.close()
+    cache.close()
+
+"""
+Periodic commits evict too, so the cache stays bounded even if the run never closes it.
+"""
+def test_max_entries_holds_during_a_run(tmp_path):
+    maps = generate_true_maps(3, 9, seed=4, solvable=True)
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, max_entries=2, commit_interval=0.0)
+    results = iter_cached(maps, cache, STRATEGY_NAMES)
+    for _ in range(5):
+        next(results)
+    with ResultCache(path, max_entries=2) as reader:
+        assert len(reader) == 2
+    results.close()
+    cache.close()
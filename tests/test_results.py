@@ -0,0 +1,55 @@
+import pytest
+
+from results import ResultsWriter, load_results
+
+"""
+Returns a result record for map key with the given counters.
+"""
+def record(key, strategy="forward_large_g", expanded=10) -> dict:
+    return {"map": key, "strategy": strategy, "success": True, "expanded_cells": expanded, "moves_taken": 3, "max_expanded": 4}
+
+"""
+Records written to JSONL or CSV read back as written; CSV map keys come back as strings.
+"""
+@pytest.mark.parametrize("name", ["results.jsonl", "results.csv"])
+def test_records_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    with ResultsWriter(path) as writer:
+        writer.write(record(0))
+        writer.write(record(1, "adaptive", 20))
+    records = load_results(path)
+    if name.endswith(".csv"):
+        assert records == [record("0"), record("1", "adaptive", 20)]
+    else:
+        assert records == [record(0), record(1, "adaptive", 20)]
+
+"""
+Resuming keeps the complete records, drops a last line cut off by an
+interrupted run, and appends new records after them (without a second CSV header).
+"""
+@pytest.mark.parametrize("name", ["results.jsonl", "results.csv"])
+def test_resume_drops_cut_off_line(tmp_path, name):
+    path = tmp_path / name
+    with ResultsWriter(str(path)) as writer:
+        writer.write(record(0))
+        writer.write(record(1))
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) - 5])
+
+    with ResultsWriter(str(path), resume=True) as writer:
+        assert writer.done() == {("0", "forward_large_g")}
+        writer.write(record(1, expanded=30))
+    records = load_results(str(path))
+    assert [(str(r["map"]), r["expanded_cells"]) for r in records] == [("0", 10), ("1", 30)]
+
+"""
+Without resume, an existing results file is overwritten.
+"""
+def test_no_resume_overwrites(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with ResultsWriter(path) as writer:
+        writer.write(record(0))
+    with ResultsWriter(path) as writer:
+        assert writer.done() == set()
+        writer.write(record(1))
+    assert load_results(path) == [record(1)]
@@ -0,0 +1,37 @@
+from gridworld import Gridworld
+from gridworld_generator import generate_true_maps
+from maze_store import MazeStore, MazeStoreWriter, map_digest
+import runner
+from runner import iter_maps, run_maps, run_strategy
+
+"""
+Returns the record run_strategy gives for map m, reported as key.
+"""
+def single_run(m, key, name, seed=0) -> dict:
+    g = Gridworld(map_size=len(m) - 2, pregenerated_map=m.tolist(), lazy_reset=True)
+    record = run_strategy(g, 0, name, seed, map_digest(m))
+    record["map"] = key
+    return record
+
+"""
+Batched wavefront records match solving each map on its own, in map and strategy order.
+"""
+def test_batched_wavefront_matches_single_runs(monkeypatch):
+    monkeypatch.setattr(runner, "WAVEFRONT_BATCH", 2)
+    maps = generate_true_maps(5, 11, seed=3)
+    names = ["wavefront", "adaptive"]
+    expected = [single_run(maps[k], k, name) for k in maps for name in names]
+    assert run_maps(maps, names) == expected
+    assert run_maps(maps, names, workers=2) == expected
+
+"""
+Maps of different sizes in one store are batched by size.
+"""
+def test_batched_wavefront_over_mixed_sizes(tmp_path):
+    path = str(tmp_path / "maps.maze")
+    maps = list(generate_true_maps(2, 9, seed=1).values()) + list(generate_true_maps(2, 13, seed=2).values())
+    with MazeStoreWriter(path) as writer:
+        for m in maps:
+            writer.append(m)
+    records = list(iter_maps(MazeStore(path), ["wavefront"]))
+    assert records == [single_run(m, k, "wavefront") for k, m in enumerate(maps)]
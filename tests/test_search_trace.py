@@ -0,0 +1,51 @@
+import pytest
+
+from gridworld import Gridworld
+from gridworld_generator import generate_map
+from search_trace import TraceRecorder, map_state, read_trace, replay
+from strategies import STRATEGIES
+
+"""
+Solves a map with the named strategy, once where it is solvable and once
+with its target walled in, recording both runs to a trace in tmp_path.
+Returns the runs read back.
+"""
+def traced_runs(tmp_path, name) -> list:
+    path = str(tmp_path / "runs.trace")
+    recorder = TraceRecorder(path)
+    for walled in (False, True):
+        m = generate_map(21, complexity=0.75, density=0.75, seed=2)
+        if walled:
+            m[20, 21] = m[21, 20] = 1
+        g = Gridworld(map_size=21, pregenerated_map=m.tolist(), seed=0)
+        g.trace = recorder
+        recorder.start_run(g, name)
+        recorder.end_run(g, STRATEGIES[name][1](g))
+    recorder.close()
+    return read_trace(path)
+
+"""
+Replaying a trace gives back the statistics and final agent of its END record, for every strategy.
+"""
+@pytest.mark.parametrize("name", list(STRATEGIES))
+def test_replay_matches_end(tmp_path, name):
+    runs = traced_runs(tmp_path, name)
+    assert [run["end"]["success"] for run in runs] == [True, False]
+    for run in runs:
+        stats = replay(run)
+        end = run["end"]
+        for key in ("success", "expanded_cells", "moves_taken", "max_expanded"):
+            assert stats[key] == end[key], key
+        assert map_state(run).agent == end["agent"]
+
+"""
+A run cut off at the end of the file is read up to its last whole record.
+"""
+def test_truncated_trace_keeps_whole_records(tmp_path):
+    path = tmp_path / "runs.trace"
+    traced_runs(tmp_path, "adaptive")
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) - 3])
+    runs = read_trace(str(path))
+    assert runs[0]["end"] is not None
+    assert runs[1]["end"] is None
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from service import SolverService, parse_maze
+from strategies import STRATEGIES
+
+"""
+Returns a valid 3 x 3 maze (5 x 5 with its borders) as nested lists.
+"""
+def small_maze() -> list:
+    m = np.ones((5, 5), dtype=int)
+    m[1 : 4, 1 : 4] = 0
+    return m.tolist()
+
+def test_parse_maze_accepts_valid_maze():
+    m = parse_maze(small_maze())
+    assert m.dtype == np.uint8 and m.shape == (5, 5)
+
+@pytest.mark.parametrize("value", [-1, 2, 300, 0.5])
+def test_parse_maze_rejects_cells_other_than_0_and_1(value):
+    m = small_maze()
+    m[2][2] = value
+    with pytest.raises(ValueError):
+        parse_maze(m)
+
+@pytest.mark.parametrize("cell", [(1, 1), (3, 3)])
+def test_parse_maze_rejects_blocked_start_or_target(cell):
+    m = small_maze()
+    m[cell[0]][cell[1]] = 1
+    with pytest.raises(ValueError):
+        parse_maze(m)
+
+@pytest.mark.parametrize("maze", [[[0, 1]], [[0, 1], [1, 0]], "maze", [[0, 1, 0], [1, 0]]])
+def test_parse_maze_rejects_bad_shapes(maze):
+    with pytest.raises(ValueError):
+        parse_maze(maze)
+
+def test_solve_rejects_unknown_strategy_and_maze():
+    service = SolverService()
+    with pytest.raises(ValueError):
+        service.solve([{"maze": small_maze(), "strategy": "nope"}])
+    with pytest.raises(ValueError):
+        service.solve([{"hash": "unknown"}])
+
+def test_solve_by_hash_matches_solve_by_maze():
+    service = SolverService()
+    first = service.solve([{"maze": small_maze(), "strategy": "adaptive"}])[0]
+    again = service.solve([{"hash": first["hash"], "strategy": "adaptive"}])[0]
+    assert first["success"] and again == first
+
+@pytest.mark.parametrize("name", list(STRATEGIES))
+def test_solve_returns_path(name):
+    result = SolverService().solve([{"maze": small_maze(), "strategy": name}])[0]
+    path = result["path"]
+    assert result["success"] and path[0] == [1, 1] and path[-1] == [3, 3]
+    assert len(path) == result["moves_taken"] + 1
@@ -0,0 +1,190 @@
+import numpy as np
+
+from flat_gridworld import FlatGridworld
+from gridworld_generator import generate_map
+from open_list import IndexedHeap
+
+"""
+Sparse, tiled backing store for very large gridworlds.
+
+FlatGridworld keeps every per-cell array dense, so memory grows with the
+whole map even though searches only touch the cells near their frontier and
+almost all of the discovered map stays unknown. TiledGridworld runs the same
+search code over TiledArrays, which allocate fixed-size square tiles of a
+compact dtype only when a cell in them is first written, and keeps the true
+map bit-packed (one bit per cell, in the layout of a maze store record).
+Memory then grows with the area actually explored.
+"""
+
+"""
+Square grid of 0s and 1s packed one bit per cell, in flat cell id order
+(row * size + col, least significant bit first), as maze store records are.
+grid[i] is the bit of cell id i.
+"""
+class PackedGrid:
+    def __init__(self, bits, size) -> None:
+        self.bits = memoryview(np.ascontiguousarray(bits, dtype=np.uint8))  # Packed bits; may be a view into a maze store.
+        self.size = size  # Number of rows (and columns).
+
+    def __getitem__(self, i) -> int:
+        return (self.bits[i >> 3] >> (i & 7)) & 1
+
+    """
+    Returns the grid as a 2D uint8 array.
+    """
+    def unpack(self) -> np.ndarray:
+        return np.unpackbits(np.asarray(self.bits), count=self.size * self.size, bitorder="little").reshape(self.size, self.size)
+
+"""
+Packs a square 2D array of 0s and 1s into a PackedGrid.
+"""
+def pack_map(m) -> PackedGrid:
+    cells = np.asarray(m, dtype=np.uint8)
+    return PackedGrid(np.packbits(cells.reshape(-1), bitorder="little"), len(cells))
+
+"""
+Returns map k of a maze store as a PackedGrid that reads straight from the
+memory-mapped file, without unpacking it.
+"""
+def packed_store_map(store, k) -> PackedGrid:
+    rows = int(store.index[k]["rows"])
+    return PackedGrid(store.packed(k), rows)
+
+"""
+Flat cell ids of a square grid of the given size: interior[i] is 1 unless
+cell id i is on the border. Computed, so it takes no memory per cell.
+"""
+class Interior:
+    def __init__(self, size) -> None:
+        self.size = size
+
+    def __getitem__(self, i) -> int:
+        r, c = divmod(i, self.size)
+        return 0 < r < self.size - 1 and 0 < c < self.size - 1
+
+"""
+Square array indexed by flat cell id, stored as lazily allocated square tiles.
+Reading a cell of a tile that was never written returns fill without
+allocating it; writing allocates the whole tile (tile_size**2 cells of dtype).
+tile_size must be a power of two.
+"""
+class TiledArray:
+    def __init__(self, size, dtype=np.int32, fill=0, tile_size=64) -> None:
+        if tile_size & (tile_size - 1):
+            raise ValueError("tile_size must be a power of two: " + str(tile_size))
+        self.size = size  # Number of rows (and columns) of the array.
+        self.dtype = np.dtype(dtype)
+        self.fill = fill  # Value of cells never written.
+        self.tile_size = tile_size
+        self.shift = tile_size.bit_length() - 1
+        self.mask = tile_size - 1
+        self.tiles_per_row = (size + tile_size - 1) >> self.shift
+        self.tiles = {}  # Tile number -> memoryview of its cells, row by row.
+
+    def __getitem__(self, i):
+        r, c = divmod(i, self.size)
+        shift = self.shift
+        tile = self.tiles.get((r >> shift) * self.tiles_per_row + (c >> shift))
+        if tile is None:
+            return self.fill
+        return tile[((r & self.mask) << shift) | (c & self.mask)]
+
+    def __setitem__(self, i, value) -> None:
+        r, c = divmod(i, self.size)
+        shift = self.shift
+        key = (r >> shift) * self.tiles_per_row + (c >> shift)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = memoryview(np.full(self.tile_size * self.tile_size, self.fill, dtype=self.dtype))
+            self.tiles[key] = tile
+        tile[((r & self.mask) << shift) | (c & self.mask)] = value
+
+    """
+    Number of bytes allocated for tiles.
+    """
+    @property
+    def nbytes(self) -> int:
+        return len(self.tiles) * self.tile_size * self.tile_size * self.dtype.itemsize
+
+"""
+FlatGridworld whose per-cell arrays are TiledArrays and whose true map is a
+PackedGrid, so that maps orders of magnitude larger than Gridworld can handle
+fit in memory. pregenerated_map may be a 2D array or a PackedGrid (see
+packed_store_map). Runs the strategies FlatGridworld implements (forward and
+backward repeated A*, and adaptive A*) with the same results.
+There is no 2D discovered_map, so print_map is not available.
+"""
+class TiledGridworld(FlatGridworld):
+    def __init__(self, map_size=101, pregenerated_map=None, complexity=0.75, density=0.75, open_list_type=IndexedHeap, seed=None, lazy_reset=False, tile_size=64, keep_h=False) -> None:
+        self.tile_size = tile_size  # Rows (and columns) of each tile of the per-cell arrays.
+        if pregenerated_map is not None and not isinstance(pregenerated_map, PackedGrid):
+            pregenerated_map = pack_map(pregenerated_map)
+        super().__init__(map_size, pregenerated_map, complexity, density, open_list_type, seed, lazy_reset, keep_h)
+
+    """
+    Generates a new true map, as Gridworld.generate_map does, and packs it.
+    """
+    def generate_map(self, complexity=0.75, density=0.75) -> None:
+        self.true_map = pack_map(generate_map(self.map_size - 2, complexity, density, self.random.getrandbits(64), np.uint8))
+
+    """
+    Creates empty tiled per-cell arrays for the current true map.
+    """
+    def allocate_arrays(self) -> None:
+        n = self.map_size
+        tile_size = self.tile_size
+        self.blocked = self.true_map
+        self.inside = Interior(n)
+        self.discovered_map = None
+        self.known = TiledArray(n, np.int32, 0, tile_size)
+        self.g_mem = TiledArray(n, np.int32, 0, tile_size)
+        self.search_mem = TiledArray(n, np.int32, 0, tile_size)
+        self.parent_mem = TiledArray(n, np.int32, 0, tile_size)
+        self.closed_mem = TiledArray(n, np.int32, 0, tile_size)
+
+        # Neighbour offsets in the order N, S, E, W.
+        self.offsets = (-n, n, 1, -1)
+
+    """
+    Creates an empty tiled h table for the current true map.
+    """
+    def allocate_h_table(self) -> None:
+        n = self.map_size
+        self.h_mem = TiledArray(n, np.int32, 0, self.tile_size)
+        self.h_stamp_mem = TiledArray(n, np.int32, 0, self.tile_size)
+
+    """
+    Returns the cell ids of the blocks in the discovered map, looking only
+    at the allocated tiles.
+    """
+    def discovered_blocks(self) -> list:
+        known = self.known
+        tile_size = known.tile_size
+        blocks = []
+        for key, tile in known.tiles.items():
+            row, col = divmod(key, known.tiles_per_row)
+            for i in np.flatnonzero(np.asarray(tile) == self.stamp).tolist():
+                r, c = divmod(i, tile_size)
+                blocks.append((row * tile_size + r) * known.size + col * tile_size + c)
+
+        return blocks
+
+    """
+    Updates the h values of every cell in closed_list to h(s) = g(s_goal) - g(s),
+    one cell at a time, since the tiles are allocated on first write.
+    """
+    def update_h(self, closed_list, g_goal) -> None:
+        g = self.g_mem
+        h = self.h_mem
+        h_stamp = self.h_stamp_mem
+        h_epoch = self.h_epoch
+        for s in closed_list:
+            h[s] = g_goal - g[s]
+            h_stamp[s] = h_epoch
+
+    """
+    Number of bytes allocated for the per-cell arrays and the packed true map.
+    """
+    def allocated_bytes(self) -> int:
+        arrays = (self.known, self.g_mem, self.h_mem, self.h_stamp_mem, self.search_mem, self.parent_mem, self.closed_mem)
+        return sum(a.nbytes for a in arrays) + self.true_map.bits.nbytes
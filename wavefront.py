@@ -0,0 +1,246 @@
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from maze_store import load_maps
+from tiled_gridworld import PackedGrid
+
+"""
+Vectorized wavefront replanner, batched across many mazes.
+
+Moves have unit cost, so every replan is a breadth-first search over the
+discovered map. Here the search is a wavefront grown from the target with
+array shifts, and the mazes of a batch are stacked in 3D arrays
+(maze, row, col), so each Python-level step advances every maze at once:
+one wave step grows the distance fields of all mazes that are replanning,
+and one move step moves every agent one cell down its distance field.
+
+Agents know the same as in Gridworld (the blocked neighbours of every cell
+they have stood on, everything else assumed unblocked) and follow a shortest
+path until it is blocked, as in repeated backward A*. Ties between shortest
+paths are broken in the order N, S, E, W instead of by the A* tie-breakers,
+so moves_taken can differ from the A* strategies; expanded_cells counts the
+cells labelled by each wavefront.
+"""
+
+# Neighbour offsets (row, col) in the order N, S, E, W.
+OFFSETS = ((-1, 0), (1, 0), (0, 1), (0, -1))
+
+"""
+Solves a batch of mazes of the same size at once.
+"""
+class WavefrontBatch:
+    def __init__(self, maps) -> None:
+        self.true_maps = np.stack([np.asarray(m, dtype=bool) for m in maps])  # 3D array of true maps, True = blocked.
+        k, n, _ = self.true_maps.shape
+        self.map_size = n  # Size of every map, including borders.
+        self.known = np.zeros((k, n, n), dtype=bool)  # Blocks discovered by each agent.
+        self.known[:, 0, :] = self.known[:, -1, :] = True  # Borders are never searched.
+        self.known[:, :, 0] = self.known[:, :, -1] = True
+        self.dist = np.full((k, n, n), -1, dtype=np.int32)  # Distance to target of each cell at the last replan, -1 if unreached.
+        self.agents = np.ones((k, 2), dtype=np.intp)  # Location of each agent.
+        self.target = (n - 2, n - 2)  # Location of the target in every maze.
+        self.active = np.ones(k, dtype=bool)  # Mazes still being solved.
+        self.success = np.zeros(k, dtype=bool)  # Mazes where the agent reached the target.
+        self.needs_replan = np.ones(k, dtype=bool)  # Mazes whose path is blocked (or not planned yet).
+        self.expanded_cells = np.zeros(k, dtype=np.int64)
+        self.moves_taken = np.zeros(k, dtype=np.int64)
+        self.max_expanded = np.zeros(k, dtype=np.int64)
+        self.replans = np.zeros(k, dtype=np.int64)
+        self.uncover(np.arange(k))
+
+    """
+    Reveals the true contents of the cells to the north, south, east and west
+    of the agents of the given mazes.
+    """
+    def uncover(self, which) -> None:
+        r = self.agents[which, 0]
+        c = self.agents[which, 1]
+        for dr, dc in OFFSETS:
+            self.known[which, r + dr, c + dc] |= self.true_maps[which, r + dr, c + dc]
+
+    """
+    Grows the distance fields of the given mazes from the target, one wave
+    step per loop for all of them together, until each wave reaches its agent
+    or runs out of cells. Mazes whose agent was not reached have no path and
+    are finished unsuccessfully.
+    """
+    def replan(self, which) -> None:
+        free = ~self.known[which]
+        dist = np.full(free.shape, -1, dtype=np.int32)
+        frontier = np.zeros(free.shape, dtype=bool)
+        tr, tc = self.target
+        frontier[:, tr, tc] = free[:, tr, tc]
+        dist[frontier] = 0
+        free &= ~frontier
+        index = np.arange(len(which))
+        ar = self.agents[which, 0]
+        ac = self.agents[which, 1]
+
+        step = 0
+        while frontier.any():
+            # Stop growing the waves that have reached their agent.
+            frontier[dist[index, ar, ac] >= 0] = False
+            step += 1
+            grown = np.zeros_like(frontier)
+            grown[:, 1:, :] |= frontier[:, :-1, :]
+            grown[:, :-1, :] |= frontier[:, 1:, :]
+            grown[:, :, 1:] |= frontier[:, :, :-1]
+            grown[:, :, :-1] |= frontier[:, :, 1:]
+            grown &= free
+            dist[grown] = step
+            free &= ~grown
+            frontier = grown
+
+        self.dist[which] = dist
+        expanded = np.count_nonzero(dist >= 0, axis=(1, 2))
+        self.expanded_cells[which] += expanded
+        self.max_expanded[which] = np.maximum(self.max_expanded[which], expanded)
+        self.replans[which] += 1
+        self.needs_replan[which] = False
+
+        # No path exists to the target.
+        unreached = which[dist[index, ar, ac] < 0]
+        self.active[unreached] = False
+
+    """
+    Moves every active agent one cell down its distance field. An agent whose
+    next cell has been discovered to be blocked stays put and replans.
+    """
+    def move(self) -> None:
+        which = np.flatnonzero(self.active & ~self.needs_replan)
+        r = self.agents[which, 0]
+        c = self.agents[which, 1]
+        want = self.dist[which, r, c] - 1
+
+        # First neighbour, in the order N, S, E, W, one step closer to the target.
+        next_r = r.copy()
+        next_c = c.copy()
+        chosen = np.zeros(len(which), dtype=bool)
+        for dr, dc in OFFSETS:
+            hit = ~chosen & (self.dist[which, r + dr, c + dc] == want)
+            next_r[hit] = r[hit] + dr
+            next_c[hit] = c[hit] + dc
+            chosen |= hit
+
+        blocked = self.known[which, next_r, next_c]
+        self.needs_replan[which[blocked]] = True
+        moved = which[~blocked]
+        self.agents[moved, 0] = next_r[~blocked]
+        self.agents[moved, 1] = next_c[~blocked]
+        self.moves_taken[moved] += 1
+        self.uncover(moved)
+
+        arrived = moved[(self.agents[moved, 0] == self.target[0]) & (self.agents[moved, 1] == self.target[1])]
+        self.success[arrived] = True
+        self.active[arrived] = False
+
+    """
+    Returns the path from the agent of maze i to the target down its
+    distance field, with ties broken in the order N, S, E, W as in move.
+    """
+    def path(self, i) -> List:
+        dist = self.dist[i]
+        r, c = (int(x) for x in self.agents[i])
+        path = [(r, c)]
+        while dist[r, c] > 0:
+            want = dist[r, c] - 1
+            for dr, dc in OFFSETS:
+                if dist[r + dr, c + dc] == want:
+                    r, c = r + dr, c + dc
+                    break
+            path.append((r, c))
+
+        return path
+
+    """
+    Solves every maze of the batch. Returns the array of successes.
+    """
+    def run(self) -> np.ndarray:
+        arrived = (self.agents[:, 0] == self.target[0]) & (self.agents[:, 1] == self.target[1])
+        self.success[arrived] = True
+        self.active[arrived] = False
+        while self.active.any():
+            which = np.flatnonzero(self.active & self.needs_replan)
+            if len(which) > 0:
+                self.replan(which)
+            self.move()
+
+        return self.success
+
+"""
+Runs the wavefront replanner on one Gridworld, as a strategy.
+Each replan grows one wavefront and is reported through the replan hooks of
+g, and the agent follows the path down the distance field in g itself, so
+g's discovered map, stats, on_replan and trace see the run as they do for
+the other strategies.
+Returns True if the target was reached, False otherwise.
+"""
+def wavefront_repeated_compute_path(g) -> bool:
+    # The batch keeps dense copies of the map, which TiledGridworld's packed true map is there to avoid.
+    if isinstance(g.true_map, PackedGrid):
+        raise ValueError(type(g).__name__ + " does not support planner: wavefront")
+    g.reset_map()
+    batch = WavefrontBatch([g.true_map])
+    which = np.zeros(1, dtype=np.intp)
+    while g.agent != g.target:
+        s_start = g.agent
+        replan = g.start_replan()
+        batch.replan(which)
+        g.expanded_cells = int(batch.expanded_cells[0])
+        g.max_expanded = int(batch.max_expanded[0])
+        g.end_search(replan)
+        if not batch.active[0]:
+            g.end_replan(replan, s_start, g.target, None)
+            return False
+
+        cells = batch.path(0)
+        # FlatGridworld follows paths of cell ids.
+        path = [g.cell_id(s) for s in cells] if hasattr(g, "cell_id") else cells
+        g.end_build_path(replan)
+        moves = g.moves_taken
+        g.follow_path(path)
+        # Uncover what the agent saw on the way in the batch too.
+        for s in cells[1 : 1 + g.moves_taken - moves]:
+            batch.agents[0] = s
+            batch.uncover(which)
+        g.end_replan(replan, s_start, g.target, path)
+
+    return True
+
+"""
+Solves every map in maps (a dict of 2D arrays or a MazeStore) with the
+wavefront replanner, batch_size maps at a time. Maps in one batch must be the
+same size. Returns one result record per map, as runner.run_maps does.
+"""
+def solve_maps(maps, batch_size=256) -> List[Dict]:
+    keys = list(maps)
+    results = []
+    for start in range(0, len(keys), batch_size):
+        chunk = keys[start : start + batch_size]
+        batch = WavefrontBatch([maps[k] for k in chunk])
+        batch.run()
+        for i, k in enumerate(chunk):
+            results.append({
+                "map": k,
+                "strategy": "wavefront",
+                "success": bool(batch.success[i]),
+                "expanded_cells": int(batch.expanded_cells[i]),
+                "moves_taken": int(batch.moves_taken[i]),
+                "max_expanded": int(batch.max_expanded[i]),
+            })
+
+    return results
+
+
+if __name__ == "__main__":
+    from runner import print_summary, summarize
+
+    parser = argparse.ArgumentParser(description="Solve gridworlds in batches with the vectorized wavefront replanner.")
+    parser.add_argument("--maps", default="gridworld_maps.maze", help="maze store or pickle file of maps to solve")
+    parser.add_argument("--batch-size", type=int, default=256, help="number of maps solved together")
+    args = parser.parse_args()
+
+    results = solve_maps(load_maps(args.maps), args.batch_size)
+    print_summary(summarize(results, ["wavefront"]))